@@ -16,6 +16,50 @@ class Args:
             default=0,
             help="Fine adjustment in seconds to add/subtract when setting time (-10 to 10)"
         )
+        parser.add_argument(
+            "--max-sessions",
+            type=int,
+            default=1,
+            help="Number of watches to serve at the same time"
+        )
+        parser.add_argument(
+            "--snapshot-cache",
+            action="store_true",
+            help="Skip DST/city write-backs when a watch's configuration is unchanged since last time"
+        )
+        parser.add_argument(
+            "--gatt-cache",
+            action="store_true",
+            help="Cache each watch's GATT layout on disk to speed up reconnects"
+        )
+        parser.add_argument(
+            "--continuous-scan",
+            action="store_true",
+            help="Keep one BLE scan running instead of scanning again for every connection"
+        )
+        parser.add_argument(
+            "--on-second",
+            action="store_true",
+            help="Send the time so that it reaches the watch exactly as a second begins"
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=None,
+            help="Serve Prometheus metrics on http://127.0.0.1:<port>/metrics"
+        )
+        parser.add_argument(
+            "--metrics-textfile",
+            default=None,
+            help="Write Prometheus metrics to this file for node_exporter's textfile collector"
+        )
+        parser.add_argument(
+            "--flight-recorder",
+            type=int,
+            default=0,
+            metavar="FRAMES",
+            help="Keep the last FRAMES raw BLE frames in memory and log them when an error occurs"
+        )
         parser.add_argument(
             "-l", "--log_level", default="INFO", help="Sets log level", required=False
         )
@@ -0,0 +1,61 @@
+"""
+Sizes a gateway: sets the time on a fleet of virtual watches and reports
+throughput, latency percentiles and event-loop lag.
+
+    python fleet_benchmark.py --watches 100 200 400 --latency 0.01
+"""
+
+import argparse
+import asyncio
+from collections.abc import Sequence
+import logging
+import sys
+
+from gshock_api.fleet_benchmark import DEFAULT_FLEET_MODELS, run_fleet_benchmark
+from gshock_api.virtual_watch import LinkConditions
+
+__author__ = "Ivo Zivkov"
+__copyright__ = "Ivo Zivkov"
+__license__ = "MIT"
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Time-set throughput against virtual watches")
+    parser.add_argument(
+        "--watches", type=int, nargs="+", default=[30], help="Fleet sizes to run, one after the other"
+    )
+    parser.add_argument(
+        "--models", nargs="+", default=list(DEFAULT_FLEET_MODELS), help="Watch names, used in turn"
+    )
+    parser.add_argument("--latency", type=float, default=0.005, help="One-way radio latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency in seconds")
+    parser.add_argument(
+        "--concurrency", type=int, default=None, help="Most time sets in flight at once (default: all)"
+    )
+    parser.add_argument("-l", "--log_level", default="WARNING", help="Sets log level")
+    return parser.parse_args(argv)
+
+
+def report(line: str) -> None:
+    print(line)  # noqa: T201 - the table is the program's output
+
+
+async def main(argv: Sequence[str]) -> None:
+    args = parse_args(argv)
+    logging.getLogger("gshock_api.logger").setLevel(args.log_level)
+    link = LinkConditions(latency=args.latency, jitter=args.jitter)
+
+    report(f"{'watches':>8} {'sets/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'lag p99 ms':>11} {'failed':>7}")
+    for count in args.watches:
+        result = await run_fleet_benchmark(count, args.models, link, args.concurrency)
+        report(
+            f"{count:>8} {result.time_sets_per_second:>8.1f} "
+            f"{result.latency.percentile(50) * 1000:>8.1f} {result.latency.percentile(99) * 1000:>8.1f} "
+            f"{result.loop_lag.percentile(99) * 1000:>11.1f} {result.failed:>7}"
+        )
+        for model, histogram in sorted(result.latency_by_model.items()):
+            report(f"{'':>8} {model}: p50 {histogram.percentile(50) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
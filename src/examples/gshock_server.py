@@ -9,11 +9,17 @@ from gshock_api.always_connected_watch_filter import (
     always_connected_watch_filter as watch_filter,
 )
 from gshock_api.connection import Connection
-from gshock_api.exceptions import GShockConnectionError
+from gshock_api.continuous_scanner import ContinuousScanner
+from gshock_api.gatt_cache import GattCache
 from gshock_api.gshock_api import GshockAPI
+from gshock_api.instrumentation import Instrumentation
 from gshock_api.iolib.button_pressed_io import WatchButton
 from gshock_api.logger import logger
-from gshock_api.watch_info import watch_info
+from gshock_api.metrics import GatewayMetrics
+from gshock_api.session_manager import SessionManager
+from gshock_api.snapshot_cache import SnapshotCache
+from gshock_api.time_scheduler import TimeSetScheduler
+from gshock_api.watch_info import WatchInfo
 
 __author__ = "Ivo Zivkov"
 __copyright__ = "Ivo Zivkov"
@@ -38,37 +44,60 @@ def prompt() -> None:
     logger.info("")
 
 
-async def run_time_server() -> None:
-    prompt()
-
-    while True:
-        try:
-            logger.info("Waiting for connection...")
-            connection = Connection()
-            await connection.connect(watch_filter.connection_filter)
-            logger.info("Connected...")
+async def set_time_on_watch(api: GshockAPI) -> None:
+    pressed_button = await api.get_pressed_button()
+    if (
+        pressed_button not in (WatchButton.LOWER_RIGHT, WatchButton.NO_BUTTON, WatchButton.LOWER_LEFT)
+    ):
+        return
 
-            api = GshockAPI(connection)
-            pressed_button = await api.get_pressed_button()
-            if (
-                pressed_button not in (WatchButton.LOWER_RIGHT, WatchButton.NO_BUTTON, WatchButton.LOWER_LEFT)
-            ):
-                continue
+    name = await api.get_watch_name()
+    logger.info(f"name: {name}")
 
-            name = await api.get_watch_name()
-            logger.info(f"name: {name}")
+    fine_adjustment_secs = args.get().fine_adjustment_secs
+    await api.set_time(offset=fine_adjustment_secs)
 
-            fine_adjustment_secs = args.get().fine_adjustment_secs
-            await api.set_time(offset=fine_adjustment_secs)
+    logger.info(f"Time set at {datetime.now()} on {api.connection.watch_info.name}")
 
-            logger.info(f"Time set at {datetime.now()} on {watch_info.name}")
 
-            if not watch_info.alwaysConnected:
-                await connection.disconnect()
+async def run_time_server() -> None:
+    prompt()
 
-        except GShockConnectionError as e:
-            logger.error(f"Got error: {e}")
-            continue
+    if args.get().flight_recorder:
+        logger.enable_flight_recorder(args.get().flight_recorder)
+
+    snapshot_cache = SnapshotCache() if args.get().snapshot_cache else None
+    gatt_cache = GattCache() if args.get().gatt_cache else None
+
+    metrics_wanted = args.get().metrics_port is not None or args.get().metrics_textfile
+    instrumentation = Instrumentation() if metrics_wanted else None
+    background: list[asyncio.Task[None]] = []
+    if instrumentation is not None:
+        metrics = GatewayMetrics(instrumentation)
+        if args.get().metrics_port is not None:
+            await metrics.serve(port=args.get().metrics_port)
+        if args.get().metrics_textfile:
+            background.append(
+                asyncio.create_task(metrics.write_textfile_periodically(args.get().metrics_textfile))
+            )
+
+    def new_connection(info: WatchInfo) -> Connection:
+        return Connection(
+            watch_info=info,
+            snapshot_cache=snapshot_cache,
+            gatt_cache=gatt_cache,
+            time_scheduler=TimeSetScheduler() if args.get().on_second else None,
+            instrumentation=instrumentation,
+        )
+
+    sessions = SessionManager(
+        set_time_on_watch,
+        max_sessions=args.get().max_sessions,
+        watch_filter=watch_filter.connection_filter,
+        connection_factory=new_connection,
+        scanner=ContinuousScanner(instrumentation=instrumentation) if args.get().continuous_scan else None,
+    )
+    await sessions.run()
 
 
 if __name__ == "__main__":
@@ -83,7 +83,7 @@ async def run_time_server() -> None:
     while True:
         try:
             logger.info("Waiting for connection...")
-            connection = Connection()
+            connection = Connection(watch_info=watch_info)
             await connection.connect(watch_filter.connection_filter)
             logger.info("Connected...")
 
@@ -1,9 +1,13 @@
-from importlib.metadata import PackageNotFoundError, version  # pragma: no cover
+def __getattr__(name: str) -> str:
+    # importlib.metadata is slow to import; only pay for it when asked
+    if name != "__version__":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-try:
-    dist_name = "gshock_api"
-    __version__ = version(dist_name)
-except PackageNotFoundError:  # pragma: no cover
-    __version__ = "unknown"
-finally:
-    del version, PackageNotFoundError
\ No newline at end of file
+    from importlib.metadata import PackageNotFoundError, version  # noqa: PLC0415
+
+    try:
+        value = version("gshock_api")
+    except PackageNotFoundError:  # pragma: no cover
+        value = "unknown"
+    globals()["__version__"] = value
+    return value
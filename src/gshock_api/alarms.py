@@ -64,8 +64,7 @@ class Alarms:
     def from_json_alarm_secondary_alarms(self, alarms_json: list[AlarmDict]) -> bytearray:
         if len(alarms_json) < 2:
             return bytearray()
-        alarms = self.alarms[1:]
-        return self.create_secondary_alarm(alarms)
+        return self.create_secondary_alarm(alarms_json[1:])
 
     def create_secondary_alarm(self, alarms: list[AlarmDict]) -> bytearray:
         all_alarms: bytearray = bytearray([CHARACTERISTICS["CASIO_SETTING_FOR_ALM2"]])
@@ -88,9 +87,9 @@ alarms_inst = Alarms()
 
 
 class AlarmDecoder:
-    def to_json(self, command: str) -> dict[str, list[str]]:
+    def to_json(self, command: bytes | str) -> dict[str, list[str]]:
         json_response: dict[str, list[str]] = {}
-        int_array: list[int] = to_int_array(command)
+        int_array: list[int] = to_int_array(command) if isinstance(command, str) else list(command)
         alarms: list[str] = []
 
         if int_array[0] == CHARACTERISTICS["CASIO_SETTING_FOR_ALM"]:
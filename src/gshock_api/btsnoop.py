@@ -0,0 +1,413 @@
+"""
+Reader for Android btsnoop_hci.log captures.
+
+The capture is memory-mapped and walked by generators, so records are
+memoryview slices of the file and nothing is copied until an ATT PDU is
+decoded. L2CAP frames are reassembled across ACL fragments, so long
+notifications such as the 101-byte GW-BX5600 SP_DATA reply come out whole.
+
+For long captures, BtsnoopCapture.index() builds an AttIndex (timestamp,
+opcode, handle and record offsets of every ATT PDU) and keeps it next to the
+capture, so queries such as "all SP_DATA notifications" only decode the
+records they return:
+
+    with BtsnoopCapture("soak.log") as capture:
+        for packet in capture.query(handle=0x19, opcode=AttOpcode.NOTIFICATION):
+            ...
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from dataclasses import dataclass
+from enum import IntEnum
+import mmap
+import os
+from pathlib import Path
+import struct
+import sys
+from typing import Final, NamedTuple
+
+from gshock_api.logger import logger
+
+BTSNOOP_MAGIC: Final[bytes] = b"btsnoop\0"
+FILE_HEADER_SIZE: Final[int] = 16
+RECORD_HEADER_SIZE: Final[int] = 24
+RECORD_HEADER: Final[struct.Struct] = struct.Struct(">IIIIq")
+
+H4_ACL: Final[int] = 0x02
+ACL_HEADER_SIZE: Final[int] = 5  # H4 packet type, handle and flags, length
+L2CAP_HEADER_SIZE: Final[int] = 4  # length, channel id
+ATT_HEADER_SIZE: Final[int] = 3  # opcode, attribute handle
+ATT_CID: Final[int] = 0x0004
+
+# btsnoop timestamps count microseconds from 0000-01-01; this is 1970-01-01
+BTSNOOP_EPOCH_DELTA_US: Final[int] = 0x00DCDDB30F2F8000
+
+ACL_CONTINUATION: Final[int] = 0b01
+
+INDEX_SUFFIX: Final[str] = ".attidx"
+INDEX_MAGIC: Final[bytes] = b"GSATTIX1" + (b"<" if sys.byteorder == "little" else b">")
+INDEX_HEADER: Final[struct.Struct] = struct.Struct("<9sQQQQ")
+
+
+class AttOpcode(IntEnum):
+    READ_RESPONSE = 0x0B
+    WRITE_REQUEST = 0x12
+    NOTIFICATION = 0x1B
+    INDICATION = 0x1D
+    WRITE_COMMAND = 0x52
+
+
+class BtsnoopRecord(NamedTuple):
+    index: int  # record number in the file, from 0
+    offset: int  # file offset of the record header
+    flags: int
+    timestamp_us: int  # since the Unix epoch
+    data: memoryview  # H4 packet, a view into the mapped file
+
+    @property
+    def sent(self) -> bool:
+        return not (self.flags & 0x01)
+
+
+@dataclass(frozen=True)
+class AttPacket:
+    """One ATT PDU. sent is True for host-to-watch traffic."""
+
+    index: int  # record number of the first fragment
+    timestamp: float  # seconds since the Unix epoch
+    sent: bool
+    acl_handle: int
+    opcode: AttOpcode
+    handle: int
+    value: bytes
+
+    @property
+    def is_write(self) -> bool:
+        return self.opcode in (AttOpcode.WRITE_REQUEST, AttOpcode.WRITE_COMMAND)
+
+    @property
+    def is_notification(self) -> bool:
+        return self.opcode in (AttOpcode.NOTIFICATION, AttOpcode.INDICATION)
+
+
+class _Frame(NamedTuple):
+    """A complete L2CAP ATT frame and the records it was carried in."""
+
+    pdu: memoryview | bytes
+    first: BtsnoopRecord
+    acl_handle: int
+    offsets: list[int]
+
+
+def iter_records(buffer: mmap.mmap | bytes) -> Iterator[BtsnoopRecord]:
+    """Yields every record of a btsnoop buffer without copying packet data."""
+    if buffer[: len(BTSNOOP_MAGIC)] != BTSNOOP_MAGIC:
+        raise ValueError("Not a btsnoop file")
+
+    view = memoryview(buffer)
+    size = len(view)
+    offset = FILE_HEADER_SIZE
+    index = 0
+    while offset + RECORD_HEADER_SIZE <= size:
+        _orig_len, inc_len, flags, _drops, ts = RECORD_HEADER.unpack_from(buffer, offset)
+        start = offset + RECORD_HEADER_SIZE
+        yield BtsnoopRecord(index, offset, flags, ts - BTSNOOP_EPOCH_DELTA_US, view[start : start + inc_len])
+        offset = start + inc_len
+        index += 1
+
+
+def _record_at(buffer: mmap.mmap | bytes, offset: int, index: int = -1) -> BtsnoopRecord:
+    _orig_len, inc_len, flags, _drops, ts = RECORD_HEADER.unpack_from(buffer, offset)
+    start = offset + RECORD_HEADER_SIZE
+    return BtsnoopRecord(index, offset, flags, ts - BTSNOOP_EPOCH_DELTA_US, memoryview(buffer)[start : start + inc_len])
+
+
+def _acl_header(record: BtsnoopRecord) -> tuple[int, int] | None:
+    """(ACL handle, packet boundary flag) of an ACL data record, else None."""
+    data = record.data
+    if len(data) < ACL_HEADER_SIZE or data[0] != H4_ACL:
+        return None
+    handle_flags = data[1] | (data[2] << 8)
+    return handle_flags & 0x0FFF, (handle_flags >> 12) & 0x3
+
+
+def iter_att_frames(records: Iterator[BtsnoopRecord]) -> Iterator[_Frame]:
+    """Reassembles ATT frames per ACL connection and direction."""
+    partial: dict[tuple[int, bool], tuple[int, BtsnoopRecord, bytearray, list[int]]] = {}
+
+    for record in records:
+        acl = _acl_header(record)
+        if acl is None:
+            continue
+        acl_handle, boundary = acl
+        key = (acl_handle, record.sent)
+        fragment = record.data[ACL_HEADER_SIZE:]
+
+        if boundary == ACL_CONTINUATION:
+            if key not in partial:
+                continue
+            expected, first, buffer, offsets = partial[key]
+            buffer.extend(fragment)
+            offsets.append(record.offset)
+            if len(buffer) < expected:
+                continue
+            del partial[key]
+            frame: memoryview | bytes = bytes(buffer)
+        else:
+            partial.pop(key, None)
+            if len(fragment) < L2CAP_HEADER_SIZE:
+                continue
+            expected = (fragment[0] | (fragment[1] << 8)) + L2CAP_HEADER_SIZE
+            if len(fragment) < expected:
+                partial[key] = (expected, record, bytearray(fragment), [record.offset])
+                continue
+            first, offsets, frame = record, [record.offset], fragment
+
+        if (frame[2] | (frame[3] << 8)) == ATT_CID and expected > L2CAP_HEADER_SIZE:
+            yield _Frame(frame[L2CAP_HEADER_SIZE:expected], first, acl_handle, offsets)
+
+
+def _att_header(pdu: memoryview | bytes) -> tuple[AttOpcode, int] | None:
+    try:
+        opcode = AttOpcode(pdu[0])
+    except ValueError:
+        return None
+    if opcode == AttOpcode.READ_RESPONSE:
+        return opcode, 0
+    if len(pdu) < ATT_HEADER_SIZE:
+        return None
+    return opcode, pdu[1] | (pdu[2] << 8)
+
+
+def _to_packet(frame: _Frame) -> AttPacket | None:
+    header = _att_header(frame.pdu)
+    if header is None:
+        return None
+    opcode, handle = header
+    value = frame.pdu[1:] if opcode == AttOpcode.READ_RESPONSE else frame.pdu[3:]
+    return AttPacket(
+        index=frame.first.index,
+        timestamp=frame.first.timestamp_us / 1_000_000,
+        sent=frame.first.sent,
+        acl_handle=frame.acl_handle,
+        opcode=opcode,
+        handle=handle,
+        value=bytes(value),
+    )
+
+
+class AttIndex:
+    """
+    Column arrays describing every ATT PDU in a capture, in file order.
+
+    fragment_offsets[fragment_start[i]:fragment_start[i + 1]] are the file
+    offsets of the records that carried PDU i.
+    """
+
+    def __init__(self) -> None:
+        self.records = array("q")  # record number of the first fragment
+        self.timestamps = array("q")  # microseconds since the Unix epoch
+        self.opcodes = array("B")
+        self.handles = array("H")
+        self.sent = array("B")
+        self.acl_handles = array("H")
+        self.fragment_start = array("q", [0])
+        self.fragment_offsets = array("q")
+        self._by_handle: dict[int, list[int]] | None = None
+        self._time_ordered: bool | None = None
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def add(self, frame: _Frame, opcode: AttOpcode, handle: int) -> None:
+        self.records.append(frame.first.index)
+        self.timestamps.append(frame.first.timestamp_us)
+        self.opcodes.append(opcode)
+        self.handles.append(handle)
+        self.sent.append(frame.first.sent)
+        self.acl_handles.append(frame.acl_handle)
+        self.fragment_offsets.extend(frame.offsets)
+        self.fragment_start.append(len(self.fragment_offsets))
+
+    def offsets(self, position: int) -> array:  # type: ignore[type-arg]
+        return self.fragment_offsets[self.fragment_start[position] : self.fragment_start[position + 1]]
+
+    def select(
+        self,
+        handle: int | None = None,
+        opcode: int | None = None,
+        sent: bool | None = None,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> list[int]:
+        """Positions of PDUs matching every given criterion; since/until are Unix seconds."""
+        if handle is not None:
+            if self._by_handle is None:
+                self._by_handle = {}
+                for position, h in enumerate(self.handles):
+                    self._by_handle.setdefault(h, []).append(position)
+            candidates: list[int] | range = self._by_handle.get(handle, [])
+        elif self._is_time_ordered():
+            # Captures are normally written in time order, so a time range is a slice
+            low = bisect_left(self.timestamps, round(since * 1_000_000)) if since is not None else 0
+            high = (
+                bisect_right(self.timestamps, round(until * 1_000_000))
+                if until is not None
+                else len(self)
+            )
+            candidates = range(low, high)
+        else:
+            candidates = range(len(self))
+
+        since_us = None if since is None else round(since * 1_000_000)
+        until_us = None if until is None else round(until * 1_000_000)
+        return [
+            p
+            for p in candidates
+            if (opcode is None or self.opcodes[p] == opcode)
+            and (sent is None or bool(self.sent[p]) == sent)
+            and (since_us is None or self.timestamps[p] >= since_us)
+            and (until_us is None or self.timestamps[p] <= until_us)
+        ]
+
+    def _is_time_ordered(self) -> bool:
+        if self._time_ordered is None:
+            t = self.timestamps
+            self._time_ordered = all(t[i] <= t[i + 1] for i in range(len(t) - 1))
+        return self._time_ordered
+
+    def save(self, path: Path, capture_size: int, capture_mtime_ns: int) -> None:
+        columns = (
+            self.records, self.timestamps, self.opcodes, self.handles, self.sent, self.acl_handles,
+            self.fragment_start, self.fragment_offsets,
+        )
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, capture_size, capture_mtime_ns, len(self), len(self.fragment_offsets)))
+            for column in columns:
+                column.tofile(f)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, capture_size: int, capture_mtime_ns: int) -> "AttIndex | None":
+        """Loads an index saved for this exact capture; None if missing or stale."""
+        try:
+            with path.open("rb") as f:
+                magic, size, mtime_ns, count, fragments = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+                if (magic, size, mtime_ns) != (INDEX_MAGIC, capture_size, capture_mtime_ns):
+                    return None
+                index = cls()
+                index.fragment_start = array("q")
+                for column, length in (
+                    (index.records, count),
+                    (index.timestamps, count),
+                    (index.opcodes, count),
+                    (index.handles, count),
+                    (index.sent, count),
+                    (index.acl_handles, count),
+                    (index.fragment_start, count + 1),
+                    (index.fragment_offsets, fragments),
+                ):
+                    column.fromfile(f, length)
+                return index
+        except (OSError, EOFError, struct.error) as e:
+            logger.debug(f"Ignoring ATT index {path}: {e}")
+            return None
+
+
+class BtsnoopCapture:
+    """A memory-mapped btsnoop capture. Use as a context manager, or call close()."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size < FILE_HEADER_SIZE:
+                raise ValueError(f"{self.path} is not a btsnoop file")
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[: len(BTSNOOP_MAGIC)] != BTSNOOP_MAGIC:
+            self.buffer.close()
+            raise ValueError(f"{self.path} is not a btsnoop file")
+        self._index: AttIndex | None = None
+
+    def close(self) -> None:
+        try:
+            self.buffer.close()
+        except BufferError:
+            # Records handed out still point into the map; it is unmapped when they go
+            logger.debug(f"{self.path} still has live record views, leaving it mapped")
+
+    def __enter__(self) -> "BtsnoopCapture":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def records(self) -> Iterator[BtsnoopRecord]:
+        return iter_records(self.buffer)
+
+    def att_packets(self) -> Iterator[AttPacket]:
+        for frame in iter_att_frames(self.records()):
+            packet = _to_packet(frame)
+            if packet is not None:
+                yield packet
+
+    def build_index(self) -> AttIndex:
+        index = AttIndex()
+        for frame in iter_att_frames(self.records()):
+            header = _att_header(frame.pdu)
+            if header is not None:
+                index.add(frame, *header)
+        return index
+
+    def index(self, persist: bool = True) -> AttIndex:
+        """The capture's ATT index, loaded from or saved to <capture>.attidx when persist is set."""
+        if self._index is not None:
+            return self._index
+
+        stat = self.path.stat()
+        index_path = self.path.with_name(self.path.name + INDEX_SUFFIX)
+        index = AttIndex.load(index_path, stat.st_size, stat.st_mtime_ns) if persist else None
+        if index is None:
+            index = self.build_index()
+            if persist:
+                try:
+                    index.save(index_path, stat.st_size, stat.st_mtime_ns)
+                except OSError as e:
+                    logger.warning(f"Could not save ATT index {index_path}: {e}")
+        self._index = index
+        return index
+
+    def packet(self, position: int) -> AttPacket:
+        """Decodes the indexed PDU at position, reading only its own records."""
+        index = self.index()
+        offsets = index.offsets(position)
+        records = [_record_at(self.buffer, offsets[0], index.records[position])]
+        records += [_record_at(self.buffer, offset) for offset in offsets[1:]]
+        frame = next(iter_att_frames(iter(records)), None)
+        packet = _to_packet(frame) if frame is not None else None
+        if packet is None:
+            raise ValueError(f"No ATT PDU at index position {position}")
+        return packet
+
+    def query(
+        self,
+        handle: int | None = None,
+        opcode: int | None = None,
+        sent: bool | None = None,
+        since: float | None = None,
+        until: float | None = None,
+    ) -> Iterator[AttPacket]:
+        for position in self.index().select(handle, opcode, sent, since, until):
+            yield self.packet(position)
+
+
+def iter_att_packets(path: Path | str) -> Iterator[AttPacket]:
+    """Streams every ATT write and notification in a capture, in file order."""
+    with BtsnoopCapture(path) as capture:
+        yield from capture.att_packets()
+
+
+def read_att_packets(path: Path | str) -> list[AttPacket]:
+    return list(iter_att_packets(path))
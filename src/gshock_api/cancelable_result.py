@@ -1,7 +1,7 @@
 import asyncio
 from typing import Generic, TypeVar
 
-from gshock_api.exceptions import GShockConnectionError
+from gshock_api.exceptions import GShockTimeoutError
 
 T = TypeVar("T")
 
@@ -27,14 +27,21 @@ class CancelableResult(Generic[T]):  # noqa: UP046
             # Ensure the future is finalized so callers won't hang forever
             if not self._future.done():
                 self._future.set_exception(
-                    GShockConnectionError(
+                    GShockTimeoutError(
                         f"Timeout waiting for response from the watch: {e}"
                     )
                 )
-            raise GShockConnectionError(
+            raise GShockTimeoutError(
                 f"Timeout waiting for response from the watch: {e}"
             ) from e
 
     def set_result(self, value: T) -> None:
         if not self._future.done():
-            self._future.set_result(value)
\ No newline at end of file
+            self._future.set_result(value)
+
+    def set_exception(self, exc: BaseException) -> None:
+        if not self._future.done():
+            self._future.set_exception(exc)
+
+    def done(self) -> bool:
+        return self._future.done()
@@ -75,4 +75,9 @@ class CasioConstants:
         "GW_BX5600_SP_DATA_HEADER_06": 0x06,
 
         "CASIO_HOME_TIME": 0x24,
+
+        # ABL-100 DATA_REQUEST_SP: start-of-transfer announcement ("00 11 <length:3>")
+        "CASIO_DRSP_START": 0x00,
+        # ... and its end ("04 11 00 00 00"), sent by either side
+        "CASIO_DRSP_END": 0x04,
     }
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+Typed commands sent to the watch through MessageDispatcher.
+
+In-process callers build one of these dataclasses and pass it to
+``Connection.send_message``; the dispatcher picks the sender by type, so no
+JSON is produced or parsed on the way. JSON messages from external callers
+(``{"action": "SET_TIMER", "value": 90}``) are converted with ``from_json``
+and then take the same path.
+"""
+
+from dataclasses import dataclass, field
+import json
+from typing import Any, ClassVar
+
+
+@dataclass(frozen=True)
+class WatchCommand:
+    """Base class for all commands. ACTION is the JSON action name."""
+
+    ACTION: ClassVar[str] = ""
+
+    @classmethod
+    def from_dict(cls, message: dict[str, Any]) -> "WatchCommand":  # noqa: ARG003
+        return cls()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"action": self.ACTION}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+
+@dataclass(frozen=True)
+class GetAlarms(WatchCommand):
+    ACTION: ClassVar[str] = "GET_ALARMS"
+
+
+@dataclass(frozen=True)
+class SetAlarms(WatchCommand):
+    ACTION: ClassVar[str] = "SET_ALARMS"
+
+    alarms: list[dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, message: dict[str, Any]) -> "SetAlarms":
+        return cls(alarms=message.get("value") or [])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"action": self.ACTION, "value": self.alarms}
+
+
+@dataclass(frozen=True)
+class SetReminders(WatchCommand):
+    ACTION: ClassVar[str] = "SET_REMINDERS"
+
+    reminders: list[dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, message: dict[str, Any]) -> "SetReminders":
+        return cls(reminders=message.get("value") or [])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"action": self.ACTION, "value": self.reminders}
+
+
+@dataclass(frozen=True)
+class GetSettings(WatchCommand):
+    ACTION: ClassVar[str] = "GET_SETTINGS"
+
+
+@dataclass(frozen=True)
+class SetSettings(WatchCommand):
+    ACTION: ClassVar[str] = "SET_SETTINGS"
+
+    settings: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, message: dict[str, Any]) -> "SetSettings":
+        return cls(settings=message.get("value") or {})
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"action": self.ACTION, "value": self.settings}
+
+
+@dataclass(frozen=True)
+class GetTimeAdjustment(WatchCommand):
+    ACTION: ClassVar[str] = "GET_TIME_ADJUSTMENT"
+
+
+@dataclass(frozen=True)
+class SetTimeAdjustment(WatchCommand):
+    ACTION: ClassVar[str] = "SET_TIME_ADJUSTMENT"
+
+    time_adjustment: bool = False
+    minutes_after_hour: int = 0
+
+    @classmethod
+    def from_dict(cls, message: dict[str, Any]) -> "SetTimeAdjustment":
+        # The JSON form has always carried both fields as strings ("True", "30")
+        return cls(
+            time_adjustment=str(message.get("timeAdjustment")).lower() in ("true", "1"),
+            minutes_after_hour=int(message.get("minutesAfterHour", 0)),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "action": self.ACTION,
+            "timeAdjustment": str(self.time_adjustment),
+            "minutesAfterHour": str(self.minutes_after_hour),
+        }
+
+
+@dataclass(frozen=True)
+class GetTimer(WatchCommand):
+    ACTION: ClassVar[str] = "GET_TIMER"
+
+
+@dataclass(frozen=True)
+class SetTimer(WatchCommand):
+    ACTION: ClassVar[str] = "SET_TIMER"
+
+    seconds: int = 0
+
+    @classmethod
+    def from_dict(cls, message: dict[str, Any]) -> "SetTimer":
+        return cls(seconds=int(message.get("value", 0)))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"action": self.ACTION, "value": self.seconds}
+
+
+@dataclass(frozen=True)
+class SetTime(WatchCommand):
+    """Sets the watch time. time is a Unix timestamp; None means "now" at send time."""
+
+    ACTION: ClassVar[str] = "SET_TIME"
+
+    time: float | None = None
+    offset: int = 0
+
+    @classmethod
+    def from_dict(cls, message: dict[str, Any]) -> "SetTime":
+        value: dict[str, Any] = message.get("value") or {}
+        return cls(time=value.get("time"), offset=int(value.get("offset", 0)))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "action": self.ACTION,
+            "value": {
+                "time": None if self.time is None else round(self.time),
+                "offset": self.offset,
+            },
+        }
+
+
+@dataclass(frozen=True)
+class GetHomeTime(WatchCommand):
+    ACTION: ClassVar[str] = "GET_HOME_TIME"
+
+
+COMMAND_TYPES: dict[str, type[WatchCommand]] = {
+    command_type.ACTION: command_type
+    for command_type in (
+        GetAlarms,
+        SetAlarms,
+        SetReminders,
+        GetSettings,
+        SetSettings,
+        GetTimeAdjustment,
+        SetTimeAdjustment,
+        GetTimer,
+        SetTimer,
+        SetTime,
+        GetHomeTime,
+    )
+}
+
+
+def from_json(message: str) -> WatchCommand:
+    """
+    Parses a JSON action message into its command.
+
+    Raises ValueError if the message is not valid JSON or names no known action.
+    """
+    parsed = json.loads(message)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Message is not a JSON object: {message}")
+
+    action = parsed.get("action")
+    command_type = COMMAND_TYPES.get(action) if isinstance(action, str) else None
+    if command_type is None:
+        raise ValueError(f"Unknown action: {action}")
+
+    return command_type.from_dict(parsed)
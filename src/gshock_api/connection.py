@@ -1,21 +1,48 @@
-from collections.abc import Callable
-from typing import Any, TypeVar
-
-from bleak import BleakClient
-from bleak.backends.characteristic import BleakGATTCharacteristic
-from bleak.exc import BleakDBusError
+import asyncio
+from collections.abc import Callable, Collection, Iterable
+import time
+from typing import TYPE_CHECKING, Any, TypeVar
 
 from gshock_api import message_dispatcher
 from gshock_api.casio_constants import CasioConstants
+from gshock_api.commands import WatchCommand
 from gshock_api.exceptions import GShockConnectionError, GShockIgnorableException
+from gshock_api.gatt_cache import GattCache, GattLayout
+from gshock_api.instrumentation import (
+    CONNECT,
+    NOTIFICATION,
+    SCAN,
+    WRITE,
+    Instrumentation,
+    OperationEvent,
+    Traffic,
+)
+from gshock_api.link_latency import RoundTripEstimator
 from gshock_api.logger import logger
+from gshock_api.notification_queue import (
+    DECODE_INLINE,
+    DEFAULT_CAPACITY,
+    NotificationQueue,
+)
+from gshock_api.pending_requests import PendingRequests
 from gshock_api.scanner import scanner
-from gshock_api.utils import to_casio_cmd
+from gshock_api.snapshot_cache import SnapshotCache
+from gshock_api.time_scheduler import TimeSetScheduler
+from gshock_api.utils import ByteData, as_bytes
+from gshock_api.watch_info import WatchInfo
+from gshock_api.write_queue import WriteQueue
+
+if TYPE_CHECKING:
+    from bleak import BleakClient
+    from bleak.backends.characteristic import BleakGATTCharacteristic
 
 T = TypeVar("T")
 
 WatchFilter = Callable[[Any], bool] | None
 Device = Any | None
+# Builds the BLE client for an address; BleakClient (imported on first connect)
+# unless testing against a VirtualWatch
+ClientFactory = Callable[..., Any]
 
 
 class Connection:
@@ -23,16 +50,70 @@ class Connection:
 
     HandleMap = dict[int, str]
 
-    def __init__(self, address: str | None = None) -> None:
+    def __init__(  # noqa: PLR0913 - optional collaborators, all keyword-only
+        self,
+        address: str | None = None,
+        *,
+        watch_info: WatchInfo | None = None,
+        snapshot_cache: SnapshotCache | None = None,
+        gatt_cache: GattCache | None = None,
+        client_factory: ClientFactory | None = None,
+        time_scheduler: TimeSetScheduler | None = None,
+        instrumentation: Instrumentation | None = None,
+        ingress_capacity: int = DEFAULT_CAPACITY,
+        ingress_policy: str = DECODE_INLINE,
+    ) -> None:
         self.handles_map: Connection.HandleMap = self.init_handles_map()
+        # bleak's characteristic.handle is not the ATT handle on every backend
+        self.notify_handles: dict[str, int] = {uuid: handle for handle, uuid in self.handles_map.items()}
         self.address: str | None = address
+        # Advertised device for address, if the caller already scanned; spares
+        # BleakClient its own discovery scan
+        self.device: Device = None
+        # Model and capabilities of the watch on this connection, a new
+        # WatchInfo unless the caller passes the one it reads afterwards.
+        self.watch_info: WatchInfo = watch_info if watch_info is not None else WatchInfo()
+        # Optional cache of the time-set preamble; see StandardProtocol.initialize_for_setting_time
+        self.snapshot_cache: SnapshotCache | None = snapshot_cache
+        # Optional on-disk cache of the GATT layout, used to speed up reconnects
+        self.gatt_cache: GattCache | None = gatt_cache
+        self.client_factory: ClientFactory | None = client_factory
         self.client: BleakClient | None = None
         self.characteristics_map: dict[str, str] = {}
+        self.pending: PendingRequests = PendingRequests()
+        # Round trip of writes-with-response, used to compensate the time set
+        self.latency: RoundTripEstimator | None = RoundTripEstimator()
+        # Optional: release the time-set write on a whole-second deadline
+        self.time_scheduler: TimeSetScheduler | None = time_scheduler
+        # Optional timing of API calls, writes and notifications; see gshock_api.instrumentation
+        self.instrumentation: Instrumentation | None = instrumentation
+        self.traffic: Traffic = Traffic()
+        # Outgoing writes, in order; see gshock_api.write_queue
+        self.writes: WriteQueue = WriteQueue(self._send)
+        # Received notifications, decoded off the BLE callback; see gshock_api.notification_queue
+        self.ingress: NotificationQueue[tuple[int, bytes]] = NotificationQueue(self._dispatch, ingress_capacity, ingress_policy)
 
     def notification_handler(
-        self, characteristic: BleakGATTCharacteristic, data: bytearray  # noqa: ARG002
+        self, characteristic: "BleakGATTCharacteristic", data: bytearray
     ) -> None:
-        message_dispatcher.MessageDispatcher.on_received(data)
+        payload = bytes(data)
+        handle = self.notify_handles.get(characteristic.uuid, characteristic.handle)
+        self.traffic.notifications += 1
+        self.traffic.bytes_received += len(payload)
+        logger.frame("rx", handle, payload)
+        if self.instrumentation is not None:
+            now = time.monotonic()
+            self.instrumentation.record(
+                OperationEvent(
+                    NOTIFICATION, f"0x{handle:02X}", self.watch_info.model.name,
+                    self.address, now, now, bytes_received=len(payload),
+                )
+            )
+        self.ingress.put((handle, payload))
+
+    def _dispatch(self, frame: tuple[int, bytes]) -> None:
+        handle, payload = frame
+        message_dispatcher.MessageDispatcher.on_received(payload, connection=self, handle=handle)
 
     async def init_characteristics_map(self) -> None:
         """Populates self.characteristics_map with UUIDs of all available characteristics."""
@@ -44,24 +125,65 @@ class Connection:
             for char in service.characteristics:
                 self.characteristics_map[char.uuid] = char.uuid
 
-    async def connect(self, watch_filter: WatchFilter = None) -> bool:
+    async def connect(
+        self, watch_filter: WatchFilter = None, exclude_addresses: Collection[str] = ()
+    ) -> bool:
         """Connects to the G-Shock watch, optionally scanning if no address is provided."""
+        if self.instrumentation is None:
+            return await self._connect(watch_filter, exclude_addresses)
+
+        start = time.monotonic()
+        connected = await self._connect(watch_filter, exclude_addresses)
+        self.instrumentation.record(
+            OperationEvent(
+                CONNECT, "connect", self.watch_info.model.name, self.address,
+                start, time.monotonic(), error=None if connected else "ConnectFailed",
+            )
+        )
+        return connected
+
+    async def _connect(
+        self, watch_filter: WatchFilter, exclude_addresses: Collection[str]
+    ) -> bool:
         try:
             if self.address is None:
                 device: Device = await scanner.scan(
                     device_address=self.address,
-                    watch_filter=watch_filter
+                    watch_filter=watch_filter,
+                    exclude_addresses=exclude_addresses,
+                    info=self.watch_info,
                 )
                 if device is None:
                     logger.info("No G-Shock device found or name matches excluded watches.")
                     return False
 
                 self.address = device.address
+                self.device = device
+                if self.instrumentation is not None:
+                    now = time.monotonic()
+                    self.instrumentation.record(
+                        OperationEvent(SCAN, "scan", self.watch_info.model.name, self.address, now, now)
+                    )
 
             if self.address is None:
                 return False
+            self.watch_info.set_address(self.address)
 
-            self.client = BleakClient(self.address)
+            model = self.watch_info.model.name
+            layout = self.gatt_cache.get(self.address, model) if self.gatt_cache else None
+
+            client_factory = self.client_factory
+            if client_factory is None:
+                from bleak import BleakClient  # noqa: PLC0415 - bleak loads on first connect
+
+                client_factory = BleakClient
+
+            # A cached layout limits discovery to the services we actually use
+            scanned = self.device is not None and self.device.address == self.address
+            self.client = client_factory(
+                self.device if scanned else self.address,
+                services=list(layout.services) if layout else None,
+            )
             await self.client.connect()
 
             if not self.client.is_connected:
@@ -69,20 +191,24 @@ class Connection:
                 return False
 
             await self.init_characteristics_map()
+            if layout is None:
+                layout = self.discover_layout()
+            elif not set(layout.characteristics) <= set(self.characteristics_map):
+                logger.info(f"Cached GATT layout for {self.address} is stale, rediscovering")
+                layout = self.discover_layout()
 
             # Subscribe to notifications on every characteristic that supports
             # them. This makes the connection self-adapting across all watch
             # models without needing per-model whitelists or hardcoded UUIDs.
-            for service in self.client.services:
-                for char in service.characteristics:
-                    if "notify" in char.properties or "indicate" in char.properties:
-                        try:
-                            await self.client.start_notify(
-                                char.uuid, self.notification_handler
-                            )
-                            logger.info(f"Subscribed to notifications: {char.uuid}")
-                        except Exception as e:
-                            logger.debug(f"start_notify failed for {char.uuid}: {e}")
+            failed = await self.subscribe_notifications(layout.notify)
+
+            if self.gatt_cache is not None:
+                # Remember only subscriptions that worked; they are retried next time
+                # only if the layout has to be rediscovered.
+                subscribed = [uuid for uuid in layout.notify if uuid not in failed]
+                self.gatt_cache.put(
+                    self.address, model, layout.services, layout.characteristics, subscribed
+                )
 
             return True
 
@@ -90,8 +216,55 @@ class Connection:
             logger.info(f"[GShock Connect] Connection failed: {e}")
             return False
 
+    def discover_layout(self) -> GattLayout:
+        """Walks the connected client's services and records what we use."""
+        services: list[str] = []
+        notify: list[str] = []
+        if self.client is not None:
+            for service in self.client.services:
+                services.append(service.uuid)
+                notify.extend(
+                    char.uuid
+                    for char in service.characteristics
+                    if "notify" in char.properties or "indicate" in char.properties
+                )
+        return GattLayout(
+            services=tuple(services),
+            characteristics=tuple(self.characteristics_map),
+            notify=tuple(notify),
+        )
+
+    async def subscribe_notifications(self, uuids: Iterable[str]) -> list[str]:
+        """Starts notifications on all uuids concurrently. Returns the ones that failed."""
+        if self.client is None:
+            return list(uuids)
+
+        client = self.client
+        uuids = list(uuids)
+        results = await asyncio.gather(
+            *(client.start_notify(uuid, self.notification_handler) for uuid in uuids),
+            return_exceptions=True,
+        )
+
+        failed: list[str] = []
+        for uuid, result in zip(uuids, results, strict=True):
+            if isinstance(result, BaseException):
+                logger.debug("start_notify failed for %s: %s", uuid, result)
+                failed.append(uuid)
+            else:
+                logger.info("Subscribed to notifications: %s", uuid)
+        return failed
+
     async def disconnect(self) -> None:
         """Disconnects the BLE client if connected."""
+        if self.client and self.client.is_connected:
+            try:
+                await self.writes.flush()
+            except GShockConnectionError as e:
+                logger.debug("Queued write failed before disconnecting: %s", e)
+        self.writes.close("Disconnected before the write was sent")
+        self.ingress.close()
+        self.pending.fail_all("Disconnected while waiting for response from the watch")
         if self.client and self.client.is_connected:
             await self.client.disconnect()
 
@@ -103,31 +276,65 @@ class Connection:
         0x17,  # SP_REQUEST           — WRITE_NO_RESP confirmed from log
     })
 
-    async def write(self, handle: int, data: bytes | str) -> None:
-        try:
-            uuid: str | None = self.handles_map.get(handle)
+    async def write(self, handle: int, data: ByteData) -> None:
+        """
+        Writes to a handle. Writes without response are queued and return at
+        once; use flush() to wait until they have been sent.
+        """
+        uuid: str | None = self.handles_map.get(handle)
+
+        if uuid is None or uuid not in self.characteristics_map:
+            logger.info(f"write failed: handle {handle} not in characteristics map")
+            if handle == 0x0D:
+                logger.info("Your watch does not support notifications...")
+            return
 
-            if uuid is None or uuid not in self.characteristics_map:
-                logger.info(f"write failed: handle {handle} not in characteristics map")
-                if handle == 0x0D:
-                    logger.info("Your watch does not support notifications...")
-                return
+        if self.client:
+            await self.writes.put(handle, as_bytes(data), handle not in self.NO_RESPONSE_HANDLES)
 
-            response_type: bool = handle not in self.NO_RESPONSE_HANDLES
-            cmd_data: bytes = to_casio_cmd(data) if isinstance(data, str) else bytes(data)
+    async def flush(self) -> None:
+        """Waits until all queued writes have been sent."""
+        await self.writes.flush()
 
-            if self.client:
-                await self.client.write_gatt_char(uuid, cmd_data, response=response_type)
+    async def _send(self, handle: int, cmd_data: bytes, response_type: bool) -> None:
+        try:
+            if self.client is None:
+                raise GShockConnectionError("Not connected")
+            logger.frame("tx", handle, cmd_data)
+            started = time.perf_counter()
+            await self.client.write_gatt_char(self.handles_map[handle], cmd_data, response=response_type)
+            elapsed = time.perf_counter() - started
+            if response_type and self.latency is not None:
+                self.latency.add(elapsed)
+            self.traffic.writes += 1
+            self.traffic.bytes_sent += len(cmd_data)
+            if self.instrumentation is not None:
+                end = time.monotonic()
+                self.instrumentation.record(
+                    OperationEvent(
+                        WRITE, f"0x{handle:02X}", self.watch_info.model.name,
+                        self.address, end - elapsed, end, bytes_sent=len(cmd_data),
+                    )
+                )
 
+        except GShockConnectionError:
+            raise
         except Exception as e:
             e.args = (type(e).__name__,)
+            from bleak.exc import BleakDBusError  # noqa: PLC0415 - see connect()
+
             if isinstance(e, (BleakDBusError, EOFError)):
                 raise GShockIgnorableException(e) from e
             raise GShockConnectionError(f"Unable to send time to watch: {e}") from e
 
-    async def request(self, request: T) -> None:
-        """Sends a request using the read request characteristic handle (0x0C)."""
+    async def request(self, request: ByteData) -> None:
+        """
+        Sends a request using the read request characteristic handle (0x0C).
+        Returns once it has been sent, so a failed write is raised here rather
+        than leaving the caller to wait for a reply that never comes.
+        """
         await self.write(0x0C, request)
+        await self.flush()
 
     def init_handles_map(self) -> HandleMap:
         """Initializes and returns the mapping of integer handles to characteristic UUIDs."""
@@ -150,6 +357,6 @@ class Connection:
         
         return handles_map
 
-    async def send_message(self, message: T) -> None:
-        """Sends a message to the watch using the message dispatcher."""
-        await message_dispatcher.MessageDispatcher.send_to_watch(message)
+    async def send_message(self, message: WatchCommand | str) -> None:
+        """Sends a command (or its JSON form) to the watch using the message dispatcher."""
+        await message_dispatcher.MessageDispatcher.send_to_watch(message, self)
@@ -0,0 +1,151 @@
+"""
+Long-running BLE scanner for servers that handle several watches.
+
+Unlike Scanner.scan, which starts a fresh scan for every connection and stops
+at the first hit, ContinuousScanner keeps one BleakScanner running, remembers
+every Casio watch it has seen for a while, and reports watches that are ready
+to connect through an async iterator.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Collection
+from dataclasses import dataclass
+import time
+from typing import TYPE_CHECKING, Final
+
+from gshock_api.instrumentation import SCAN, Instrumentation, OperationEvent
+from gshock_api.logger import logger
+from gshock_api.watch_info import WatchModel, resolve_model
+
+if TYPE_CHECKING:
+    from bleak import BleakScanner, BLEDevice
+    from bleak.backends.scanner import AdvertisementData
+
+# Same service UUID that Scanner.scan filters on
+CASIO_SERVICE_UUID: Final[str] = "00001804-0000-1000-8000-00805f9b34fb"
+
+# A watch that has not advertised for this long is treated as gone
+DEFAULT_TTL_SECONDS: Final[float] = 30.0
+
+
+@dataclass
+class SeenWatch:
+    address: str
+    name: str
+    rssi: int | None
+    model: WatchModel
+    last_seen: float
+    device: "BLEDevice | None" = None  # usable directly with BleakClient
+
+
+class ContinuousScanner:
+    """
+    Keeps scanning and caches advertising Casio watches for ttl seconds.
+
+    A watch is reported once when it first shows up, and again only if it
+    disappears for longer than ttl and then comes back, or after forget().
+    Reports for addresses in exclude_addresses (e.g. already connected) are
+    dropped.
+    """
+
+    def __init__(
+        self,
+        watch_filter: Callable[[str], bool] | None = None,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        instrumentation: Instrumentation | None = None,
+    ) -> None:
+        self.watch_filter = watch_filter
+        self.ttl = ttl
+        self.clock = clock
+        # Receives a SCAN event for every new or returning watch
+        self.instrumentation = instrumentation
+        self.seen: dict[str, SeenWatch] = {}
+        self.exclude_addresses: set[str] = set()
+        self._ready: asyncio.Queue[SeenWatch] = asyncio.Queue()
+        self._scanner: BleakScanner | None = None
+
+    async def start(self) -> None:
+        if self._scanner is not None:
+            return
+        from bleak import BleakScanner  # noqa: PLC0415 - bleak loads on first scan
+
+        self._scanner = BleakScanner(detection_callback=self.on_advertisement)
+        await self._scanner.start()
+        logger.info("Continuous scan started")
+
+    async def stop(self) -> None:
+        if self._scanner is None:
+            return
+        await self._scanner.stop()
+        self._scanner = None
+        logger.info("Continuous scan stopped")
+
+    async def __aenter__(self) -> "ContinuousScanner":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        await self.stop()
+
+    def on_advertisement(self, device: "BLEDevice", advertisement: "AdvertisementData") -> None:
+        """BleakScanner detection callback; also usable to feed advertisements by hand."""
+        if CASIO_SERVICE_UUID not in (advertisement.service_uuids or []):
+            return
+
+        now = self.clock()
+        name: str = device.name or advertisement.local_name or ""
+        previous = self.seen.get(device.address)
+        returning = previous is None or now - previous.last_seen > self.ttl
+
+        watch = SeenWatch(
+            address=device.address,
+            name=name,
+            rssi=advertisement.rssi,
+            model=resolve_model(name) if name else WatchModel.GENERIC,
+            last_seen=now,
+            device=device,
+        )
+        self.seen[device.address] = watch
+
+        if returning:
+            logger.debug(f"Advertisement from {name} ({device.address}), rssi {watch.rssi}")
+            self._ready.put_nowait(watch)
+            if self.instrumentation is not None:
+                self.instrumentation.record(
+                    OperationEvent(SCAN, "advertisement", watch.model.name, device.address, now, now)
+                )
+
+    def active(self) -> list[SeenWatch]:
+        """Watches seen within the last ttl seconds, strongest signal first."""
+        self.expire()
+        return sorted(self.seen.values(), key=lambda w: -(w.rssi if w.rssi is not None else -999))
+
+    def forget(self, address: str) -> None:
+        """Reports address again on its next advertisement, e.g. once its session has ended."""
+        self.seen.pop(address, None)
+
+    def expire(self) -> None:
+        now = self.clock()
+        for address in [a for a, w in self.seen.items() if now - w.last_seen > self.ttl]:
+            del self.seen[address]
+
+    async def next_watch(self, exclude_addresses: Collection[str] = ()) -> SeenWatch:
+        """Waits for the next watch that is ready to connect."""
+        while True:
+            watch = await self._ready.get()
+            current = self.seen.get(watch.address)
+            if current is None or self.clock() - current.last_seen > self.ttl:
+                continue  # went away while the report was queued
+            if watch.address in exclude_addresses or watch.address in self.exclude_addresses:
+                continue
+            if self.watch_filter is not None and not self.watch_filter(current.name):
+                continue
+            return current
+
+    async def watches(self) -> AsyncIterator[SeenWatch]:
+        while True:
+            yield await self.next_watch()
+
+    def __aiter__(self) -> AsyncIterator[SeenWatch]:
+        return self.watches()
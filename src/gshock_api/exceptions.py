@@ -12,4 +12,12 @@ class GShockConnectionError(GShockError):
 
 class GShockIgnorableException(GShockConnectionError):  # noqa: N818
     """Raised when BLE connection to G-Shock device fails."""    
-    pass
\ No newline at end of file
+    pass
+
+class GShockTimeoutError(GShockConnectionError):
+    """Raised when the watch does not answer a request in time."""
+
+    def __init__(self, message: str, key: int | None = None) -> None:
+        super().__init__(message)
+        # Protocol key of the request that timed out, when known
+        self.key = key
@@ -0,0 +1,154 @@
+"""
+Time-set throughput of a gateway, measured against a fleet of virtual watches.
+
+Every watch gets its own Connection and WatchInfo, with a VirtualFleet as the
+BLE client factory, so GshockAPI.set_time runs through the real protocols
+(StandardProtocol, MipProtocol, AnalogueProtocol), dispatcher and codecs.
+Only the radio is emulated, with the latency given by LinkConditions.
+
+    result = await run_fleet_benchmark(count=200, link=LinkConditions(latency=0.01))
+    result.summary()  # time sets/s, latency percentiles, event-loop lag
+
+A lagging event loop means the CPU, not the radio, is the bottleneck; that
+is the point at which a gateway needs more hardware.
+"""
+
+import asyncio
+from collections import Counter
+from collections.abc import Sequence
+import contextlib
+from dataclasses import dataclass, field
+import time
+from typing import Final
+
+from gshock_api.connection import Connection
+from gshock_api.gshock_api import GshockAPI
+from gshock_api.instrumentation import LatencyHistogram
+from gshock_api.logger import logger
+from gshock_api.virtual_watch import LinkConditions, VirtualFleet
+from gshock_api.watch_info import WatchInfo
+
+# One model per protocol: standard, MIP (SP time set) and analogue (0x28-wrapped)
+DEFAULT_FLEET_MODELS: Final[tuple[str, ...]] = ("CASIO GW-B5600", "CASIO GW-BX5600", "CASIO MTG-B1000")
+DEFAULT_FLEET_SIZE: Final[int] = 30
+DEFAULT_LINK: Final[LinkConditions] = LinkConditions(latency=0.005)
+# How often the lag monitor expects to be woken up
+LAG_INTERVAL: Final[float] = 0.01
+
+
+class LoopLagMonitor:
+    """Records how late the event loop runs a task that sleeps every ``interval`` seconds."""
+
+    def __init__(self, interval: float = LAG_INTERVAL) -> None:
+        self.interval = interval
+        self.lag = LatencyHistogram()
+        self._task: asyncio.Task[None] | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag.record(max(loop.time() - started - self.interval, 0.0))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+
+@dataclass
+class FleetBenchmarkResult:
+    watches: int
+    elapsed: float  # seconds from the first time set starting to the last one ending
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    latency_by_model: dict[str, LatencyHistogram] = field(default_factory=dict)
+    loop_lag: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def completed(self) -> int:
+        return self.latency.count
+
+    @property
+    def failed(self) -> int:
+        return sum(self.errors.values())
+
+    @property
+    def time_sets_per_second(self) -> float:
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "watches": self.watches,
+            "completed": self.completed,
+            "failed": self.failed,
+            "time_sets_per_second": self.time_sets_per_second,
+            "latency_p50": self.latency.percentile(50),
+            "latency_p90": self.latency.percentile(90),
+            "latency_p99": self.latency.percentile(99),
+            "latency_max": self.latency.max if self.latency.count else 0.0,
+            "loop_lag_p99": self.loop_lag.percentile(99),
+            "loop_lag_max": self.loop_lag.max,
+        }
+
+
+async def _connect(fleet: VirtualFleet, index: int) -> Connection:
+    watch = fleet.watches[index]
+    info = WatchInfo()
+    info.set_name_and_model(watch.name)  # what scanning would have found
+    connection = Connection(address=watch.address, watch_info=info, client_factory=fleet.client)
+    if not await connection.connect():
+        raise ConnectionError(f"Could not connect to virtual watch {watch.address}")
+    return connection
+
+
+async def run_fleet_benchmark(
+    count: int = DEFAULT_FLEET_SIZE,
+    names: Sequence[str] = DEFAULT_FLEET_MODELS,
+    link: LinkConditions = DEFAULT_LINK,
+    concurrency: int | None = None,
+    seed: int = 0,
+) -> FleetBenchmarkResult:
+    """
+    Connects count virtual watches, cycling through names, then sets the time
+    on all of them at once, at most concurrency at a time (None: no limit).
+    Connecting is not part of the measurement.
+    """
+    fleet = VirtualFleet.of(names, count, link, seed)
+    connections = await asyncio.gather(*(_connect(fleet, i) for i in range(count)))
+    limit = asyncio.Semaphore(concurrency or count)
+    result = FleetBenchmarkResult(watches=count, elapsed=0.0)
+
+    async def set_time(connection: "Connection") -> None:
+        async with limit:
+            model = connection.watch_info.model.name
+            start = time.perf_counter()
+            try:
+                await GshockAPI(connection).set_time()
+            except Exception as e:
+                result.errors[type(e).__name__] += 1
+                logger.warning(f"Time set on {connection.address} failed: {e}")
+                return
+            duration = time.perf_counter() - start
+            result.latency.record(duration)
+            result.latency_by_model.setdefault(model, LatencyHistogram()).record(duration)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(set_time(connection) for connection in connections))
+    finally:
+        result.elapsed = time.perf_counter() - start
+        await monitor.stop()
+        await asyncio.gather(*(connection.disconnect() for connection in connections))
+
+    result.loop_lag = monitor.lag
+    return result
@@ -0,0 +1,86 @@
+from collections.abc import Callable
+import time
+from typing import Any, Final
+
+from gshock_api.logger import logger
+
+# Longest gap between two fragments of one transfer before it is abandoned
+DEFAULT_FRAGMENT_TIMEOUT: Final[float] = 5.0
+
+FragmentHandler = Callable[[bytes, Any], None]
+
+
+class FragmentBuffer:
+    """
+    Reassembles one transfer that the watch sends as several notifications.
+
+    Fragments are copied into a buffer preallocated to the expected length,
+    known up front (GW-BX5600 SP steps) or announced by the watch before the
+    data (ABL-100 activity records, see StepCounterIO.on_drsp_received).
+
+    Attach it with PendingRequests.start_transfer. Only the first fragment
+    carries a protocol key; while a transfer is in progress,
+    MessageDispatcher.on_received hands the notifications that arrive on
+    ``handle`` to ``handler`` instead of routing them by their first byte.
+    Notifications on other handles (button presses, errors, replies) are
+    dispatched as usual.
+    """
+
+    def __init__(
+        self,
+        handler: FragmentHandler,
+        expected: int | None = None,
+        timeout: float = DEFAULT_FRAGMENT_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+        handle: int | None = None,
+    ) -> None:
+        self.handler = handler
+        self.handle = handle  # ATT handle the fragments arrive on
+        self.expected: int | None = None
+        self.timeout = timeout
+        self.clock = clock
+        self.received = 0
+        self._buffer = bytearray()
+        self._last_fragment_at = 0.0
+        if expected is not None:
+            self.expect(expected)
+
+    @property
+    def started(self) -> bool:
+        return self.received > 0
+
+    @property
+    def complete(self) -> bool:
+        return self.expected is not None and self.received >= self.expected
+
+    def stale(self) -> bool:
+        return self.started and self.clock() - self._last_fragment_at > self.timeout
+
+    def in_progress(self) -> bool:
+        return self.started and not self.complete and not self.stale()
+
+    def expect(self, length: int) -> None:
+        self.expected = length
+        if len(self._buffer) < length:
+            self._buffer.extend(bytes(length - len(self._buffer)))
+
+    def feed(self, data: bytes) -> bool:
+        """Adds a fragment. Returns True once the expected length is reached."""
+        if self.stale():
+            logger.warning(
+                f"Dropping {self.received}B of an unfinished transfer, "
+                f"no fragment for over {self.timeout}s"
+            )
+            self.received = 0
+
+        end = self.received + len(data)
+        if end > len(self._buffer):
+            # Longer than expected (or no length known): grow geometrically
+            self._buffer.extend(bytes(max(end - len(self._buffer), len(self._buffer))))
+        self._buffer[self.received : end] = data
+        self.received = end
+        self._last_fragment_at = self.clock()
+        return self.complete
+
+    def payload(self) -> bytes:
+        return bytes(memoryview(self._buffer)[: self.received])
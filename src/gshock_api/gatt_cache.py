@@ -0,0 +1,88 @@
+"""
+On-disk cache of the GATT layout discovered on each watch.
+
+Keyed by address and model. On reconnect, Connection uses the cached layout
+to limit service discovery to the services it needs and to subscribe to
+notifications without walking the service tree first.
+"""
+
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Final
+
+from gshock_api.json_store import JsonStore
+
+# Bump when the stored layout format or meaning changes; older entries are ignored.
+GATT_CACHE_VERSION: Final[int] = 1
+
+DEFAULT_GATT_CACHE_PATH: Final[Path] = Path.home() / ".cache" / "gshock_api" / "gatt.json"
+
+
+@dataclass(frozen=True)
+class GattLayout:
+    services: tuple[str, ...]
+    characteristics: tuple[str, ...]
+    notify: tuple[str, ...]
+    version: int = GATT_CACHE_VERSION
+
+
+def gatt_cache_key(address: str, model: str) -> str:
+    return f"{address.upper()}|{model}"
+
+
+class GattCache:
+    """
+    GATT layouts by address and model, persisted as JSON.
+
+    With path=None the cache lives in memory only.
+    """
+
+    def __init__(self, path: Path | str | None = DEFAULT_GATT_CACHE_PATH) -> None:
+        self.store = JsonStore(path, "GATT cache")
+        self._layouts: dict[str, GattLayout] = {}
+        self.store.load(self._decode)
+
+    @property
+    def path(self) -> Path | None:
+        return self.store.path
+
+    def get(self, address: str, model: str) -> GattLayout | None:
+        return self._layouts.get(gatt_cache_key(address, model))
+
+    def put(
+        self,
+        address: str,
+        model: str,
+        services: Iterable[str],
+        characteristics: Iterable[str],
+        notify: Iterable[str],
+    ) -> GattLayout:
+        layout = GattLayout(
+            services=tuple(services),
+            characteristics=tuple(characteristics),
+            notify=tuple(notify),
+        )
+        self._layouts[gatt_cache_key(address, model)] = layout
+        self._save()
+        return layout
+
+    def invalidate(self, address: str, model: str) -> None:
+        if self._layouts.pop(gatt_cache_key(address, model), None) is not None:
+            self._save()
+
+    def __len__(self) -> int:
+        return len(self._layouts)
+
+    def _decode(self, raw: dict[str, Any]) -> None:
+        for key, entry in raw.items():
+            if entry.get("version") != GATT_CACHE_VERSION:
+                continue
+            self._layouts[key] = GattLayout(
+                services=tuple(entry["services"]),
+                characteristics=tuple(entry["characteristics"]),
+                notify=tuple(entry["notify"]),
+            )
+
+    def _save(self) -> None:
+        self.store.save({key: asdict(layout) for key, layout in self._layouts.items()})
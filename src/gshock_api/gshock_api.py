@@ -1,12 +1,17 @@
+from __future__ import annotations
+
 import logging
-from typing import Final, TypeVar, Any
+from typing import TYPE_CHECKING, Any, Final, TypeVar
+
+from gshock_api.instrumentation import instrumented
 
-from gshock_api.connection import Connection  # type: ignore
-from gshock_api.iolib.app_notification_io import AppNotificationIO
-from gshock_api.iolib.button_pressed_io import WatchButton
-from gshock_api.iolib.dst_watch_state_io import DtsState
-from gshock_api.step_counter_data import StepCounterData
-from gshock_api.watch_info import watch_info
+# Only needed for annotations; the IO classes load with the watch's protocol
+if TYPE_CHECKING:
+    from gshock_api.connection import Connection
+    from gshock_api.iolib.button_pressed_io import WatchButton
+    from gshock_api.iolib.dst_watch_state_io import DtsState
+    from gshock_api.protocols.watch_protocol import WatchProtocol
+    from gshock_api.step_counter_data import StepCounterData
 
 T = TypeVar("T")
 
@@ -21,104 +26,135 @@ class GshockAPI:
     def __init__(self, connection: Connection) -> None:
         self.connection: Connection = connection
 
+    @property
+    def protocol(self) -> WatchProtocol:
+        """The protocol of the watch on this connection."""
+        return self.connection.watch_info.protocol
+
+    @instrumented
     async def get_watch_name(self) -> str:
         """Get the name of the watch."""
-        return await watch_info.protocol.get_watch_name(self.connection)
+        return await self.protocol.get_watch_name(self.connection)
 
+    @instrumented
     async def get_pressed_button(self) -> WatchButton:
         """Tells which button was pressed on the watch to initiate the connection."""
-        return await watch_info.protocol.get_pressed_button(self.connection)
+        return await self.protocol.get_pressed_button(self.connection)
 
+    @instrumented
     async def get_world_cities(self, city_number: int) -> str:
         """Get the name for a particular World City set on the watch."""
-        return await watch_info.protocol.get_world_cities(self.connection, city_number)
+        return await self.protocol.get_world_cities(self.connection, city_number)
 
+    @instrumented
     async def get_dst_for_world_cities(self, city_number: int) -> str:
         """Get the Daylight Saving Time for a particular World City set on the watch."""
-        return await watch_info.protocol.get_dst_for_world_cities(self.connection, city_number)
+        return await self.protocol.get_dst_for_world_cities(self.connection, city_number)
 
+    @instrumented
     async def get_dst_watch_state(self, state: DtsState) -> str:
         """Get the DST state of the watch."""
-        return await watch_info.protocol.get_dst_watch_state(self.connection, state)
+        return await self.protocol.get_dst_watch_state(self.connection, state)
 
+    @instrumented
     async def get_home_time(self, slot: int = 0) -> str:
         """Get HomeTime for the watch via current watch protocol."""
-        return await watch_info.protocol.get_home_time(self.connection)
+        return await self.protocol.get_home_time(self.connection)
 
+    @instrumented
     async def set_time(
         self, current_time: object | None = None, offset: int = 0
     ) -> None:
         """Sets current time on the watch via current WatchProtocol."""
-        await watch_info.protocol.set_time(self.connection, current_time, offset)
+        await self.protocol.set_time(self.connection, current_time, offset)
 
+    @instrumented
     async def get_alarms(self) -> list[Any]:
         """Gets alarms from the watch via current WatchProtocol."""
-        return await watch_info.protocol.get_alarms(self.connection)
+        return await self.protocol.get_alarms(self.connection)
 
+    @instrumented
     async def set_alarms(self, alarms: list[Any]) -> None:
         """Sets alarms on the watch via current WatchProtocol."""
-        await watch_info.protocol.set_alarms(self.connection, alarms)
+        await self.protocol.set_alarms(self.connection, alarms)
 
+    @instrumented
     async def get_timer(self) -> int:
         """Get Timer value in seconds via current WatchProtocol."""
-        return await watch_info.protocol.get_timer(self.connection)
+        return await self.protocol.get_timer(self.connection)
 
+    @instrumented
     async def set_timer(self, timer_value: int) -> None:
         """Set Timer value in seconds via current WatchProtocol."""
-        await watch_info.protocol.set_timer(self.connection, timer_value)
+        await self.protocol.set_timer(self.connection, timer_value)
 
+    @instrumented
     async def get_watch_condition(self) -> Any:
         """Gets watch condition from the watch."""
-        return await watch_info.protocol.get_watch_condition(self.connection)
+        return await self.protocol.get_watch_condition(self.connection)
 
+    @instrumented
     async def get_time_adjustment(self) -> Any:
         """Determine if auto-time adjustment is set or not."""
-        return await watch_info.protocol.get_time_adjustment(self.connection)
+        return await self.protocol.get_time_adjustment(self.connection)
 
+    @instrumented
     async def set_time_adjustment(
         self, time_adjustment: bool, minutes_after_hour: int
     ) -> None:
         """Sets auto-time adjustment for the watch."""
-        await watch_info.protocol.set_time_adjustment(self.connection, time_adjustment, minutes_after_hour)
+        await self.protocol.set_time_adjustment(self.connection, time_adjustment, minutes_after_hour)
 
+    @instrumented
     async def get_basic_settings(self) -> dict:
         """Get basic settings from watch via current WatchProtocol."""
-        return await watch_info.protocol.get_basic_settings(self.connection)
+        return await self.protocol.get_basic_settings(self.connection)
 
+    @instrumented
     async def get_settings(self) -> dict:
         """Gets settings from the watch via current WatchProtocol."""
-        return await watch_info.protocol.get_settings(self.connection)
+        return await self.protocol.get_settings(self.connection)
 
+    @instrumented
     async def set_settings(self, settings: Any) -> None:
         """Set settings to the watch via current WatchProtocol."""
-        await watch_info.protocol.set_settings(self.connection, settings)
+        await self.protocol.set_settings(self.connection, settings)
 
+    @instrumented
     async def get_step_count_today(self) -> int:
         """Gets the daily step count total for step counter supported watches."""
-        return await watch_info.protocol.get_step_count_today(self.connection)
+        return await self.protocol.get_step_count_today(self.connection)
 
+    @instrumented
     async def get_step_count(self) -> StepCounterData:
         """Gets complete step counter data (hourly and daily history)."""
-        return await watch_info.protocol.get_step_count(self.connection)
+        return await self.protocol.get_step_count(self.connection)
 
+    @instrumented
     async def get_reminders(self) -> list[Any]:
         """Gets the current events (reminders) from the watch."""
         return [await self.get_event_from_watch(i) for i in range(1, 6)]
 
+    @instrumented
     async def get_event_from_watch(self, event_number: int) -> Any:
         """Gets a single event (reminder) from the watch."""
-        return await watch_info.protocol.get_event_from_watch(self.connection, event_number)
+        return await self.protocol.get_event_from_watch(self.connection, event_number)
 
+    @instrumented
     async def set_reminders(self, events: list[Any]) -> None:
         """Sets events (reminders) to the watch."""
-        await watch_info.protocol.set_reminders(self.connection, events)
+        await self.protocol.set_reminders(self.connection, events)
 
+    @instrumented
     async def get_app_info(self) -> str:
         """Gets app info from the watch."""
-        return await watch_info.protocol.get_app_info(self.connection)
+        return await self.protocol.get_app_info(self.connection)
 
+    @instrumented
     async def send_app_notification(self, notification: dict[str, Any]) -> None:
         """Sends a notification to the watch display."""
+        from gshock_api.iolib.app_notification_io import AppNotificationIO  # noqa: PLC0415 - loaded on first use
+
         encoded_buffer: bytes = AppNotificationIO.encode_notification_packet(notification)
         encrypted_buffer: bytes = AppNotificationIO.xor_encode_buffer(encoded_buffer)
         await self.connection.write(HANDLE_NOTIFICATION, encrypted_buffer)
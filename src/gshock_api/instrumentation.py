@@ -0,0 +1,217 @@
+"""
+Opt-in timing of GshockAPI calls and the GATT traffic under them.
+
+Pass an Instrumentation to Connection (instrumentation=...) to enable it;
+several connections can share one, so histograms cover a whole fleet and are
+kept per watch model. Each operation produces an OperationEvent, handed to
+every subscribed callback and, for API calls and writes, added to a
+LatencyHistogram:
+
+    instrumentation = Instrumentation()
+    instrumentation.subscribe(print)
+    connection = Connection(instrumentation=instrumentation)
+    ...
+    instrumentation.histogram("GW", "set_time").percentile(99)
+"""
+
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+import functools
+import time
+from typing import Final
+
+from gshock_api.exceptions import GShockTimeoutError
+from gshock_api.logger import logger
+
+# Kinds of OperationEvent
+API: Final[str] = "api"
+WRITE: Final[str] = "write"
+NOTIFICATION: Final[str] = "notification"
+CONNECT: Final[str] = "connect"
+SCAN: Final[str] = "scan"  # a watch found by scanning; start == end
+
+# Kinds that are counted but have no meaningful duration
+INSTANT_KINDS: Final[frozenset[str]] = frozenset({NOTIFICATION, SCAN})
+
+# Mantissa bits per histogram bucket: 2^7 sub-buckets keep values within 1%
+DEFAULT_PRECISION_BITS: Final[int] = 7
+
+
+@dataclass
+class Traffic:
+    """Running totals for one connection; API events report the difference across a call."""
+
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    writes: int = 0
+    notifications: int = 0
+    retries: int = 0
+
+
+@dataclass(frozen=True)
+class OperationEvent:
+    kind: str  # API, WRITE, NOTIFICATION, CONNECT or SCAN
+    name: str  # API method name, or the handle as "0x0E"
+    model: str
+    address: str | None
+    start: float  # time.monotonic()
+    end: float
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    retries: int = 0
+    timed_out: bool = False
+    timeout_key: int | None = None  # protocol key of the request that timed out, if known
+    error: str | None = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations in microseconds. Buckets grow
+    geometrically with a fixed number of mantissa bits, so recording is O(1)
+    and every bucket spans the same relative error however long the tail.
+    """
+
+    def __init__(self, precision_bits: int = DEFAULT_PRECISION_BITS) -> None:
+        self.precision_bits = precision_bits
+        self.counts: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def _bucket(self, micros: int) -> int:
+        shift = max(micros.bit_length() - self.precision_bits, 0)
+        return (shift << self.precision_bits) | (micros >> shift)
+
+    def _highest_in_bucket(self, bucket: int) -> int:
+        shift = bucket >> self.precision_bits
+        mantissa = bucket & ((1 << self.precision_bits) - 1)
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        self.counts[self._bucket(max(int(seconds * 1_000_000), 0))] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percent: float) -> float:
+        """Duration in seconds at or below which percent of the samples fall; 0 when empty."""
+        if not self.count:
+            return 0.0
+        wanted = max(self.count * percent / 100, 1)
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= wanted:
+                return min(self._highest_in_bucket(bucket) / 1_000_000, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+EventCallback = Callable[[OperationEvent], None]
+HistogramKey = tuple[str, str, str]  # (model, kind, name)
+
+
+@dataclass
+class Instrumentation:
+    callbacks: list[EventCallback] = field(default_factory=list)
+    histograms: dict[HistogramKey, LatencyHistogram] = field(default_factory=dict)
+    events: Counter[HistogramKey] = field(default_factory=Counter)
+    timeouts: Counter[tuple[str, int | None]] = field(default_factory=Counter)  # (model, protocol key)
+
+    def subscribe(self, callback: EventCallback) -> None:
+        self.callbacks.append(callback)
+
+    def record(self, event: OperationEvent) -> None:
+        key = (event.model, event.kind, event.name)
+        self.events[key] += 1
+        if event.kind not in INSTANT_KINDS:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(event.duration)
+        if event.timed_out:
+            self.timeouts[(event.model, event.timeout_key)] += 1
+
+        for callback in self.callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Instrumentation callback failed: {e}")
+
+    def histogram(self, model: str, name: str, kind: str = API) -> LatencyHistogram | None:
+        return self.histograms.get((model, kind, name))
+
+    def summary(self, percentiles: Iterable[float] = (50, 99)) -> dict[str, dict[str, float]]:
+        """Count and percentiles per "model kind name", for logging or dashboards."""
+        return {
+            f"{model} {kind} {name}": {
+                "count": histogram.count,
+                **{f"p{p:g}": histogram.percentile(p) for p in percentiles},
+            }
+            for (model, kind, name), histogram in sorted(self.histograms.items())
+        }
+
+
+def note_retry(connection: object) -> None:
+    """Counts a retry on connections that keep traffic totals."""
+    traffic: Traffic | None = getattr(connection, "traffic", None)
+    if traffic is not None:
+        traffic.retries += 1
+
+
+def instrumented[**P, R](
+    method: Callable[P, Awaitable[R]],
+) -> Callable[P, Awaitable[R]]:
+    """Times a GshockAPI coroutine method when its connection has instrumentation."""
+
+    @functools.wraps(method)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        connection = args[0].connection  # type: ignore[attr-defined]
+        instrumentation: Instrumentation | None = connection.instrumentation
+        if instrumentation is None:
+            return await method(*args, **kwargs)
+
+        traffic: Traffic = connection.traffic
+        sent, received, retries = traffic.bytes_sent, traffic.bytes_received, traffic.retries
+        timed_out = False
+        timeout_key: int | None = None
+        error: str | None = None
+        start = time.monotonic()
+        try:
+            return await method(*args, **kwargs)
+        except GShockTimeoutError as e:
+            timed_out, timeout_key = True, e.key
+            error = type(e).__name__
+            raise
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            instrumentation.record(
+                OperationEvent(
+                    kind=API,
+                    name=method.__name__,
+                    model=connection.watch_info.model.name,
+                    address=connection.address,
+                    start=start,
+                    end=time.monotonic(),
+                    bytes_sent=traffic.bytes_sent - sent,
+                    bytes_received=traffic.bytes_received - received,
+                    retries=traffic.retries - retries,
+                    timed_out=timed_out,
+                    timeout_key=timeout_key,
+                    error=error,
+                )
+            )
+
+    return wrapper
@@ -1,13 +1,13 @@
 import json
 from typing import Protocol as TypingProtocol
 
-from gshock_api.alarms import alarm_decoder, alarms_inst
-from gshock_api.cancelable_result import CancelableResult
+from gshock_api.alarms import Alarms, alarm_decoder, alarms_inst
 from gshock_api.casio_constants import CasioConstants
+from gshock_api.commands import GetAlarms, SetAlarms
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
-from gshock_api.utils import to_compact_string, to_hex_string
-from gshock_api.watch_info import WatchModel, watch_info
+from gshock_api.logger import Hex, logger
+from gshock_api.watch_info import WatchModel
 
 CHARACTERISTICS: dict[str, int] = CasioConstants.CHARACTERISTICS
 
@@ -88,8 +88,12 @@ class AlarmsIOFunctional:
         The mapping logic is deterministic: given the same input, it will ALWAYS 
         return the same list of Write actions.
         """
-        parsed: dict[str, object] = json.loads(message_json)
-        alarms_json_arr: list[dict[str, object]] = parsed.get("value", [])  # type: ignore
+        return AlarmsIOFunctional.prepare_set_alarms(SetAlarms.from_dict(json.loads(message_json)))
+
+    @staticmethod
+    def prepare_set_alarms(command: SetAlarms) -> list[BLEAction]:
+        """Same as prepare_watch_commands_set, for an already parsed command."""
+        alarms_json_arr: list[dict[str, object]] = command.alarms
 
         # Transformation logic is isolated here, away from side-effecting code
         alarm_casio0 = alarms_inst_typed.from_json_alarm_first_alarm(alarms_json_arr[0])
@@ -102,8 +106,13 @@ class AlarmsIOFunctional:
 
     @staticmethod
     def prepare_watch_commands_set_mtg_b3000(message_json: str) -> list[BLEAction]:
-        parsed: dict[str, object] = json.loads(message_json)
-        alarms_json_arr: list[dict[str, object]] = parsed.get("value", [])  # type: ignore
+        return AlarmsIOFunctional.prepare_set_alarms_mtg_b3000(
+            SetAlarms.from_dict(json.loads(message_json))
+        )
+
+    @staticmethod
+    def prepare_set_alarms_mtg_b3000(command: SetAlarms) -> list[BLEAction]:
+        alarms_json_arr: list[dict[str, object]] = command.alarms
 
         alarm_casio0 = alarms_inst_typed.from_json_alarm_first_alarm(alarms_json_arr[0])
 
@@ -120,7 +129,7 @@ class AlarmsIOFunctional:
         any singleton state directly, returning the data instead for the 
         IO shell to handle.
         """
-        decoded_full = alarm_decoder_typed.to_json(to_hex_string(data))
+        decoded_full = alarm_decoder_typed.to_json(data)
         return decoded_full.get("ALARMS", [])
 
 
@@ -129,72 +138,65 @@ class AlarmsIO:
     """
     Impure 'Imperative Shell'.
     
-    This class manages the side effects (I/O, network status, mutable singletons).
-    It interprets the 'plans' created by AlarmsIOFunctional.
+    This class manages the side effects (I/O, network status).
+    It interprets the 'plans' created by AlarmsIOFunctional. Alarms arriving
+    in several packets are accumulated on the connection's pending request.
     """
-    result: CancelableResult | None = None
-    connection: ConnectionProtocol | None = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol) -> CancelableResult:
+    async def request(connection: ConnectionProtocol) -> list[dict[str, object]]:
         """Initializes the alarm fetch sequence."""
-        AlarmsIO.connection = connection
-        alarms_inst_typed.clear()
-        await AlarmsIO._get_alarms(connection)
-        if AlarmsIO.result is None:
-            raise RuntimeError("AlarmsIO.result must not be None after _get_alarms")
-        return AlarmsIO.result
+        return await AlarmsIO._get_alarms(connection)
 
     @staticmethod
-    async def _get_alarms(connection: ConnectionProtocol) -> CancelableResult[list[dict[str, object]]]:
+    async def _get_alarms(connection: ConnectionProtocol) -> list[dict[str, object]]:
         """Sends the trigger message to start the alarm retrieval process."""
-        await connection.send_message('{ "action": "GET_ALARMS"}')
-        AlarmsIO.result = CancelableResult[list[dict[str, object]]]()
-        return await AlarmsIO.result.get_result()
+        pending = connection.pending.register(CHARACTERISTICS["CASIO_SETTING_FOR_ALM"])
+        pending.context["alarms"] = Alarms()
+        try:
+            await connection.send_message(GetAlarms())
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
-    async def send_to_watch(_: str = "") -> None:
+    async def send_to_watch(connection: ConnectionProtocol, _command: GetAlarms | None = None) -> None:
         """Executes the command sequence to request current alarms from the watch."""
-        if AlarmsIO.connection is None:
-            raise RuntimeError("AlarmsIO.connection is not set")
-
-        if watch_info.model == WatchModel.MTG_B3000:
+        if connection.watch_info.model == WatchModel.MTG_B3000:
             commands = AlarmsIOFunctional.prepare_watch_commands_mtg_b3000()
         else:
             commands = AlarmsIOFunctional.prepare_watch_commands()
 
         for command in commands:
             if isinstance(command, Write):
-                alarm_command: str = to_compact_string(to_hex_string(command.data))
-                await AlarmsIO.connection.write(command.handle, alarm_command)
+                await connection.write(command.handle, command.data)
 
     @staticmethod
-    async def send_to_watch_set(message: str) -> None:
+    async def send_to_watch_set(connection: ConnectionProtocol, message: SetAlarms) -> None:
         """Executes the command sequence to update alarms on the watch."""
-        if AlarmsIO.connection is None:
-            raise RuntimeError("AlarmsIO.connection is not set")
-
-        if watch_info.model == WatchModel.MTG_B3000:
-            commands = AlarmsIOFunctional.prepare_watch_commands_set_mtg_b3000(message)
+        if connection.watch_info.model == WatchModel.MTG_B3000:
+            commands = AlarmsIOFunctional.prepare_set_alarms_mtg_b3000(message)
         else:
-            commands = AlarmsIOFunctional.prepare_watch_commands_set(message)
+            commands = AlarmsIOFunctional.prepare_set_alarms(message)
 
         for command in commands:
             if isinstance(command, Write):
-                alarm_command: str = to_compact_string(to_hex_string(command.data))
-                await AlarmsIO.connection.write(command.handle, alarm_command)
+                await connection.write(command.handle, command.data)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
         """
         Callback for incoming BLE data. Accumulates fragmented alarm packets
         until the full set is received.
         """
-        decoded_alarms = AlarmsIOFunctional.parse_packet(data)
-        alarms_inst_typed.add_alarms(decoded_alarms)
+        pending = connection.pending.lookup(CHARACTERISTICS["CASIO_SETTING_FOR_ALM"])
+        if pending is None:
+            logger.debug("AlarmsIO: no pending request for %s", Hex(data))
+            return
 
-        alarm_count_threshold = watch_info.alarmCount
+        collected: Alarms = pending.context["alarms"]  # type: ignore[assignment]
+        collected.add_alarms(AlarmsIOFunctional.parse_packet(data))  # type: ignore[arg-type]
 
         # Once all alarms are collected, resolve the async result
-        if len(alarms_inst_typed.alarms) == alarm_count_threshold and AlarmsIO.result is not None:
-            AlarmsIO.result.set_result(alarms_inst_typed.alarms)
\ No newline at end of file
+        if len(collected.alarms) >= connection.watch_info.alarmCount:
+            pending.set_result(collected.alarms)
@@ -1,8 +1,6 @@
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Header, Payload, Protocol, Trailer
-from gshock_api.utils import to_hex_string
 
 
 class AppInfoIOFunctional:
@@ -45,18 +43,19 @@ class AppInfoIOFunctional:
 
 class AppInfoIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for AppInfoIOFunctional commands.
+    Pending results live in the connection's request registry.
     """
-    result: CancelableResult = None
-    connection: ConnectionProtocol = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol) -> CancelableResult[str]:
-        AppInfoIO.connection = connection
-        await connection.request(f"{Protocol.APP_INFO.value:02X}")
-        AppInfoIO.result = CancelableResult[str]()
-        return await AppInfoIO.result.get_result()
+    async def request(connection: ConnectionProtocol) -> str:
+        pending = connection.pending.register(Protocol.APP_INFO.value)
+        try:
+            await connection.request(bytes([Protocol.APP_INFO.value]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
     async def send_to_watch(connection: ConnectionProtocol) -> None:
@@ -66,19 +65,14 @@ class AppInfoIO:
                 await connection.write(command.handle, command.data)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
         async def set_app_info(data_bytes: bytes) -> None:
             commands = AppInfoIOFunctional.prepare_watch_response(data_bytes)
-            if commands:
-                if AppInfoIO.connection is None:
-                    raise RuntimeError("AppInfoIO.connection is not set")
-                for command in commands:
-                    if isinstance(command, Write):
-                        await AppInfoIO.connection.write(command.handle, to_hex_string(command.data))
+            for command in commands:
+                if isinstance(command, Write):
+                    await connection.write(command.handle, command.data)
 
-            if AppInfoIO.result is None:
-                raise RuntimeError("AppInfoIO.result is not set")
-            AppInfoIO.result.set_result("OK")
+            connection.pending.resolve(Protocol.APP_INFO.value, None, "OK")
 
         import asyncio
         asyncio.create_task(set_app_info(data))
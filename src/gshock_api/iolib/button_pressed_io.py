@@ -1,6 +1,5 @@
 from enum import IntEnum
 
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Header, Payload, Protocol
@@ -72,18 +71,19 @@ class ButtonPressedIOFunctional:
 
 class ButtonPressedIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for ButtonPressedIOFunctional commands.
+    Pending results live in the connection's request registry.
     """
-    result: CancelableResult[WatchButton] | None = None
-    connection: ConnectionProtocol | None = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol) -> CancelableResult[WatchButton]:
-        ButtonPressedIO.connection = connection
-        await connection.request(f"{Protocol.BLE_FEATURES.value:02X}")
-        ButtonPressedIO.result = CancelableResult[WatchButton]()
-        return await ButtonPressedIO.result.get_result()
+    async def request(connection: ConnectionProtocol) -> WatchButton:
+        pending = connection.pending.register(Protocol.BLE_FEATURES.value)
+        try:
+            await connection.request(bytes([Protocol.BLE_FEATURES.value]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
     async def send_to_watch(connection: ConnectionProtocol) -> None:
@@ -93,18 +93,14 @@ class ButtonPressedIO:
                 await connection.write(command.handle, command.data)
 
     @staticmethod
-    async def send_to_watch_set(data: bytes | str) -> None:
-        if ButtonPressedIO.connection is None:
-            raise RuntimeError("ButtonPressedIO.connection is not set")
-
+    async def send_to_watch_set(connection: ConnectionProtocol, data: bytes | str) -> None:
         commands = ButtonPressedIOFunctional.prepare_watch_commands_set(data)
         for command in commands:
             if isinstance(command, Write):
-                await ButtonPressedIO.connection.write(command.handle, command.data)
+                await connection.write(command.handle, command.data)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
         button = ButtonPressedIOFunctional.decode(data)
-        if ButtonPressedIO.result is None:
-            raise RuntimeError("ButtonPressedIO.result is not set")
-        ButtonPressedIO.result.set_result(button)
+        connection.pending.resolve(Protocol.BLE_FEATURES.value, None, button)
+
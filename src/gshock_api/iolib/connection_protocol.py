@@ -1,9 +1,31 @@
-from typing import Protocol
+from typing import TYPE_CHECKING, Protocol
+
+from gshock_api.commands import WatchCommand
+from gshock_api.utils import ByteData
+
+if TYPE_CHECKING:
+    from gshock_api.link_latency import RoundTripEstimator
+    from gshock_api.pending_requests import PendingRequests
+    from gshock_api.snapshot_cache import SnapshotCache
+    from gshock_api.time_scheduler import TimeSetScheduler
+    from gshock_api.watch_info import WatchInfo
 
 
 class ConnectionProtocol(Protocol):
-    async def request(self, code: str) -> None:
+    pending: "PendingRequests"
+    watch_info: "WatchInfo"
+    snapshot_cache: "SnapshotCache | None"
+    latency: "RoundTripEstimator | None"
+    time_scheduler: "TimeSetScheduler | None"
+
+    async def request(self, code: ByteData) -> None:
+        ...
+
+    async def write(self, handle: int, data: ByteData) -> None:
+        ...
+
+    async def flush(self) -> None:
         ...
 
-    async def write(self, handle: int, data: bytes | str) -> None:
+    async def send_message(self, message: WatchCommand | str) -> None:
         ...
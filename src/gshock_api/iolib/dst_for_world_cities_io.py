@@ -1,7 +1,7 @@
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Protocol
+from gshock_api.logger import Hex, logger
 
 
 class DstForWorldCitiesIOFunctional:
@@ -21,20 +21,19 @@ class DstForWorldCitiesIOFunctional:
 
 class DstForWorldCitiesIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for DstForWorldCitiesIOFunctional commands.
+    Pending results live in the connection's request registry.
     """
-    result: CancelableResult = None
-    connection = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol, city_number: int) -> CancelableResult[bytes]:
-        DstForWorldCitiesIO.connection = connection
-        key = f"{Protocol.DST_SETTING.value:02x}0{city_number}"
-        await connection.request(key)
-
-        DstForWorldCitiesIO.result = CancelableResult()
-        return await DstForWorldCitiesIO.result.get_result()
+    async def request(connection: ConnectionProtocol, city_number: int) -> bytes:
+        pending = connection.pending.register(Protocol.DST_SETTING.value, city_number)
+        try:
+            await connection.request(bytes([Protocol.DST_SETTING.value, city_number]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
     async def send_to_watch(connection: ConnectionProtocol) -> None:
@@ -44,7 +43,7 @@ class DstForWorldCitiesIO:
                 await connection.write(command.handle, command.data)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
-        if DstForWorldCitiesIO.result is None:
-            raise RuntimeError("DstForWorldCitiesIO.result is not set")
-        DstForWorldCitiesIO.result.set_result(data)
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
+        key = Protocol.DST_SETTING.value
+        if not connection.pending.resolve(key, connection.pending.sub_index_of(data), data):
+            logger.debug("DstForWorldCitiesIO: no pending request for %s", Hex(data))
@@ -1,9 +1,9 @@
 from enum import IntEnum
 
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Protocol
+from gshock_api.logger import Hex, logger
 
 
 class DtsState(IntEnum):
@@ -29,19 +29,19 @@ class DstWatchStateIOFunctional:
 
 class DstWatchStateIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for DstWatchStateIOFunctional commands.
+    Pending results live in the connection's request registry.
     """
-    result: CancelableResult[bytes] | None = None
-    connection: ConnectionProtocol | None = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol, state: DtsState) -> CancelableResult[bytes]:
-        DstWatchStateIO.connection = connection
-        key = f"{Protocol.DST_WATCH_STATE.value:02x}0{state.value}"
-        await connection.request(key)
-        DstWatchStateIO.result = CancelableResult[bytes]()
-        return await DstWatchStateIO.result.get_result()
+    async def request(connection: ConnectionProtocol, state: DtsState) -> bytes:
+        pending = connection.pending.register(Protocol.DST_WATCH_STATE.value, state.value)
+        try:
+            await connection.request(bytes([Protocol.DST_WATCH_STATE.value, state.value]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
     async def send_to_watch(connection: ConnectionProtocol) -> None:
@@ -51,7 +51,7 @@ class DstWatchStateIO:
                 await connection.write(command.handle, command.data)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
-        if DstWatchStateIO.result is None:
-            raise RuntimeError("DstWatchStateIO.result is not set")
-        DstWatchStateIO.result.set_result(data)
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
+        key = Protocol.DST_WATCH_STATE.value
+        if not connection.pending.resolve(key, connection.pending.sub_index_of(data), data):
+            logger.debug("DstWatchStateIO: no pending request for %s", Hex(data))
@@ -1,7 +1,8 @@
+from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.logger import logger
 
 
 class ErrorIO:
     @staticmethod
-    def on_received(message: str) -> None:
+    def on_received(message: str, connection: ConnectionProtocol) -> None:  # noqa: ARG004
         logger.info(f"ErrorIO onReceived: {message}")
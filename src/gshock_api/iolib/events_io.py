@@ -2,19 +2,16 @@ from dataclasses import dataclass
 import json
 from typing import TypedDict
 
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.casio_constants import CasioConstants
+from gshock_api.commands import SetReminders
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Payload, Protocol
-from gshock_api.logger import logger
+from gshock_api.logger import Hex, logger
 from gshock_api.utils import (
     clean_str,
     dec_to_hex,
-    to_ascii_string,
     to_byte_array,
-    to_compact_string,
-    to_hex_string,
     to_int_array,
 )
 
@@ -179,9 +176,13 @@ class EventsIOFunctional:
 
     @staticmethod
     def prepare_watch_commands_set(message_json: str) -> list[BLEAction]:
-        reminders_json_arr: list[dict[str, object]] | None = json.loads(message_json).get("value")
-        if reminders_json_arr is None:
-            reminders_json_arr = []
+        return EventsIOFunctional.prepare_set_reminders(
+            SetReminders.from_dict(json.loads(message_json))
+        )
+
+    @staticmethod
+    def prepare_set_reminders(command: SetReminders) -> list[BLEAction]:
+        reminders_json_arr: list[dict[str, object]] = command.reminders
 
         actions: list[BLEAction] = []
         for index, element in enumerate(reminders_json_arr):
@@ -200,7 +201,50 @@ class EventsIOFunctional:
         return actions
 
     @staticmethod
-    def decode_time(reminder_str: str) -> dict[str, object]:
+    def decode_time_detail(time_detail: list[int]) -> dict[str, object]:
+        def decode_date(time_detail: list[int]) -> dict[str, object]:
+            def int_to_month_str(month_int: int) -> str:
+                months = [
+                    "JANUARY", "FEBRUARY", "MARCH", "APRIL", "MAY", "JUNE",
+                    "JULY", "AUGUST", "SEPTEMBER", "OCTOBER", "NOVEMBER", "DECEMBER"
+                ]
+                if month_int < 1 or month_int > 12:
+                    return ""
+                return months[month_int - 1]
+
+            date: dict[str, object] = {}
+            date["year"] = dec_to_hex(time_detail[0]) + 2000
+            date["month"] = int_to_month_str(dec_to_hex(time_detail[1]))
+            date["day"] = dec_to_hex(time_detail[2])
+            return date
+
+        result: dict[str, object] = {}
+        start_date = decode_date(time_detail[1:])
+        result["start_date"] = start_date
+        end_date = decode_date(time_detail[4:])
+        result["end_date"] = end_date
+
+        day_of_week = time_detail[7]
+        days_of_week: list[str] = []
+        if (day_of_week & ReminderMasks.SUNDAY_MASK) == ReminderMasks.SUNDAY_MASK:
+            days_of_week.append("SUNDAY")
+        if (day_of_week & ReminderMasks.MONDAY_MASK) == ReminderMasks.MONDAY_MASK:
+            days_of_week.append("MONDAY")
+        if (day_of_week & ReminderMasks.TUESDAY_MASK) == ReminderMasks.TUESDAY_MASK:
+            days_of_week.append("TUESDAY")
+        if (day_of_week & ReminderMasks.WEDNESDAY_MASK) == ReminderMasks.WEDNESDAY_MASK:
+            days_of_week.append("WEDNESDAY")
+        if (day_of_week & ReminderMasks.THURSDAY_MASK) == ReminderMasks.THURSDAY_MASK:
+            days_of_week.append("THURSDAY")
+        if (day_of_week & ReminderMasks.FRIDAY_MASK) == ReminderMasks.FRIDAY_MASK:
+            days_of_week.append("FRIDAY")
+        if (day_of_week & ReminderMasks.SATURDAY_MASK) == ReminderMasks.SATURDAY_MASK:
+            days_of_week.append("SATURDAY")
+        result["days_of_week"] = days_of_week
+        return result
+
+    @staticmethod
+    def decode_time(reminder: bytes | str) -> dict[str, object]:
         def convert_array_list_to_json_array(array_list: list[object]) -> list[object]:
             return [item for item in array_list]
 
@@ -216,60 +260,17 @@ class EventsIOFunctional:
                 repeat_period = "NEVER"
             return TimePeriod(enabled, repeat_period)
 
-        def decode_time_detail(time_detail: list[int]) -> dict[str, object]:
-            def decode_date(time_detail: list[int]) -> dict[str, object]:
-                def int_to_month_str(month_int: int) -> str:
-                    months = [
-                        "JANUARY", "FEBRUARY", "MARCH", "APRIL", "MAY", "JUNE",
-                        "JULY", "AUGUST", "SEPTEMBER", "OCTOBER", "NOVEMBER", "DECEMBER"
-                    ]
-                    if month_int < 1 or month_int > 12:
-                        return ""
-                    return months[month_int - 1]
-
-                date: dict[str, object] = {}
-                date["year"] = dec_to_hex(time_detail[0]) + 2000
-                date["month"] = int_to_month_str(dec_to_hex(time_detail[1]))
-                date["day"] = dec_to_hex(time_detail[2])
-                return date
-
-            result: dict[str, object] = {}
-            start_date = decode_date(time_detail[1:])
-            result["start_date"] = start_date
-            end_date = decode_date(time_detail[4:])
-            result["end_date"] = end_date
-
-            day_of_week = time_detail[7]
-            days_of_week: list[str] = []
-            if (day_of_week & ReminderMasks.SUNDAY_MASK) == ReminderMasks.SUNDAY_MASK:
-                days_of_week.append("SUNDAY")
-            if (day_of_week & ReminderMasks.MONDAY_MASK) == ReminderMasks.MONDAY_MASK:
-                days_of_week.append("MONDAY")
-            if (day_of_week & ReminderMasks.TUESDAY_MASK) == ReminderMasks.TUESDAY_MASK:
-                days_of_week.append("TUESDAY")
-            if (day_of_week & ReminderMasks.WEDNESDAY_MASK) == ReminderMasks.WEDNESDAY_MASK:
-                days_of_week.append("WEDNESDAY")
-            if (day_of_week & ReminderMasks.THURSDAY_MASK) == ReminderMasks.THURSDAY_MASK:
-                days_of_week.append("THURSDAY")
-            if (day_of_week & ReminderMasks.FRIDAY_MASK) == ReminderMasks.FRIDAY_MASK:
-                days_of_week.append("FRIDAY")
-            if (day_of_week & ReminderMasks.SATURDAY_MASK) == ReminderMasks.SATURDAY_MASK:
-                days_of_week.append("SATURDAY")
-            result["days_of_week"] = days_of_week
-            return result
-
-        int_arr = to_int_array(reminder_str)
-        if int_arr[3] == 0xFF:
+        reminder_all = to_int_array(reminder) if isinstance(reminder, str) else list(reminder)
+        if reminder_all[3] == 0xFF:
             return {"end": ""}
 
-        reminder_all = to_int_array(reminder_str)
-        reminder = reminder_all[2:]
+        reminder_body = reminder_all[2:]
         reminder_json: dict[str, object] = {}
-        time_period = decode_time_period(reminder[0])
+        time_period = decode_time_period(reminder_body[0])
         reminder_json["enabled"] = time_period.enabled
         reminder_json["repeat_period"] = time_period.repeat_period
 
-        time_detail_map = decode_time_detail(reminder)
+        time_detail_map = EventsIOFunctional.decode_time_detail(reminder_body)
 
         reminder_json["start_date"] = time_detail_map["start_date"]
         reminder_json["end_date"] = time_detail_map["end_date"]
@@ -281,54 +282,58 @@ class EventsIOFunctional:
 class ReminderDecoder:
     @staticmethod
     def reminder_title_to_json(message: bytes) -> dict[str, str]:
-        hex_str = to_hex_string(message)
-        int_arr = to_int_array(hex_str)
-        if int_arr[2] == 0xFF:
+        if message[2] == 0xFF:
             return {"end": ""}
         reminder_json: dict[str, str] = {}
-        reminder_json["title"] = clean_str(to_ascii_string(hex_str, 2))
+        reminder_json["title"] = clean_str(bytes(message[2:]).decode("ascii"))
         return reminder_json
 
 
 class EventsIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for EventsIOFunctional commands.
+    Each reminder is a (title, time) notification pair; the title is parked on
+    the pending time request until the time arrives.
     """
-    result: CancelableResult | None = None
-    connection: ConnectionProtocol | None = None
-    title: dict[str, object] | None = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol, event_number: int) -> CancelableResult:
-        EventsIO.connection = connection
-        await connection.request(f"{Protocol.REMINDER_TITLE.value:02X}{event_number}")
-        await connection.request(f"{Protocol.REMINDER_TIME.value:02X}{event_number}")
-        EventsIO.result = CancelableResult[dict[str, object]]()
-        return await EventsIO.result.get_result()
+    async def request(connection: ConnectionProtocol, event_number: int) -> dict[str, object]:
+        pending = connection.pending.register(Protocol.REMINDER_TIME.value, event_number)
+        try:
+            await connection.request(bytes([Protocol.REMINDER_TITLE.value, event_number]))
+            await connection.request(bytes([Protocol.REMINDER_TIME.value, event_number]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
-    async def send_to_watch_set(message: str) -> None:
-        if EventsIO.connection is None:
-            raise RuntimeError("EventsIO.connection not set")
-
-        commands = EventsIOFunctional.prepare_watch_commands_set(message)
+    async def send_to_watch_set(connection: ConnectionProtocol, message: SetReminders) -> None:
+        commands = EventsIOFunctional.prepare_set_reminders(message)
         for command in commands:
             if isinstance(command, Write):
-                cmd_hex = to_compact_string(to_hex_string(command.data))
-                await EventsIO.connection.write(0x000E, cmd_hex)
+                await connection.write(0x000E, command.data)
 
     @staticmethod
-    def on_received(message: bytes) -> None:
-        data: str = to_hex_string(message)
-        reminder_json = EventsIOFunctional.decode_time(data[2:])
+    def on_received(message: bytes, connection: ConnectionProtocol) -> None:
+        pending = connection.pending.lookup(
+            Protocol.REMINDER_TIME.value, connection.pending.sub_index_of(message)
+        )
+        if pending is None:
+            logger.debug("EventsIO: no pending request for %s", Hex(message))
+            return
+
+        reminder_json = EventsIOFunctional.decode_time(message)
 
-        if EventsIO.title is not None:
-            reminder_json.update(EventsIO.title)
-        if EventsIO.result is None:
-            raise RuntimeError("EventsIO.result is not set")
-        EventsIO.result.set_result(reminder_json)
+        title = pending.context.get("title")
+        if isinstance(title, dict):
+            reminder_json.update(title)  # type: ignore[arg-type]
+        pending.set_result(reminder_json)
 
     @staticmethod
-    def on_received_title(message: bytes) -> None:
-        EventsIO.title = ReminderDecoder.reminder_title_to_json(message)  # type: ignore[assignment]
+    def on_received_title(message: bytes, connection: ConnectionProtocol) -> None:
+        pending = connection.pending.lookup(
+            Protocol.REMINDER_TIME.value, connection.pending.sub_index_of(message)
+        )
+        if pending is not None:
+            pending.context["title"] = ReminderDecoder.reminder_title_to_json(message)
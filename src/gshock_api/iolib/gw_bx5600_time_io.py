@@ -4,7 +4,7 @@ GW-BX5600 / GMW-BZ5000 time-set implementation.
 Protocol confirmed from btsnoop_hci_bx.log and matching GShockAPI Kotlin:
 
   For each of three SP steps, the watch sends a fragmented notification on
-  SP_DATA (0x0019). We reassemble fragments in on_received(), apply a simple
+  SP_DATA (0x0019). A FragmentBuffer reassembles it, we apply a simple
   transform to produce the write-back payload, then send it back.
 
   Step 1  request "051d..."  → 101-byte notification → change byte[0] 0x05→0x02 → write 101B
@@ -18,15 +18,14 @@ Handles:
   ALL_FEATURES = 0x000E  write-with-response
 """
 
-import asyncio
 from datetime import datetime
 import math
 import struct
-from typing import ClassVar
+import time
 
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.casio_constants import CasioConstants
 from gshock_api.casio_time_zone_helper import CasioTimeZoneHelper
+from gshock_api.fragment_buffer import FragmentBuffer
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.logger import logger
 
@@ -43,23 +42,17 @@ EMPTY_SLOT_LON = 0.0
 class GwBx5600TimeIO:
     """Sets the time on a GW-BX5600 / GMW-BZ5000 watch."""
 
-    connection: ClassVar[ConnectionProtocol | None] = None
-    result: ClassVar[CancelableResult[bytes] | None] = None
-    _step: ClassVar[int] = 0
-    _accumulator: ClassVar[bytes] = b""
-
     @staticmethod
     async def set_time(
-        connection: ConnectionProtocol, now: datetime | None = None
+        connection: ConnectionProtocol, now: datetime | None = None, offset: int = 0
     ) -> None:
-        """Read current SP data from watch, modify, write back, then set time."""
-        from gshock_api.watch_info import watch_info
-
-        if now is None:
-            now = datetime.now()
-        logger.info(f"GwBx5600TimeIO.set_time: {now}")
-
-        GwBx5600TimeIO.connection = connection
+        """
+        Read current SP data from watch, modify, write back, then set time.
+        With now=None the time is taken when the time command is sent, after
+        the SP steps, plus offset seconds.
+        """
+        watch_info = connection.watch_info
+        logger.info(f"GwBx5600TimeIO.set_time: {now or 'now'}")
 
         # Step 1 ──────────────────────────────────────────────────────────────
         logger.info("Step 1/4: time-slot data")
@@ -67,7 +60,7 @@ class GwBx5600TimeIO:
         req1.extend([0x1D, 0x00, 0x1D, 0x00])  # DST Watch State blocks
         req1.extend([0x24, 0x00, 0x24, 0x01, 0x24, 0x02])  # Time Slot blocks
 
-        notif1 = await GwBx5600TimeIO._request(connection, 1, req1.hex())
+        notif1 = await GwBx5600TimeIO._request(connection, 1, req1)
 
         wb1 = bytearray(notif1)
         wb1[0] = 0x02  # command byte: read (0x05) → write (0x02)
@@ -81,7 +74,7 @@ class GwBx5600TimeIO:
         for _ in range(blocks):
             req2.extend([CasioConstants.CHARACTERISTICS["CASIO_DST_SETTING"], 0x00])
 
-        notif2 = await GwBx5600TimeIO._request(connection, 2, req2.hex())
+        notif2 = await GwBx5600TimeIO._request(connection, 2, req2)
 
         wb2 = bytearray(notif2)
         wb2[0] = 0x06  # command byte: read (0x03) → write (0x06)
@@ -96,12 +89,15 @@ class GwBx5600TimeIO:
             idx = (i // 2) + (6 if i % 2 != 0 else 0)
             req3.extend([CasioConstants.CHARACTERISTICS["CASIO_WORLD_CITIES"], idx])
 
-        notif3 = await GwBx5600TimeIO._request(connection, 3, req3.hex())
+        notif3 = await GwBx5600TimeIO._request(connection, 3, req3)
         logger.debug(f"GwBx5600TimeIO Step3 write: {len(notif3)}B")
         await connection.write(SP_DATA, bytes(notif3))
 
         # Step 4 ──────────────────────────────────────────────────────────────
-        await GwBx5600TimeIO._write_time_command(connection, now)
+        if now is not None:
+            await GwBx5600TimeIO._write_time_command(connection, now)
+        else:
+            await GwBx5600TimeIO._write_current_time(connection, offset)
         logger.info("GwBx5600TimeIO.set_time: complete")
 
     @staticmethod
@@ -126,65 +122,87 @@ class GwBx5600TimeIO:
     async def request(
         connection: ConnectionProtocol, current_time: float | None = None, offset: int = 0
     ) -> None:
-        import time
-
         if current_time is None:
-            current_time = time.time()
-        now = datetime.fromtimestamp(current_time + offset)
-        await GwBx5600TimeIO.set_time(connection, now)
+            await GwBx5600TimeIO.set_time(connection, offset=offset)
+        else:
+            await GwBx5600TimeIO.set_time(connection, datetime.fromtimestamp(current_time + offset))
 
     @staticmethod
-    def on_received(data: bytes) -> None:
-        from gshock_api.watch_info import watch_info
-
-        if GwBx5600TimeIO.result is None:
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
+        pending = connection.pending.lookup(SP_DATA)
+        if pending is None or pending.fragments is None:
             return
 
-        GwBx5600TimeIO._accumulator += data
-
-        if GwBx5600TimeIO._step == 1:
-            expected = 101
-        elif GwBx5600TimeIO._step == 2:
-            expected = 28
-        elif GwBx5600TimeIO._step == 3:
-            expected = 1 + (watch_info.worldCitiesCount * 22)
-        else:
-            expected = 0
-
-        accumulated = len(GwBx5600TimeIO._accumulator)
+        fragments = pending.fragments
+        complete = fragments.feed(data)
         logger.debug(
-            f"GwBx5600TimeIO.on_received: step={GwBx5600TimeIO._step} "
-            f"accumulated={accumulated}B / expected={expected}B"
+            "GwBx5600TimeIO.on_received: accumulated=%dB / expected=%sB",
+            fragments.received, fragments.expected,
         )
 
-        if accumulated >= expected:
-            GwBx5600TimeIO.result.set_result(GwBx5600TimeIO._accumulator)
+        if complete:
+            pending.set_result(fragments.payload())
+
+    @staticmethod
+    def _expected_length(step: int, world_cities_count: int) -> int:
+        if step == 1:
+            return 101
+        if step == 2:
+            return 28
+        return 1 + world_cities_count * 22
 
     @staticmethod
     async def _request(
-        connection: ConnectionProtocol, step: int, req_payload: str
+        connection: ConnectionProtocol, step: int, req_payload: bytes | bytearray
     ) -> bytes:
-        GwBx5600TimeIO._step = step
-        GwBx5600TimeIO._accumulator = b""
-        GwBx5600TimeIO.result = CancelableResult[bytes]()
+        pending = connection.pending.register(SP_DATA, timeout=5.0)
+        connection.pending.start_transfer(
+            pending,
+            FragmentBuffer(
+                GwBx5600TimeIO.on_received,
+                expected=GwBx5600TimeIO._expected_length(step, connection.watch_info.worldCitiesCount),
+                handle=SP_DATA,
+            ),
+        )
         try:
             await connection.write(SP_REQUEST, req_payload)
-            return await asyncio.wait_for(
-                GwBx5600TimeIO.result.get_result(), timeout=5.0
-            )
+            # SP_REQUEST is a write without response; raise its error before waiting for the reply
+            await connection.flush()
+            return await pending.get_result()  # type: ignore[return-value]
         finally:
-            GwBx5600TimeIO.result = None
-            GwBx5600TimeIO._accumulator = b""
-            GwBx5600TimeIO._step = 0
+            connection.pending.discard(pending)
+
+    @staticmethod
+    async def _write_current_time(connection: ConnectionProtocol, offset: int) -> None:
+        """Sends the time the packet will arrive at, on a whole-second deadline if scheduled."""
+        link_delay = connection.latency.one_way_delay() if connection.latency is not None else 0.0
+        scheduler = connection.time_scheduler
+        if scheduler is None:
+            now = datetime.fromtimestamp(time.time() + link_delay + offset)
+            await GwBx5600TimeIO._write_time_command(connection, now)
+            return
+
+        target, deadline = scheduler.plan(link_delay)
+        time_cmd = GwBx5600TimeIO._time_command(datetime.fromtimestamp(target + offset))
+        logger.info(f"Step 4/4: time command: {time_cmd.hex()}, released at deadline")
+        release_error = await scheduler.wait_until(deadline)
+        await connection.write(ALL_FEATURES, time_cmd)
+        scheduler.record(target, link_delay, release_error)
 
     @staticmethod
     async def _write_time_command(
         connection: ConnectionProtocol, now: datetime
     ) -> None:
+        time_cmd = GwBx5600TimeIO._time_command(now)
+        logger.info(f"Step 4/4: time command: {time_cmd.hex()}")
+        await connection.write(ALL_FEATURES, time_cmd)
+
+    @staticmethod
+    def _time_command(now: datetime) -> bytes:
         casio_dow = 7 if now.weekday() == 6 else now.weekday() + 1
         sub_second = int((now.microsecond * 256) / 1_000_000)
 
-        time_cmd = bytes([
+        return bytes([
             0x09,
             now.year & 0xFF,
             (now.year >> 8) & 0xFF,
@@ -196,6 +214,4 @@ class GwBx5600TimeIO:
             casio_dow,
             sub_second,
             0x01,
-        ])
-        logger.info(f"Step 4/4: time command: {time_cmd.hex()}")
-        await connection.write(ALL_FEATURES, time_cmd.hex())
+        ])
\ No newline at end of file
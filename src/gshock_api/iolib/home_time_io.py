@@ -8,7 +8,8 @@ Slot 0 → main (home) city.
 Slot 1 → secondary city (used by watches with a second dial, e.g. MTG-B1000).
 """
 
-from gshock_api.cancelable_result import CancelableResult
+from gshock_api.casio_constants import CasioConstants
+from gshock_api.commands import GetHomeTime
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.world_cities_io import WorldCitiesIO
 
@@ -29,44 +30,44 @@ class HomeTimeIOFunctional:
 
 class HomeTimeIO:
     """
-    Stateful wrapper for HomeTime reads.
+    Wrapper for HomeTime reads.
     Delegates the actual BLE read to WorldCitiesIO and parses the result.
     """
-    result: CancelableResult[bytes] | None = None
-    connection: ConnectionProtocol | None = None
 
     @staticmethod
     async def request_raw(connection: ConnectionProtocol, slot: int = 0) -> bytes:
-        from gshock_api.watch_info import watch_info, WatchModel
+        from gshock_api.watch_info import WatchModel
         from gshock_api.casio_constants import CasioConstants
 
-        if watch_info.model == WatchModel.MTG_B3000:
-            HomeTimeIO.connection = connection
-            key = f"{CasioConstants.CHARACTERISTICS['CASIO_HOME_TIME']:02X}0{slot}"
-            await connection.request(key)
-            HomeTimeIO.result = CancelableResult[bytes]()
-            return await HomeTimeIO.result.get_result()
+        if connection.watch_info.model == WatchModel.MTG_B3000:
+            home_time_key = CasioConstants.CHARACTERISTICS["CASIO_HOME_TIME"]
+            pending = connection.pending.register(home_time_key, slot)
+            try:
+                await connection.request(bytes([home_time_key, slot]))
+                return await pending.get_result()  # type: ignore[return-value]
+            finally:
+                connection.pending.discard(pending)
         else:
             return await WorldCitiesIO.request(connection, slot)
 
     @staticmethod
-    async def send_to_watch(_message: str = "") -> None:
+    async def send_to_watch(connection: ConnectionProtocol, _command: GetHomeTime | None = None) -> None:
         """
         Initiate a HomeTime read by delegating to WorldCitiesIO.
         Slot 0 = home/main city.
         """
-        await WorldCitiesIO.send_to_watch(_message)
+        await WorldCitiesIO.send_to_watch(connection)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
         """
         Forward to WorldCitiesIO — HomeTime data arrives on a separate
         characteristic but is structurally identical to world cities data.
         """
-        if HomeTimeIO.result is not None:
-            HomeTimeIO.result.set_result(data)
-        else:
-            WorldCitiesIO.on_received(data)
+        home_time_key = CasioConstants.CHARACTERISTICS["CASIO_HOME_TIME"]
+        sub_index = connection.pending.sub_index_of(data)
+        if not connection.pending.resolve(home_time_key, sub_index, data):
+            WorldCitiesIO.on_received(data, connection)
 
     @staticmethod
     async def request(connection: ConnectionProtocol, slot: int = 0) -> str:
@@ -81,4 +82,4 @@ class HomeTimeIO:
             ASCII city name string.
         """
         raw = await HomeTimeIO.request_raw(connection, slot)
-        return HomeTimeIOFunctional.parse_home_city(raw)
\ No newline at end of file
+        return HomeTimeIOFunctional.parse_home_city(raw)
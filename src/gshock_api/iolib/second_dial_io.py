@@ -27,14 +27,13 @@ Protocol confirmed from btsnoop_hci_mgt_b1000.log:
 ResetSequence byte format: 21 {dial_index} 01
 """
 
-from typing import ClassVar
+import asyncio
 
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.dst_for_world_cities_io import DstForWorldCitiesIO
 from gshock_api.iolib.dst_watch_state_io import DstWatchStateIO, DtsState
 from gshock_api.iolib.world_cities_io import WorldCitiesIO
 from gshock_api.logger import logger
-from gshock_api.watch_info import watch_info
 
 HANDLE_WRITE = 0x000E   # write-with-response (SET)
 
@@ -42,6 +41,8 @@ HANDLE_WRITE = 0x000E   # write-with-response (SET)
 RESET_SEQUENCE_START = bytes([0x21, 0x00, 0x01])   # dial 0
 RESET_SEQUENCE_END   = bytes([0x21, 0x01, 0x01])   # dial 1
 
+CITIES = (0, 1)  # the two world cities the dials show
+
 
 class SecondDialIO:
     """Sets the time on the Second Dial, including the second analogue dial.
@@ -52,8 +53,6 @@ class SecondDialIO:
     main time command.
     """
 
-    connection: ClassVar[ConnectionProtocol | None] = None
-
     # ── Public entry point ────────────────────────────────────────────────────
 
     @staticmethod
@@ -65,7 +64,6 @@ class SecondDialIO:
         writes them back bracketed by ResetSequence commands so the second
         analogue dial syncs to the second world city.
         """
-        SecondDialIO.connection = connection
         logger.info("SecondDialIO: starting second dial sequence")
 
         # ResetSequence start
@@ -76,22 +74,26 @@ class SecondDialIO:
         dst_data = await DstWatchStateIO.request(connection, DtsState.ZERO)
         await connection.write(HANDLE_WRITE, dst_data)
 
-        # Read and write back DST city settings (0x1e) for both cities
-        dst_city0 = await DstForWorldCitiesIO.request(connection, city_number=0)
-        dst_city1 = await DstForWorldCitiesIO.request(connection, city_number=1)
-        await connection.write(HANDLE_WRITE, dst_city0)
-        await connection.write(HANDLE_WRITE, dst_city1)
+        # Both cities' reads go out back to back and their write-backs are
+        # queued together; the write queue keeps them in this order
+        dst_cities = await asyncio.gather(
+            *(DstForWorldCitiesIO.request(connection, city_number=city) for city in CITIES)
+        )
+        await SecondDialIO._write_all(connection, dst_cities)
 
-        if watch_info.hasWorldCities:
-          # Read and write back world city coordinates (0x1f) for both cities
-          wc0 = await WorldCitiesIO.request(connection, city_number=0)
-          wc1 = await WorldCitiesIO.request(connection, city_number=1)
-          await connection.write(HANDLE_WRITE, wc0)
-          await connection.write(HANDLE_WRITE, wc1)
+        if connection.watch_info.hasWorldCities:
+            world_cities = await asyncio.gather(
+                *(WorldCitiesIO.request(connection, city_number=city) for city in CITIES)
+            )
+            await SecondDialIO._write_all(connection, world_cities)
 
         # ResetSequence end
         await connection.write(HANDLE_WRITE, RESET_SEQUENCE_END)
         logger.info("ResetSequence end (210101)")
 
         logger.info("SecondDialIO: second dial sequence complete")
+
+    @staticmethod
+    async def _write_all(connection: ConnectionProtocol, payloads: list[bytes]) -> None:
+        await asyncio.gather(*(connection.write(HANDLE_WRITE, payload) for payload in payloads))
         
\ No newline at end of file
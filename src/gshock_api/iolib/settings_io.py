@@ -1,19 +1,23 @@
 import json
 from typing import Literal, TypedDict
 
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.casio_constants import CasioConstants
+from gshock_api.commands import GetSettings, SetSettings
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Protocol
 from gshock_api.logger import logger
 from gshock_api.settings import settings
-from gshock_api.utils import to_compact_string, to_hex_string, to_int_array
-from gshock_api.watch_info import watch_info, WatchModel
+from gshock_api.watch_info import WatchInfo, WatchModel, watch_info
 
 CHARACTERISTICS: dict[str, int] = CasioConstants.CHARACTERISTICS
 
 
+def _info(info: WatchInfo | None) -> WatchInfo:
+    """The given watch, or the module-level watch_info of single-watch callers."""
+    return info if info is not None else watch_info
+
+
 class SettingsDict(TypedDict):
     time_format: Literal["24h", "12h"]
     button_tone: bool
@@ -42,7 +46,7 @@ class SettingsIOFunctional:
     """
 
     @staticmethod
-    def encode(settings_dict: SettingsDict) -> bytes:
+    def encode(settings_dict: SettingsDict, info: WatchInfo | None = None) -> bytes:
         mask_24_hours = 0b00000001
         mask_button_tone_off = 0b00000010
         mask_light_off = 0b00000100
@@ -59,7 +63,8 @@ class SettingsIOFunctional:
         if not settings_dict["power_saving_mode"]:
             arr[1] |= power_saving_mode
 
-        long_duration = watch_info.longLightDuration if watch_info.longLightDuration else "4s"
+        info = _info(info)
+        long_duration = info.longLightDuration if info.longLightDuration else "4s"
         if settings_dict["light_duration"] == long_duration:
             arr[2] = 1
         if settings_dict["date_format"] == "DD:MM":
@@ -78,7 +83,9 @@ class SettingsIOFunctional:
         return bytes(arr)
 
     @staticmethod
-    def encode_mtg_b3000(settings_dict: MtgB3000SettingsDict) -> bytes:
+    def encode_mtg_b3000(
+        settings_dict: MtgB3000SettingsDict, info: WatchInfo | None = None
+    ) -> bytes:
         """
         Same 12-byte wire format as encode(), but only sets the bits/bytes
         that actually matter for this model. time_format, auto_light,
@@ -98,7 +105,8 @@ class SettingsIOFunctional:
         if not settings_dict["power_saving_mode"]:
             arr[1] |= power_saving_mode_off
 
-        long_duration = watch_info.longLightDuration if watch_info.longLightDuration else "4s"
+        info = _info(info)
+        long_duration = info.longLightDuration if info.longLightDuration else "4s"
         if settings_dict["light_duration"] == long_duration:
             arr[2] = 1
         # arr[3], arr[4], arr[5], ... left as 0 — date_format/language/auto_light
@@ -107,13 +115,13 @@ class SettingsIOFunctional:
         return bytes(arr)
 
     @staticmethod
-    def decode(setting_bytes: bytes) -> dict[str, object]:
+    def decode(setting_bytes: bytes, info: WatchInfo | None = None) -> dict[str, object]:
         mask_24_hours = 0b00000001
         mask_button_tone_off = 0b00000010
         mask_light_off = 0b00000100
         power_saving_mode = 0b00010000
 
-        setting_array = to_int_array(to_hex_string(setting_bytes))
+        setting_array = setting_bytes
 
         decoded: dict[str, object] = {}
         if setting_array[1] & mask_24_hours != 0:
@@ -132,13 +140,16 @@ class SettingsIOFunctional:
         else:
             decoded["language"] = "English"
 
-        long_duration = watch_info.longLightDuration if watch_info.longLightDuration else "4s"
-        short_duration = watch_info.shortLightDuration if watch_info.shortLightDuration else "2s"
+        info = _info(info)
+        long_duration = info.longLightDuration if info.longLightDuration else "4s"
+        short_duration = info.shortLightDuration if info.shortLightDuration else "2s"
         decoded["light_duration"] = long_duration if setting_array[2] == 1 else short_duration
         return decoded
 
     @staticmethod
-    def decode_mtg_b3000(setting_bytes: bytes) -> dict[str, object]:
+    def decode_mtg_b3000(
+        setting_bytes: bytes, info: WatchInfo | None = None
+    ) -> dict[str, object]:
         """
         Only surfaces the fields that actually apply to this model.
         Wire layout is identical to decode() — only the returned dict differs.
@@ -146,14 +157,15 @@ class SettingsIOFunctional:
         mask_button_tone_off = 0b00000010
         power_saving_mode = 0b00010000
 
-        setting_array = to_int_array(to_hex_string(setting_bytes))
+        setting_array = setting_bytes
 
         decoded: dict[str, object] = {}
         decoded["button_tone"] = (setting_array[1] & mask_button_tone_off) == 0
         decoded["power_saving_mode"] = (setting_array[1] & power_saving_mode) == 0
 
-        long_duration = watch_info.longLightDuration if watch_info.longLightDuration else "4s"
-        short_duration = watch_info.shortLightDuration if watch_info.shortLightDuration else "2s"
+        info = _info(info)
+        long_duration = info.longLightDuration if info.longLightDuration else "4s"
+        short_duration = info.shortLightDuration if info.shortLightDuration else "2s"
         decoded["light_duration"] = long_duration if setting_array[2] == 1 else short_duration
         return decoded
 
@@ -167,69 +179,85 @@ class SettingsIOFunctional:
         ]
 
     @staticmethod
-    def prepare_watch_commands_set(message_json: str) -> list[BLEAction]:
-        json_setting: SettingsDict = json.loads(message_json).get("value")  # type: ignore
-        encoded_setting = SettingsIOFunctional.encode(json_setting)
+    def prepare_watch_commands_set(
+        message_json: str, info: WatchInfo | None = None
+    ) -> list[BLEAction]:
+        return SettingsIOFunctional.prepare_set_settings(
+            SetSettings.from_dict(json.loads(message_json)), info
+        )
+
+    @staticmethod
+    def prepare_set_settings(
+        command: SetSettings, info: WatchInfo | None = None
+    ) -> list[BLEAction]:
+        json_setting: SettingsDict = command.settings  # type: ignore[assignment]
+        encoded_setting = SettingsIOFunctional.encode(json_setting, info)
         return [Write(handle=0x000E, data=encoded_setting)]
 
     @staticmethod
-    def prepare_watch_commands_set_mtg_b3000(message_json: str) -> list[BLEAction]:
-        json_setting: MtgB3000SettingsDict = json.loads(message_json).get("value")  # type: ignore
-        encoded_setting = SettingsIOFunctional.encode_mtg_b3000(json_setting)
+    def prepare_watch_commands_set_mtg_b3000(
+        message_json: str, info: WatchInfo | None = None
+    ) -> list[BLEAction]:
+        return SettingsIOFunctional.prepare_set_settings_mtg_b3000(
+            SetSettings.from_dict(json.loads(message_json)), info
+        )
+
+    @staticmethod
+    def prepare_set_settings_mtg_b3000(
+        command: SetSettings, info: WatchInfo | None = None
+    ) -> list[BLEAction]:
+        json_setting: MtgB3000SettingsDict = command.settings  # type: ignore[assignment]
+        encoded_setting = SettingsIOFunctional.encode_mtg_b3000(json_setting, info)
         return [Write(handle=0x000E, data=encoded_setting)]
 
 
 class SettingsIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for SettingsIOFunctional commands.
+    Pending results live in the connection's request registry.
     """
-    result: CancelableResult[str] | None = None
-    connection: ConnectionProtocol | None = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol) -> CancelableResult[str]:
-        SettingsIO.connection = connection
-        await connection.request(f"{Protocol.SETTING_FOR_BASIC.value:02X}")
-        SettingsIO.result = CancelableResult[str]()
-        return await SettingsIO.result.get_result()
+    async def request(connection: ConnectionProtocol) -> dict[str, object]:
+        pending = connection.pending.register(Protocol.SETTING_FOR_BASIC.value)
+        try:
+            await connection.request(bytes([Protocol.SETTING_FOR_BASIC.value]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
-    async def send_to_watch(_message: str) -> None:
-        if SettingsIO.connection is None:
-            raise RuntimeError("SettingsIO.connection is not set")
-
+    async def send_to_watch(connection: ConnectionProtocol, _command: GetSettings | None = None) -> None:
         commands = SettingsIOFunctional.prepare_watch_commands()
         for command in commands:
             if isinstance(command, Write):
-                await SettingsIO.connection.write(command.handle, command.data)
+                await connection.write(command.handle, command.data)
 
     @staticmethod
-    async def send_to_watch_set(message: str) -> None:
-        if SettingsIO.connection is None:
-            raise RuntimeError("SettingsIO.connection is not set")
-
-        if watch_info.model == WatchModel.MTG_B3000:
-            commands = SettingsIOFunctional.prepare_watch_commands_set_mtg_b3000(message)
+    async def send_to_watch_set(connection: ConnectionProtocol, message: SetSettings) -> None:
+        info = connection.watch_info
+        if info.model == WatchModel.MTG_B3000:
+            commands = SettingsIOFunctional.prepare_set_settings_mtg_b3000(message, info)
         else:
-            commands = SettingsIOFunctional.prepare_watch_commands_set(message)
+            commands = SettingsIOFunctional.prepare_set_settings(message, info)
 
         for command in commands:
             if isinstance(command, Write):
-                setting_to_set = to_compact_string(to_hex_string(command.data))
-                await SettingsIO.connection.write(command.handle, setting_to_set)
+                await connection.write(command.handle, command.data)
 
     @staticmethod
-    def on_received(message: bytes) -> None:
+    def on_received(message: bytes, connection: ConnectionProtocol) -> None:
         logger.info(f"SettingsIO onReceived: {message}")
 
-        if watch_info.model == WatchModel.MTG_B3000:
-            decoded_dict = SettingsIOFunctional.decode_mtg_b3000(message)
+        info = connection.watch_info
+        if info.model == WatchModel.MTG_B3000:
+            decoded_dict = SettingsIOFunctional.decode_mtg_b3000(message, info)
             settings.button_tone = decoded_dict["button_tone"]  # type: ignore
             settings.power_saving_mode = decoded_dict["power_saving_mode"]  # type: ignore
             settings.light_duration = decoded_dict["light_duration"]  # type: ignore
         else:
-            decoded_dict = SettingsIOFunctional.decode(message)
+            decoded_dict = SettingsIOFunctional.decode(message, info)
             settings.time_format = decoded_dict["time_format"]  # type: ignore
             settings.button_tone = decoded_dict["button_tone"]  # type: ignore
             settings.auto_light = decoded_dict["auto_light"]  # type: ignore
@@ -238,7 +266,6 @@ class SettingsIO:
             settings.language = decoded_dict["language"]  # type: ignore
             settings.light_duration = decoded_dict["light_duration"]  # type: ignore
 
-        if SettingsIO.result is None:
-            raise RuntimeError("SettingsIO.result is not set")
-        SettingsIO.result.set_result(json.dumps(settings.__dict__))
-        
\ No newline at end of file
+        connection.pending.resolve(
+            Protocol.SETTING_FOR_BASIC.value, None, dict(settings.__dict__)
+        )
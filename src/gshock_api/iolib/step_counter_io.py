@@ -1,15 +1,26 @@
+from array import array
+import asyncio
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 import struct
-from typing import Final
+import sys
+from typing import TYPE_CHECKING, Any, ClassVar, Final
 
-from gshock_api.cancelable_result import CancelableResult
+from gshock_api.casio_constants import CasioConstants
+from gshock_api.fragment_buffer import FragmentBuffer
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.logger import logger
 from gshock_api.step_counter_data import StepCounterData
 
-FALLBACK_EXPECTED_LENGTH: Final[int] = 400
+if TYPE_CHECKING:
+    from gshock_api.pending_requests import PendingRequest
+
 DRSP_CATEGORY_EXERCISE: Final[int] = 0x11
-START_TRANSACTION_CMD: Final[bytes] = bytes([0x00, DRSP_CATEGORY_EXERCISE, 0x00, 0x00, 0x00])
-END_TRANSACTION_CMD: Final[bytes] = bytes([0x04, DRSP_CATEGORY_EXERCISE, 0x00, 0x00, 0x00])
+# DRSP commands: start (from the watch, with the length) and end of a transfer
+DRSP_START: Final[int] = 0x00
+DRSP_END: Final[int] = 0x04
+START_TRANSACTION_CMD: Final[bytes] = bytes([DRSP_START, DRSP_CATEGORY_EXERCISE, 0x00, 0x00, 0x00])
+END_TRANSACTION_CMD: Final[bytes] = bytes([DRSP_END, DRSP_CATEGORY_EXERCISE, 0x00, 0x00, 0x00])
 
 
 class StepCounterIOFunctional:
@@ -22,78 +33,142 @@ class StepCounterIOFunctional:
     DAILY_SLOT_COUNT: Final[int] = 14
     DAILY_SLOT_SIZE: Final[int] = 4
 
-    @staticmethod
-    def parse(payload: bytes) -> StepCounterData | None:
-        daily_history_offset = (
-            StepCounterIOFunctional.HEADER_SIZE
-            + StepCounterIOFunctional.HOURLY_SLOT_COUNT * StepCounterIOFunctional.HOURLY_SLOT_SIZE
-            + StepCounterIOFunctional.BETWEEN_HISTORY_PADDING_SIZE
-        )
-        current_day_offset = (
-            daily_history_offset
-            + StepCounterIOFunctional.DAILY_SLOT_COUNT * StepCounterIOFunctional.DAILY_SLOT_SIZE
-        )
+    HOURLY_OFFSET: Final[int] = HEADER_SIZE
+    DAILY_OFFSET: Final[int] = (
+        HOURLY_OFFSET + HOURLY_SLOT_COUNT * HOURLY_SLOT_SIZE + BETWEEN_HISTORY_PADDING_SIZE
+    )
+    # The current day's total follows the 14 history slots, so it is read as a 15th daily slot
+    RECORD_SIZE: Final[int] = DAILY_OFFSET + (DAILY_SLOT_COUNT + 1) * DAILY_SLOT_SIZE
 
-        if len(payload) < current_day_offset + StepCounterIOFunctional.DAILY_SLOT_SIZE or payload[0] != 0x26:
-            return None
+    HOURLY_MISSING: Final[int] = 0xFFFE
+    DAILY_MISSING: Final[int] = 0xFFFFFFFE
 
-        hourly_steps: list[int | None] = []
-        for i in range(StepCounterIOFunctional.HOURLY_SLOT_COUNT):
-            offset = StepCounterIOFunctional.HEADER_SIZE + i * StepCounterIOFunctional.HOURLY_SLOT_SIZE
-            val = struct.unpack_from("<H", payload, offset)[0]
-            hourly_steps.append(None if val == 0xFFFE else val)
+    # key, day of week, month, day, 2 reserved, hourly slots, padding, daily slots + current day
+    RECORD: Final[struct.Struct] = struct.Struct(
+        f"<4B2x{HOURLY_SLOT_COUNT}H{BETWEEN_HISTORY_PADDING_SIZE}x{DAILY_SLOT_COUNT + 1}I"
+    )
 
-        daily_history: list[int | None] = []
-        for i in range(StepCounterIOFunctional.DAILY_SLOT_COUNT):
-            offset = daily_history_offset + i * StepCounterIOFunctional.DAILY_SLOT_SIZE
-            val = struct.unpack_from("<I", payload, offset)[0]
-            daily_history.append(None if val == 0xFFFFFFFE else val)
+    @staticmethod
+    def is_record(payload: bytes | bytearray | memoryview) -> bool:
+        return len(payload) >= StepCounterIOFunctional.RECORD_SIZE and payload[0] == StepCounterIO.KEY
+
+    @staticmethod
+    def parse(payload: bytes) -> StepCounterData | None:
+        if not StepCounterIOFunctional.is_record(payload):
+            return None
 
-        cur_val = struct.unpack_from("<I", payload, current_day_offset)[0]
-        current_day_steps = None if cur_val == 0xFFFFFFFE else cur_val
+        fields = StepCounterIOFunctional.RECORD.unpack_from(payload)
+        hourly_end = 4 + StepCounterIOFunctional.HOURLY_SLOT_COUNT
+        hourly_missing = StepCounterIOFunctional.HOURLY_MISSING
+        daily_missing = StepCounterIOFunctional.DAILY_MISSING
+        daily = [None if v == daily_missing else v for v in fields[hourly_end:]]
 
         return StepCounterData(
-            day_of_week=payload[1],
-            month=payload[2],
-            day_of_month=payload[3],
-            hourly_steps=hourly_steps,
-            daily_history=daily_history,
-            current_day_steps=current_day_steps,
+            day_of_week=fields[1],
+            month=fields[2],
+            day_of_month=fields[3],
+            hourly_steps=[None if v == hourly_missing else v for v in fields[4:hourly_end]],
+            daily_history=daily[:-1],
+            current_day_steps=daily[-1],
         )
 
+    @staticmethod
+    def parse_batch(payloads: Iterable[bytes | bytearray | memoryview]) -> "StepCounterBatch":
+        """
+        Decodes many records into flat arrays without building StepCounterData
+        objects. Payloads that are not activity records are skipped.
+        """
+        batch = StepCounterBatch()
+        hourly_start = StepCounterIOFunctional.HOURLY_OFFSET
+        hourly_end = hourly_start + StepCounterBatch.HOURLY_COLUMNS * StepCounterIOFunctional.HOURLY_SLOT_SIZE
+        daily_start = StepCounterIOFunctional.DAILY_OFFSET
+        daily_end = StepCounterIOFunctional.RECORD_SIZE
+
+        for payload in payloads:
+            if not StepCounterIOFunctional.is_record(payload):
+                continue
+            view = memoryview(payload)
+            # Slots are stored little-endian, so each series is a straight copy
+            batch.hourly.frombytes(view[hourly_start:hourly_end])
+            batch.daily.frombytes(view[daily_start:daily_end])
+            batch.dates.append((payload[1], payload[2], payload[3]))
+
+        if sys.byteorder == "big":
+            batch.hourly.byteswap()
+            batch.daily.byteswap()
+        return batch
+
+
+@dataclass
+class StepCounterBatch:
+    """
+    Step series of several records as row-major 2-D arrays: ``hourly`` has
+    HOURLY_SLOT_COUNT columns, ``daily`` DAILY_SLOT_COUNT + 1 (the last one
+    is the record's current day). Unmeasured slots keep the watch's
+    HOURLY_MISSING / DAILY_MISSING values.
+    """
+
+    dates: list[tuple[int, int, int]] = field(default_factory=list)  # (day of week, month, day)
+    hourly: "array[int]" = field(default_factory=lambda: array("H"))
+    daily: "array[int]" = field(default_factory=lambda: array("I"))
+
+    HOURLY_COLUMNS: ClassVar[int] = StepCounterIOFunctional.HOURLY_SLOT_COUNT
+    DAILY_COLUMNS: ClassVar[int] = StepCounterIOFunctional.DAILY_SLOT_COUNT + 1
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def hourly_row(self, row: int) -> "array[int]":
+        start = row * self.HOURLY_COLUMNS
+        return self.hourly[start : start + self.HOURLY_COLUMNS]
+
+    def daily_row(self, row: int) -> "array[int]":
+        start = row * self.DAILY_COLUMNS
+        return self.daily[start : start + self.DAILY_COLUMNS]
+
+    def to_numpy(self) -> tuple[Any, Any]:
+        """(hourly, daily) as 2-D NumPy views. NumPy is optional and only needed here."""
+        import numpy as np  # type: ignore[import-not-found]
+
+        rows = len(self)
+        hourly = np.frombuffer(self.hourly, dtype="<u2").reshape(rows, self.HOURLY_COLUMNS)
+        daily = np.frombuffer(self.daily, dtype="<u4").reshape(rows, self.DAILY_COLUMNS)
+        return hourly, daily
+
 
 class StepCounterIO:
-    """Manages requesting, fragment accumulation, and decoding of ABL-100 step counter notifications."""
+    """Manages requesting, fragment reassembly, and decoding of ABL-100 step counter notifications."""
+
+    KEY: Final[int] = 0x26  # CASIO_ACTIVITY_RECORD
 
-    result: CancelableResult[StepCounterData] | None = None
-    connection: ConnectionProtocol | None = None
-    accumulator: bytearray = bytearray()
-    expected_length: int = FALLBACK_EXPECTED_LENGTH
+    # END acknowledgements in flight, referenced until they are sent
+    _acknowledgements: ClassVar[set["asyncio.Task[None]"]] = set()
 
     @staticmethod
     async def request(connection: ConnectionProtocol) -> StepCounterData:
-        from gshock_api.watch_info import watch_info
-
+        watch_info = connection.watch_info
         if not watch_info.hasStepCounter:
             logger.info(f"Step counter not supported on watch model: {watch_info.model}")
             return StepCounterData.unavailable()
 
-        StepCounterIO.connection = connection
-        StepCounterIO.accumulator = bytearray()
-        StepCounterIO.expected_length = FALLBACK_EXPECTED_LENGTH
-        StepCounterIO.result = CancelableResult[StepCounterData]()
+        pending = connection.pending.register(StepCounterIO.KEY)
+        # The record arrives on the convoy characteristic; its length is
+        # announced on DRSP before the data, see on_drsp_received
+        connection.pending.start_transfer(
+            pending,
+            FragmentBuffer(StepCounterIO.on_received, handle=CasioConstants.HANDLE_CONVOY_NOTIFICATION),
+        )
 
-        # Handle 0x0011 is CASIO_DATA_REQUEST_SP
-        await connection.write(0x0011, START_TRANSACTION_CMD)
         try:
-            return await StepCounterIO.result.get_result()
+            # Handle 0x0011 is CASIO_DATA_REQUEST_SP
+            await connection.write(0x0011, START_TRANSACTION_CMD)
+            return await pending.get_result()  # type: ignore[return-value]
         finally:
-            StepCounterIO.result = None
-            StepCounterIO.accumulator = bytearray()
+            connection.pending.discard(pending)
 
     @staticmethod
-    def on_drsp_received(data: bytes) -> None:
-        """Handles length announcement or ACK notifications on the DRSP characteristic (handle 0x0011)."""
+    def on_drsp_received(data: bytes, connection: ConnectionProtocol) -> None:
+        """Handles the length announcement and end of a transfer on the DRSP characteristic (handle 0x0011)."""
         if len(data) < 5:
             return
         command = data[0]
@@ -101,44 +176,63 @@ class StepCounterIO:
         if category != DRSP_CATEGORY_EXERCISE:
             return
 
-        if command == 0x00:
+        pending = connection.pending.lookup(StepCounterIO.KEY)
+        if pending is None or pending.fragments is None:
+            return
+
+        if command == DRSP_START:
             announced_length = data[2] | (data[3] << 8) | (data[4] << 16)
-            if StepCounterIO.result is not None:
-                StepCounterIO.expected_length = announced_length
-                logger.debug(f"StepCounterIO: expected length announced = {announced_length}B")
+            pending.fragments.expect(announced_length)
+            logger.debug(f"StepCounterIO: expected length announced = {announced_length}B")
+        elif command == DRSP_END and pending.fragments.started:
+            # The watch ended the transfer; decode whatever arrived, no END to send back
+            StepCounterIO._finish(pending, pending.fragments, connection, acknowledge=False)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
         """Accumulates incoming fragments and parses StepCounterData when full payload is received."""
-        if StepCounterIO.result is None:
+        pending = connection.pending.lookup(StepCounterIO.KEY)
+        if pending is None or pending.fragments is None:
             return
 
-        StepCounterIO.accumulator.extend(data)
+        fragments = pending.fragments
+        if fragments.expected is None and not fragments.started and data[0] == StepCounterIO.KEY:
+            # No announcement seen; the key says it's an activity record, which
+            # is complete once its fixed layout has arrived (the rest is padding)
+            fragments.expect(StepCounterIOFunctional.RECORD_SIZE)
+        complete = fragments.feed(data)
         logger.debug(
-            f"StepCounterIO.on_received: accumulated={len(StepCounterIO.accumulator)}B / "
-            f"expected={StepCounterIO.expected_length}B"
+            "StepCounterIO.on_received: accumulated=%dB / expected=%sB",
+            fragments.received, fragments.expected,
         )
 
-        if len(StepCounterIO.accumulator) < StepCounterIO.expected_length:
-            return
+        if complete:
+            StepCounterIO._finish(pending, fragments, connection)
 
-        # Acknowledge end of transaction
-        if StepCounterIO.connection is not None:
+    @staticmethod
+    def _finish(
+        pending: "PendingRequest[object]",
+        fragments: FragmentBuffer,
+        connection: ConnectionProtocol,
+        acknowledge: bool = True,
+    ) -> None:
+        if pending.done:
+            return
+        if acknowledge:
             try:
                 # Fire-and-forget end transaction command
-                import asyncio
-                asyncio.create_task(
-                    StepCounterIO.connection.write(0x0011, END_TRANSACTION_CMD)
-                )
+                task = asyncio.create_task(connection.write(0x0011, END_TRANSACTION_CMD))
+                StepCounterIO._acknowledgements.add(task)
+                task.add_done_callback(StepCounterIO._acknowledgements.discard)
             except Exception as e:
                 logger.warning(f"Failed to send end transaction command: {e}")
 
-        full_payload = bytes(StepCounterIO.accumulator)
+        full_payload = fragments.payload()
         step_data = StepCounterIOFunctional.parse(full_payload)
 
         if step_data is not None:
             logger.info(f"Step count parsed: {step_data}")
-            StepCounterIO.result.set_result(step_data)
+            pending.set_result(step_data)
         else:
             logger.warning(f"Failed to parse activity record from {len(full_payload)}B payload")
-            StepCounterIO.result.set_result(StepCounterData.unavailable())
+            pending.set_result(StepCounterData.unavailable())
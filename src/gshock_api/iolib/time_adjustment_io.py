@@ -1,12 +1,11 @@
 import json
 
-from gshock_api.cancelable_result import CancelableResult
+from gshock_api.commands import GetTimeAdjustment, SetTimeAdjustment
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
-from gshock_api.iolib.error_io import ErrorIO
 from gshock_api.iolib.packet import Protocol
 from gshock_api.logger import logger
-from gshock_api.utils import to_compact_string, to_hex_string, to_int_array
+from gshock_api.utils import to_int_array
 
 
 class TimeAdjustmentIOFunctional:
@@ -15,11 +14,11 @@ class TimeAdjustmentIOFunctional:
     """
 
     @staticmethod
-    def encode(original_hex: str, time_adjustment: bool, minutes_after_hour: int) -> bytes:
-        int_array = to_int_array(original_hex)
-        int_array[12] = 0x80 if not time_adjustment else 0x00
-        int_array[13] = minutes_after_hour
-        return bytes(int_array)
+    def encode(original: bytes | str, time_adjustment: bool, minutes_after_hour: int) -> bytes:
+        encoded = bytearray(to_int_array(original) if isinstance(original, str) else original)
+        encoded[12] = 0x80 if not time_adjustment else 0x00
+        encoded[13] = minutes_after_hour
+        return bytes(encoded)
 
     @staticmethod
     def decode(data_bytes: bytes) -> dict[str, str]:
@@ -40,67 +39,66 @@ class TimeAdjustmentIOFunctional:
         ]
 
     @staticmethod
-    def prepare_watch_commands_set(message_json: str, original_hex: str) -> list[BLEAction]:
-        parsed_message = json.loads(message_json)
-        time_adjustment: bool = parsed_message.get("timeAdjustment") == "True"
-        minutes_after_hour: int = int(parsed_message.get("minutesAfterHour", "0"))
+    def prepare_watch_commands_set(message_json: str, original: bytes | str) -> list[BLEAction]:
+        return TimeAdjustmentIOFunctional.prepare_set_time_adjustment(
+            SetTimeAdjustment.from_dict(json.loads(message_json)), original
+        )
 
-        encoded = TimeAdjustmentIOFunctional.encode(original_hex, time_adjustment, minutes_after_hour)
+    @staticmethod
+    def prepare_set_time_adjustment(
+        command: SetTimeAdjustment, original: bytes | str
+    ) -> list[BLEAction]:
+        encoded = TimeAdjustmentIOFunctional.encode(
+            original, command.time_adjustment, command.minutes_after_hour
+        )
         return [Write(handle=0x000E, data=encoded)]
 
 
 class TimeAdjustmentIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for TimeAdjustmentIOFunctional commands.
+    Pending results, and the original value needed for a later set, live in
+    the connection's request registry.
     """
-    result: CancelableResult[dict[str, object]] | None = None
-    connection: ConnectionProtocol | None = None
-    original_value: str | None = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol) -> CancelableResult[dict[str, object]]:
-        TimeAdjustmentIO.connection = connection
-        await connection.request(f"{Protocol.SETTING_FOR_BLE.value:02X}")
-        TimeAdjustmentIO.result = CancelableResult[dict[str, object]]()
-        return await TimeAdjustmentIO.result.get_result()
+    async def request(connection: ConnectionProtocol) -> dict[str, object]:
+        pending = connection.pending.register(Protocol.SETTING_FOR_BLE.value)
+        try:
+            await connection.request(bytes([Protocol.SETTING_FOR_BLE.value]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
-    async def send_to_watch(_message: str) -> None:
-        if TimeAdjustmentIO.connection is None:
-            raise RuntimeError("TimeAdjustmentIO.connection is not set")
-
+    async def send_to_watch(
+        connection: ConnectionProtocol, _command: GetTimeAdjustment | None = None
+    ) -> None:
         commands = TimeAdjustmentIOFunctional.prepare_watch_commands()
         for command in commands:
             if isinstance(command, Write):
-                await TimeAdjustmentIO.connection.write(command.handle, command.data)
+                await connection.write(command.handle, command.data)
 
     @staticmethod
-    async def send_to_watch_set(message: str) -> dict[str, str] | None:
-        if TimeAdjustmentIO.original_value is None:
-            return await ErrorIO.request("Error: Must call get before set")
+    async def send_to_watch_set(connection: ConnectionProtocol, message: SetTimeAdjustment) -> None:
+        original_value = connection.pending.recall(Protocol.SETTING_FOR_BLE.value)
+        if original_value is None:
+            logger.error("TimeAdjustmentIO: must call get before set")
+            return
 
-        if TimeAdjustmentIO.connection is None:
-            raise RuntimeError("TimeAdjustmentIO.connection is not set")
-
-        commands = TimeAdjustmentIOFunctional.prepare_watch_commands_set(
-            message, TimeAdjustmentIO.original_value
-        )
+        commands = TimeAdjustmentIOFunctional.prepare_set_time_adjustment(message, original_value)
         for command in commands:
             if isinstance(command, Write):
-                write_cmd = to_compact_string(to_hex_string(command.data))
-                await TimeAdjustmentIO.connection.write(0x000E, write_cmd)
-        return None
+                await connection.write(0x000E, command.data)
 
     @staticmethod
-    def on_received(message: bytes) -> None:
-        TimeAdjustmentIO.original_value = to_hex_string(message)  # save original message
+    def on_received(message: bytes, connection: ConnectionProtocol) -> None:
+        key = Protocol.SETTING_FOR_BLE.value
+        connection.pending.remember(key, None, message)  # save original message
 
         decoded_dict = TimeAdjustmentIOFunctional.decode(message)
-
-        if TimeAdjustmentIO.result is None:
-            raise RuntimeError("TimeAdjustmentIO.result is not set")
-        TimeAdjustmentIO.result.set_result(decoded_dict)  # type: ignore[arg-type]
+        connection.pending.resolve(key, None, decoded_dict)
 
     @staticmethod
     async def on_received_set(message: bytes) -> None:
@@ -2,12 +2,12 @@ from datetime import datetime
 import json
 import time
 
+from gshock_api.commands import SetTime
 from gshock_api.exceptions import GShockIgnorableException
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Protocol
 from gshock_api.logger import logger
-from gshock_api.utils import to_compact_string, to_hex_string
 
 
 class TimeEncoderPure:
@@ -57,13 +57,7 @@ class TimeIOFunctional:
         """
         Purely generates the JSON request message.
         """
-        return json.dumps({
-            "action": "SET_TIME",
-            "value": {
-                "time": None if current_time is None else round(current_time),
-                "offset": offset,
-            },
-        })
+        return SetTime(current_time, offset).to_json()
 
     @staticmethod
     def prepare_watch_commands(message_json: str, system_time: float) -> list[BLEAction]:
@@ -72,11 +66,15 @@ class TimeIOFunctional:
         Given a request message and a deterministic system time, it returns
         an immutable list of actions to be executed.
         """
-        data: dict[str, object] = json.loads(message_json)
-        value: dict[str, object] = data.get("value", {})
+        return TimeIOFunctional.prepare_set_time(
+            SetTime.from_dict(json.loads(message_json)), system_time
+        )
 
-        timestamp: float | None = value.get("time")  # type: ignore
-        offset: int = int(value.get("offset", 0))      # type: ignore
+    @staticmethod
+    def prepare_set_time(command: SetTime, system_time: float) -> list[BLEAction]:
+        """Same as prepare_watch_commands, for an already parsed command."""
+        timestamp: float | None = command.time
+        offset: int = command.offset
 
         if timestamp is None:
             timestamp = system_time
@@ -94,39 +92,40 @@ class TimeIOFunctional:
 
 class TimeIO:
     """
-    Stateful adapter wrapper maintaining backward compatibility.
+    Adapter wrapper maintaining backward compatibility.
     Acts as the interpreter for the pure commands.
     """
 
-    connection: ConnectionProtocol | None = None
-
     @staticmethod
     async def request(connection: ConnectionProtocol, current_time: float | None, offset: int) -> None:
-        TimeIO.connection = connection
-        message_str = TimeIOFunctional.generate_request_message(current_time, offset)
-        await connection.send_message(message_str)
+        await connection.send_message(SetTime(current_time, offset))
 
     @staticmethod
-    async def send_to_watch_set(message: str) -> None:
-        # Obtain system time at invocation to pass into the pure command generator
-        system_time = time.time()
-        commands = TimeIOFunctional.prepare_watch_commands(message, system_time)
-        
-        if TimeIO.connection is None:
-            raise RuntimeError("TimeIO.connection is not set")
-            
+    async def send_to_watch_set(connection: ConnectionProtocol, message: SetTime) -> None:
+        # Encode the time at which the packet will reach the watch, not the time it is built
+        link_delay = connection.latency.one_way_delay() if connection.latency is not None else 0.0
+        scheduler = connection.time_scheduler if message.time is None else None
+
+        if scheduler is not None:
+            # Prepare the packet for the next whole second, release it on the deadline
+            system_time, deadline = scheduler.plan(link_delay)
+            commands = TimeIOFunctional.prepare_set_time(message, system_time)
+            release_error = await scheduler.wait_until(deadline)
+        else:
+            logger.debug(f"TimeIO: compensating {link_delay * 1000:.1f}ms link delay")
+            commands = TimeIOFunctional.prepare_set_time(message, time.time() + link_delay)
+
         for command in commands:
             if isinstance(command, Write):
-                time_command: str = to_hex_string(command.data)
                 try:
-                    await TimeIO.connection.write(
-                        command.handle, 
-                        to_compact_string(time_command)
-                    )
+                    await connection.write(command.handle, command.data)
                 except GShockIgnorableException as e:
                     # Ignore if the connection is closed early (lower-right button pressed)
                     logger.info(f"Ignoring {e}")
 
+        if scheduler is not None:
+            scheduler.record(system_time, link_delay, release_error)
+
 
 class TimeEncoder:
     """
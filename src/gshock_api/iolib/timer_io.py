@@ -1,11 +1,10 @@
 import json
 
-from gshock_api.cancelable_result import CancelableResult
+from gshock_api.commands import GetTimer, SetTimer
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Protocol
-from gshock_api.utils import to_compact_string, to_hex_string
-from gshock_api.watch_info import watch_info, WatchModel
+from gshock_api.watch_info import WatchModel
 
 
 class TimerIOFunctional:
@@ -46,9 +45,11 @@ class TimerIOFunctional:
 
     @staticmethod
     def prepare_watch_commands_set(message_json: str) -> list[BLEAction]:
-        data_obj = json.loads(message_json)
-        seconds = int(data_obj.get("value", 0))
-        encoded = TimerIOFunctional.encode(seconds)
+        return TimerIOFunctional.prepare_set_timer(SetTimer.from_dict(json.loads(message_json)))
+
+    @staticmethod
+    def prepare_set_timer(command: SetTimer) -> list[BLEAction]:
+        encoded = TimerIOFunctional.encode(command.seconds)
         return [Write(handle=0x000E, data=encoded)]
 
     @staticmethod
@@ -63,52 +64,51 @@ class TimerIOFunctional:
 
     @staticmethod
     def prepare_watch_commands_set_mtg_b3000(message_json: str) -> list[BLEAction]:
-        data_obj = json.loads(message_json)
-        seconds = int(data_obj.get("value", 0))
-        encoded = TimerIOFunctional.encode_mtg_b3000(seconds)
+        return TimerIOFunctional.prepare_set_timer_mtg_b3000(
+            SetTimer.from_dict(json.loads(message_json))
+        )
+
+    @staticmethod
+    def prepare_set_timer_mtg_b3000(command: SetTimer) -> list[BLEAction]:
+        encoded = TimerIOFunctional.encode_mtg_b3000(command.seconds)
         return [Write(handle=0x000E, data=encoded)]
 
 
 class TimerIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for TimerIOFunctional commands.
+    Pending results live in the connection's request registry.
     """
-    result: CancelableResult | None = None
-    connection: ConnectionProtocol | None = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol) -> CancelableResult:
-        TimerIO.connection = connection
-        await connection.request(f"{Protocol.TIMER.value:02X}")
-        TimerIO.result = CancelableResult()
-        return await TimerIO.result.get_result()
+    async def request(connection: ConnectionProtocol) -> int:
+        pending = connection.pending.register(Protocol.TIMER.value)
+        try:
+            await connection.request(bytes([Protocol.TIMER.value]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
-    async def send_to_watch(connection: ConnectionProtocol) -> None:
+    async def send_to_watch(connection: ConnectionProtocol, _command: GetTimer | None = None) -> None:
         commands = TimerIOFunctional.prepare_watch_commands()
         for command in commands:
             if isinstance(command, Write):
                 await connection.write(command.handle, command.data)
 
     @staticmethod
-    async def send_to_watch_set(data: str) -> None:
-        if TimerIO.connection is None:
-            raise RuntimeError("TimerIO.connection is not set")
-
-        if watch_info.model == WatchModel.MTG_B3000:
-            commands = TimerIOFunctional.prepare_watch_commands_set_mtg_b3000(data)
+    async def send_to_watch_set(connection: ConnectionProtocol, message: SetTimer) -> None:
+        if connection.watch_info.model == WatchModel.MTG_B3000:
+            commands = TimerIOFunctional.prepare_set_timer_mtg_b3000(message)
         else:
-            commands = TimerIOFunctional.prepare_watch_commands_set(data)
+            commands = TimerIOFunctional.prepare_set_timer(message)
 
         for command in commands:
             if isinstance(command, Write):
-                seconds_as_compact_str = to_compact_string(to_hex_string(command.data))
-                await TimerIO.connection.write(0x000E, seconds_as_compact_str)
+                await connection.write(0x000E, command.data)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
         decoded = TimerIOFunctional.decode(data)
-        if TimerIO.result is None:
-            raise RuntimeError("TimerIO.result is not set")
-        TimerIO.result.set_result(decoded)
+        connection.pending.resolve(Protocol.TIMER.value, None, decoded)
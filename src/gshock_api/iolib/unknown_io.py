@@ -1,7 +1,8 @@
+from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.logger import logger
 
 
 class UnknownIO:
     @staticmethod
-    def on_received(message: bytes) -> None:
+    def on_received(message: bytes, connection: ConnectionProtocol) -> None:  # noqa: ARG004
         logger.info(f"UnknownIO onReceived: {message}")
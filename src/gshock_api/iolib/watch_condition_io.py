@@ -1,10 +1,9 @@
 from typing import TypedDict
 
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Header, Payload, Protocol
-from gshock_api.watch_info import watch_info
+from gshock_api.watch_info import WatchInfo, watch_info
 
 
 class WatchConditionValue(TypedDict):
@@ -18,7 +17,7 @@ class WatchConditionIOFunctional:
     """
 
     @staticmethod
-    def decode(data_bytes: bytes) -> WatchConditionValue:
+    def decode(data_bytes: bytes, info: WatchInfo | None = None) -> WatchConditionValue:
         min_bytes_len = 3
         if len(data_bytes) < min_bytes_len:
             return {"battery_level_percent": 0, "temperature": 0}
@@ -35,8 +34,10 @@ class WatchConditionIOFunctional:
 
         min_payload_len = 2
         if len(bytes_data) >= min_payload_len:
-            battery_level_lower_limit = watch_info.batteryLevelLowerLimit
-            battery_level_upper_limit = watch_info.batteryLevelUpperLimit
+            if info is None:
+                info = watch_info
+            battery_level_lower_limit = info.batteryLevelLowerLimit
+            battery_level_upper_limit = info.batteryLevelUpperLimit
 
             multiplier = round(
                 100.0 / (battery_level_upper_limit - battery_level_lower_limit)
@@ -63,18 +64,19 @@ class WatchConditionIOFunctional:
 
 class WatchConditionIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for WatchConditionIOFunctional commands.
+    Pending results live in the connection's request registry.
     """
-    result: CancelableResult | None = None
-    connection: ConnectionProtocol | None = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol, request_cmd: str = "28") -> CancelableResult[dict[str, int]]:
-        WatchConditionIO.connection = connection
-        await connection.request(request_cmd)
-        WatchConditionIO.result = CancelableResult[dict[str, int]]()
-        return await WatchConditionIO.result.get_result()
+    async def request(connection: ConnectionProtocol, request_cmd: str = "28") -> WatchConditionValue:
+        pending = connection.pending.register(Protocol.WATCH_CONDITION.value)
+        try:
+            await connection.request(request_cmd)
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
     async def send_to_watch(connection: ConnectionProtocol) -> None:
@@ -84,8 +86,6 @@ class WatchConditionIO:
                 await connection.write(command.handle, command.data)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
-        decoded = WatchConditionIOFunctional.decode(data)
-        if WatchConditionIO.result is None:
-            raise RuntimeError("WatchConditionIO.result is not set")
-        WatchConditionIO.result.set_result(decoded)  # type: ignore[arg-type]
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
+        decoded = WatchConditionIOFunctional.decode(data, connection.watch_info)
+        connection.pending.resolve(Protocol.WATCH_CONDITION.value, None, decoded)
@@ -1,8 +1,7 @@
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Protocol
-from gshock_api.utils import clean_str, to_ascii_string, to_hex_string
+from gshock_api.utils import clean_str
 
 
 class WatchNameIOFunctional:
@@ -12,9 +11,7 @@ class WatchNameIOFunctional:
 
     @staticmethod
     def decode(data_bytes: bytes) -> str:
-        hex_str = to_hex_string(data_bytes)
-        ascii_str = to_ascii_string(hex_str, 1)
-        return clean_str(ascii_str)
+        return clean_str(bytes(data_bytes[1:]).decode("ascii"))
 
     @staticmethod
     def prepare_watch_commands() -> list[BLEAction]:
@@ -28,25 +25,24 @@ class WatchNameIOFunctional:
 
 class WatchNameIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for WatchNameIOFunctional commands.
+    Pending results live in the connection's request registry.
     """
-    result: CancelableResult | None = None
-    connection: ConnectionProtocol | None = None
 
     @staticmethod
     async def request(connection: ConnectionProtocol) -> str | None:
-        WatchNameIO.connection = connection
-        await connection.request(f"{Protocol.WATCH_NAME.value:02X}")
-        WatchNameIO.result = CancelableResult[str]()
-        return await WatchNameIO.result.get_result()
+        pending = connection.pending.register(Protocol.WATCH_NAME.value)
+        try:
+            await connection.request(bytes([Protocol.WATCH_NAME.value]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
         clean_data = WatchNameIOFunctional.decode(data)
-        if WatchNameIO.result is None:
-            raise RuntimeError("WatchNameIO.result is not set")
-        WatchNameIO.result.set_result(clean_data)
+        connection.pending.resolve(Protocol.WATCH_NAME.value, None, clean_data)
 
     @staticmethod
     async def send_to_watch() -> None:
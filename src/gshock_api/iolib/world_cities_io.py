@@ -1,7 +1,7 @@
-from gshock_api.cancelable_result import CancelableResult
 from gshock_api.iolib.actions import BLEAction, Write
 from gshock_api.iolib.connection_protocol import ConnectionProtocol
 from gshock_api.iolib.packet import Protocol
+from gshock_api.logger import Hex, logger
 
 
 class WorldCitiesIOFunctional:
@@ -21,20 +21,19 @@ class WorldCitiesIOFunctional:
 
 class WorldCitiesIO:
     """
-    Stateful backward-compatible wrapper.
+    Backward-compatible wrapper.
     Acts as the interpreter for WorldCitiesIOFunctional commands.
+    Pending results live in the connection's request registry.
     """
-    result: CancelableResult[bytes] | None = None
-    connection: ConnectionProtocol | None = None
 
     @staticmethod
-    async def request(connection: ConnectionProtocol, city_number: int) -> CancelableResult[bytes]:
-        WorldCitiesIO.connection = connection
-        key = f"{Protocol.WORLD_CITIES.value:02X}0{city_number}"
-        await connection.request(key)
-
-        WorldCitiesIO.result = CancelableResult[bytes]()
-        return await WorldCitiesIO.result.get_result()
+    async def request(connection: ConnectionProtocol, city_number: int) -> bytes:
+        pending = connection.pending.register(Protocol.WORLD_CITIES.value, city_number)
+        try:
+            await connection.request(bytes([Protocol.WORLD_CITIES.value, city_number]))
+            return await pending.get_result()  # type: ignore[return-value]
+        finally:
+            connection.pending.discard(pending)
 
     @staticmethod
     async def send_to_watch(connection: ConnectionProtocol) -> None:
@@ -44,7 +43,7 @@ class WorldCitiesIO:
                 await connection.write(command.handle, command.data)
 
     @staticmethod
-    def on_received(data: bytes) -> None:
-        if WorldCitiesIO.result is None:
-            raise RuntimeError("WorldCitiesIO.result is not set")
-        WorldCitiesIO.result.set_result(data)
+    def on_received(data: bytes, connection: ConnectionProtocol) -> None:
+        key = Protocol.WORLD_CITIES.value
+        if not connection.pending.resolve(key, connection.pending.sub_index_of(data), data):
+            logger.debug("WorldCitiesIO: no pending request for %s", Hex(data))
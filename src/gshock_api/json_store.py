@@ -0,0 +1,47 @@
+"""
+One JSON object kept in a file, for the small caches that survive restarts
+(SnapshotCache, GattCache).
+
+Saving writes a temporary file and moves it over the old one, so a crash
+never leaves half a cache behind. A file that cannot be read or decoded is
+logged and treated as empty.
+"""
+
+from collections.abc import Callable, Mapping
+import json
+from pathlib import Path
+from typing import Any
+
+from gshock_api.logger import logger
+
+
+class JsonStore:
+    """
+    Loads and saves one JSON object at path.
+
+    With path=None nothing is read or written, so the owner lives in memory only.
+    """
+
+    def __init__(self, path: Path | str | None, name: str) -> None:
+        self.path: Path | None = Path(path) if path is not None else None
+        self.name = name  # used in log messages, e.g. "GATT cache"
+
+    def load(self, decode: Callable[[dict[str, Any]], None]) -> None:
+        """Hands the stored object to decode. Errors raised by decode count as an unreadable file."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            decode(json.loads(self.path.read_text()))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable {self.name} {self.path}: {e}")
+
+    def save(self, data: Mapping[str, object]) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=1))
+            tmp.replace(self.path)
+        except OSError as e:
+            logger.warning(f"Could not save {self.name} {self.path}: {e}")
@@ -0,0 +1,42 @@
+"""
+Rolling estimate of the GATT write round trip on one connection.
+
+Every write-with-response is timed from the call until the watch's ATT write
+response arrives. As in NTP's clock filter, the estimate is the smallest
+round trip among the last few samples: queueing in the adapter or the host
+only ever adds delay, so the fastest recent exchange is the closest to the
+true link delay, while the window still follows changes in adapter or load.
+Half of it is taken as the one-way delay, i.e. how long after a write is
+started its packet lands on the watch.
+"""
+
+from collections import deque
+import statistics
+from typing import Final
+
+DEFAULT_WINDOW: Final[int] = 8
+
+# Round trips longer than this are stalls (retransmits, reconnects), not link delay
+MAX_ROUND_TRIP: Final[float] = 2.0
+
+
+class RoundTripEstimator:
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def add(self, round_trip: float) -> None:
+        if 0.0 <= round_trip <= MAX_ROUND_TRIP:
+            self.samples.append(round_trip)
+
+    def round_trip(self) -> float | None:
+        """Filtered round trip in seconds, or None before the first sample."""
+        return min(self.samples) if self.samples else None
+
+    def one_way_delay(self) -> float:
+        """Seconds from starting a write until it reaches the watch; 0 when unmeasured."""
+        round_trip = self.round_trip()
+        return 0.0 if round_trip is None else round_trip / 2
+
+    def jitter(self) -> float:
+        """Spread of the samples in the window, in seconds."""
+        return statistics.pstdev(self.samples) if len(self.samples) > 1 else 0.0
@@ -1,19 +1,68 @@
+from collections import deque
 import logging
+import time
 from typing import Final
 
 LogLevel: Final[int] = int
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
+DEFAULT_FLIGHT_RECORDER_SIZE: Final[int] = 256
+
+
+class Hex:
+    """Defers bytes.hex() until a message is actually emitted: logger.debug("got %s", Hex(data))."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes | bytearray | memoryview) -> None:
+        self.data = data
+
+    def __str__(self) -> str:
+        return bytes(self.data).hex()
+
+
+class FlightRecorder:
+    """
+    Ring buffer of the last raw BLE frames, kept in memory at any log level
+    and written to the log only when an error is logged.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_FLIGHT_RECORDER_SIZE) -> None:
+        # (monotonic time, "tx"/"rx", handle, data)
+        self.frames: deque[tuple[float, str, int, bytes]] = deque(maxlen=capacity)
+
+    def record(self, direction: str, handle: int, data: bytes) -> None:
+        self.frames.append((time.monotonic(), direction, handle, data))
+
+    def dump(self) -> list[str]:
+        if not self.frames:
+            return []
+        last = self.frames[-1][0]
+        return [
+            f"{at - last:+.3f}s {direction} 0x{handle:02X} {data.hex()}"
+            for at, direction, handle, data in self.frames
+        ]
+
+    def clear(self) -> None:
+        self.frames.clear()
+
 
 class Logger:
     """
     A simple wrapper around the standard Python logging module for consistent configuration.
+
+    Messages are only built when their level is enabled. Several arguments are
+    joined like print() does, unless the first one contains "%", in which case
+    they are %-style arguments formatted by logging itself:
+
+        logger.debug("accumulated %d/%d B", received, expected)
     """
     DEFAULT_LOG_LEVEL: Final[LogLevel] = logging.INFO
 
     def __init__(self, log_level: LogLevel = DEFAULT_LOG_LEVEL) -> None:
         self.log_level = log_level
+        self.flight_recorder: FlightRecorder | None = None
 
         logging.basicConfig(
             level=self.log_level,
@@ -25,22 +74,53 @@ class Logger:
         """Join args like print() does."""
         return " ".join(str(a) for a in args)
 
+    def _log(self, level: int, args: tuple[object, ...]) -> None:
+        if not _logger.isEnabledFor(level):
+            return
+        if len(args) > 1 and isinstance(args[0], str) and "%" in args[0]:
+            _logger.log(level, args[0], *args[1:])
+        elif len(args) == 1 and isinstance(args[0], str):
+            _logger.log(level, "%s", args[0])
+        else:
+            _logger.log(level, "%s", self._join(*args))
+
+    def is_enabled_for(self, level: LogLevel) -> bool:
+        return _logger.isEnabledFor(level)
+
+    # Flight recorder -----------
+
+    def enable_flight_recorder(self, capacity: int = DEFAULT_FLIGHT_RECORDER_SIZE) -> FlightRecorder:
+        self.flight_recorder = FlightRecorder(capacity)
+        return self.flight_recorder
+
+    def disable_flight_recorder(self) -> None:
+        self.flight_recorder = None
+
+    def frame(self, direction: str, handle: int, data: bytes) -> None:
+        """Records a raw BLE frame if the flight recorder is on; otherwise does nothing."""
+        if self.flight_recorder is not None:
+            self.flight_recorder.record(direction, handle, data)
+
     # Logging methods -----------
 
     def error(self, *args: object) -> None:
-        _logger.error(self._join(*args))
+        self._log(logging.ERROR, args)
+        if self.flight_recorder is not None and self.flight_recorder.frames:
+            lines = self.flight_recorder.dump()
+            _logger.error("Last %d BLE frames:\n%s", len(lines), "\n".join(lines))
+            self.flight_recorder.clear()
 
     def info(self, *args: object) -> None:
-        _logger.info(self._join(*args))
+        self._log(logging.INFO, args)
 
     def debug(self, *args: object) -> None:
-        _logger.debug(self._join(*args))
+        self._log(logging.DEBUG, args)
 
     def warn(self, *args: object) -> None:
-        _logger.warning(self._join(*args))
+        self._log(logging.WARNING, args)
 
     def warning(self, *args: object) -> None:
-        _logger.warning(self._join(*args))
+        self._log(logging.WARNING, args)
 
 
 logger: Logger = Logger()
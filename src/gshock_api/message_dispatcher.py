@@ -1,116 +1,188 @@
-from collections.abc import Callable, Coroutine, Mapping
-import json
+from collections.abc import Callable, Coroutine, Iterator, Mapping
+import importlib
 import typing
-from typing import Final
+from typing import Final, TypeVar
 
+from gshock_api import commands
 from gshock_api.casio_constants import CasioConstants
-from gshock_api.iolib.alarms_io import AlarmsIO
-from gshock_api.iolib.app_info_io import AppInfoIO
-from gshock_api.iolib.button_pressed_io import ButtonPressedIO
-from gshock_api.iolib.dst_for_world_cities_io import DstForWorldCitiesIO
-from gshock_api.iolib.dst_watch_state_io import DstWatchStateIO
-from gshock_api.iolib.error_io import ErrorIO
-from gshock_api.iolib.events_io import EventsIO
-from gshock_api.iolib.gw_bx5600_time_io import GwBx5600TimeIO
-from gshock_api.iolib.home_time_io import HomeTimeIO
-from gshock_api.iolib.settings_io import SettingsIO
-from gshock_api.iolib.step_counter_io import StepCounterIO
-from gshock_api.iolib.time_adjustment_io import TimeAdjustmentIO
-from gshock_api.iolib.time_io import TimeIO
-from gshock_api.iolib.timer_io import TimerIO
-from gshock_api.iolib.unknown_io import UnknownIO
-from gshock_api.iolib.watch_condition_io import WatchConditionIO
-from gshock_api.iolib.watch_name_io import WatchNameIO
-from gshock_api.iolib.world_cities_io import WorldCitiesIO
-from gshock_api.logger import logger
+from gshock_api.commands import WatchCommand
+from gshock_api.iolib.connection_protocol import ConnectionProtocol
+from gshock_api.logger import Hex, logger
 
 CHARACTERISTICS: Final[Mapping[str, int]] = CasioConstants.CHARACTERISTICS
 
-SendToWatchFunction = Callable[[str], Coroutine[object, object, None]]
-OnReceivedFunction = Callable[[bytes], None]
+SendToWatchFunction = Callable[[ConnectionProtocol, typing.Any], Coroutine[object, object, None]]
+OnReceivedFunction = Callable[[bytes, ConnectionProtocol], None]
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+# IO classes by name and the gshock_api.iolib module defining them. They are
+# imported on first use, so importing this module does not load every IO handler.
+IO_MODULES: Final[dict[str, str]] = {
+    "AlarmsIO": "alarms_io",
+    "AppInfoIO": "app_info_io",
+    "ButtonPressedIO": "button_pressed_io",
+    "DstForWorldCitiesIO": "dst_for_world_cities_io",
+    "DstWatchStateIO": "dst_watch_state_io",
+    "ErrorIO": "error_io",
+    "EventsIO": "events_io",
+    "GwBx5600TimeIO": "gw_bx5600_time_io",
+    "HomeTimeIO": "home_time_io",
+    "SettingsIO": "settings_io",
+    "StepCounterIO": "step_counter_io",
+    "TimeAdjustmentIO": "time_adjustment_io",
+    "TimeIO": "time_io",
+    "TimerIO": "timer_io",
+    "UnknownIO": "unknown_io",
+    "WatchConditionIO": "watch_condition_io",
+    "WatchNameIO": "watch_name_io",
+    "WorldCitiesIO": "world_cities_io",
+}
+
+
+def __getattr__(name: str) -> type:
+    """Imports IO classes on first access, e.g. message_dispatcher.TimeIO."""
+    module = IO_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    io_class = getattr(importlib.import_module(f"gshock_api.iolib.{module}"), name)
+    globals()[name] = io_class
+    return io_class
+
+
+def _resolve(target: str) -> Callable[..., object]:
+    """Resolves "ClassIO.method" to the method, importing the IO class if needed."""
+    class_name, method = target.split(".")
+    return getattr(__getattr__(class_name), method)
+
+
+class LazyHandlers(Mapping[K, V]):
+    """
+    Read-only mapping of keys to "ClassIO.method" targets, resolved and cached
+    on first lookup. Membership tests and len() import nothing.
+    """
+
+    def __init__(self, targets: Mapping[K, str]) -> None:
+        self._targets = dict(targets)
+        self._resolved: dict[K, V] = {}
+
+    def __getitem__(self, key: K) -> V:
+        handler = self._resolved.get(key)
+        if handler is None:
+            handler = self._resolved[key] = typing.cast("V", _resolve(self._targets[key]))
+        return handler
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._targets
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._targets)
+
+    def __len__(self) -> int:
+        return len(self._targets)
 
 
 class MessageDispatcher:
     """Dispatches high-level action messages to specific I/O handlers and routes
     received characteristic data to the correct handler using WatchProtocol."""
 
-    watch_senders: typing.ClassVar[dict[str, SendToWatchFunction]] = {
-        "GET_ALARMS": AlarmsIO.send_to_watch,
-        "SET_ALARMS": AlarmsIO.send_to_watch_set,
-        "SET_REMINDERS": EventsIO.send_to_watch_set,
-        "GET_SETTINGS": SettingsIO.send_to_watch,
-        "SET_SETTINGS": SettingsIO.send_to_watch_set,
-        "GET_TIME_ADJUSTMENT": TimeAdjustmentIO.send_to_watch,
-        "SET_TIME_ADJUSTMENT": TimeAdjustmentIO.send_to_watch_set,
-        "GET_TIMER": TimerIO.send_to_watch,
-        "SET_TIMER": TimerIO.send_to_watch_set,
-        "SET_TIME": TimeIO.send_to_watch_set,
-        "GET_HOME_TIME": HomeTimeIO.send_to_watch,
-    }
-
-    data_received_messages: typing.ClassVar[dict[int, OnReceivedFunction]] = {
-        CHARACTERISTICS["CASIO_SETTING_FOR_ALM"]: AlarmsIO.on_received,
-        CHARACTERISTICS["CASIO_SETTING_FOR_ALM2"]: AlarmsIO.on_received,
-        CHARACTERISTICS["CASIO_TIMER"]: TimerIO.on_received,
-        CHARACTERISTICS["CASIO_WATCH_NAME"]: WatchNameIO.on_received,
-        CHARACTERISTICS["CASIO_DST_SETTING"]: DstForWorldCitiesIO.on_received,
-        CHARACTERISTICS["CASIO_REMINDER_TIME"]: EventsIO.on_received,
-        CHARACTERISTICS["CASIO_REMINDER_TITLE"]: EventsIO.on_received_title,
-        CHARACTERISTICS["CASIO_WORLD_CITIES"]: WorldCitiesIO.on_received,
-        CHARACTERISTICS["CASIO_DST_WATCH_STATE"]: DstWatchStateIO.on_received,
-        CHARACTERISTICS["CASIO_WATCH_CONDITION"]: WatchConditionIO.on_received,
-        CHARACTERISTICS["CASIO_APP_INFORMATION"]: AppInfoIO.on_received,
-        CHARACTERISTICS["CASIO_BLE_FEATURES"]: ButtonPressedIO.on_received,
-        CHARACTERISTICS["CASIO_SETTING_FOR_BASIC"]: SettingsIO.on_received,
-        CHARACTERISTICS["CASIO_SETTING_FOR_BLE"]: TimeAdjustmentIO.on_received,
-        CHARACTERISTICS["ERROR"]: ErrorIO.on_received,
-        CHARACTERISTICS["UNKNOWN"]: UnknownIO.on_received,
-        CHARACTERISTICS["CMD_SET_TIMEMODE"]: UnknownIO.on_received,
-        CHARACTERISTICS["FIND_PHONE"]: UnknownIO.on_received,
-        CHARACTERISTICS["CASIO_ACTIVITY_RECORD"]: StepCounterIO.on_received,
-        CHARACTERISTICS["GW_BX5600_SP_DATA_HEADER_03"]: GwBx5600TimeIO.on_received,
-        CHARACTERISTICS["GW_BX5600_SP_DATA_HEADER_05"]: GwBx5600TimeIO.on_received,
-        CHARACTERISTICS["GW_BX5600_SP_DATA_HEADER_06"]: GwBx5600TimeIO.on_received,
-        CHARACTERISTICS["CASIO_HOME_TIME"]: HomeTimeIO.on_received,
-    }
+    watch_senders: typing.ClassVar[Mapping[type[WatchCommand], SendToWatchFunction]] = LazyHandlers({
+        commands.GetAlarms: "AlarmsIO.send_to_watch",
+        commands.SetAlarms: "AlarmsIO.send_to_watch_set",
+        commands.SetReminders: "EventsIO.send_to_watch_set",
+        commands.GetSettings: "SettingsIO.send_to_watch",
+        commands.SetSettings: "SettingsIO.send_to_watch_set",
+        commands.GetTimeAdjustment: "TimeAdjustmentIO.send_to_watch",
+        commands.SetTimeAdjustment: "TimeAdjustmentIO.send_to_watch_set",
+        commands.GetTimer: "TimerIO.send_to_watch",
+        commands.SetTimer: "TimerIO.send_to_watch_set",
+        commands.SetTime: "TimeIO.send_to_watch_set",
+        commands.GetHomeTime: "HomeTimeIO.send_to_watch",
+    })
+
+    data_received_messages: typing.ClassVar[Mapping[int, OnReceivedFunction]] = LazyHandlers({
+        CHARACTERISTICS["CASIO_SETTING_FOR_ALM"]: "AlarmsIO.on_received",
+        CHARACTERISTICS["CASIO_SETTING_FOR_ALM2"]: "AlarmsIO.on_received",
+        CHARACTERISTICS["CASIO_TIMER"]: "TimerIO.on_received",
+        CHARACTERISTICS["CASIO_WATCH_NAME"]: "WatchNameIO.on_received",
+        CHARACTERISTICS["CASIO_DST_SETTING"]: "DstForWorldCitiesIO.on_received",
+        CHARACTERISTICS["CASIO_REMINDER_TIME"]: "EventsIO.on_received",
+        CHARACTERISTICS["CASIO_REMINDER_TITLE"]: "EventsIO.on_received_title",
+        CHARACTERISTICS["CASIO_WORLD_CITIES"]: "WorldCitiesIO.on_received",
+        CHARACTERISTICS["CASIO_DST_WATCH_STATE"]: "DstWatchStateIO.on_received",
+        CHARACTERISTICS["CASIO_WATCH_CONDITION"]: "WatchConditionIO.on_received",
+        CHARACTERISTICS["CASIO_APP_INFORMATION"]: "AppInfoIO.on_received",
+        CHARACTERISTICS["CASIO_BLE_FEATURES"]: "ButtonPressedIO.on_received",
+        CHARACTERISTICS["CASIO_SETTING_FOR_BASIC"]: "SettingsIO.on_received",
+        CHARACTERISTICS["CASIO_SETTING_FOR_BLE"]: "TimeAdjustmentIO.on_received",
+        CHARACTERISTICS["ERROR"]: "ErrorIO.on_received",
+        CHARACTERISTICS["UNKNOWN"]: "UnknownIO.on_received",
+        CHARACTERISTICS["CMD_SET_TIMEMODE"]: "UnknownIO.on_received",
+        CHARACTERISTICS["FIND_PHONE"]: "UnknownIO.on_received",
+        CHARACTERISTICS["CASIO_ACTIVITY_RECORD"]: "StepCounterIO.on_received",
+        CHARACTERISTICS["CASIO_DRSP_START"]: "StepCounterIO.on_drsp_received",
+        CHARACTERISTICS["CASIO_DRSP_END"]: "StepCounterIO.on_drsp_received",
+        CHARACTERISTICS["GW_BX5600_SP_DATA_HEADER_03"]: "GwBx5600TimeIO.on_received",
+        CHARACTERISTICS["GW_BX5600_SP_DATA_HEADER_05"]: "GwBx5600TimeIO.on_received",
+        CHARACTERISTICS["GW_BX5600_SP_DATA_HEADER_06"]: "GwBx5600TimeIO.on_received",
+        CHARACTERISTICS["CASIO_HOME_TIME"]: "HomeTimeIO.on_received",
+    })
 
     @staticmethod
-    async def send_to_watch(message: str) -> None:
-        """Parses a JSON string message and dispatches it to the appropriate sender function."""
-        try:
-            json_message: dict[str, object] = json.loads(message)
-        except json.JSONDecodeError:
-            logger.error(f"Failed to decode JSON message: {message}")
-            return
+    async def send_to_watch(message: WatchCommand | str, connection: ConnectionProtocol) -> None:
+        """
+        Dispatches a command to the sender registered for its type.
+        JSON strings from external callers are converted to commands first.
+        """
+        if isinstance(message, str):
+            try:
+                message = commands.from_json(message)
+            except (ValueError, TypeError) as e:
+                logger.error(f"Invalid message {message}: {e}")
+                return
 
-        action: object | None = json_message.get("action")
-        if not isinstance(action, str):
-            logger.error(f"Message has no valid 'action' key: {message}")
+        sender = MessageDispatcher.watch_senders.get(type(message))
+        if sender is None:
+            logger.error(f"Unknown command received: {message}")
             return
 
-        if action in MessageDispatcher.watch_senders:
-            await MessageDispatcher.watch_senders[action](message)
-        else:
-            logger.error(f"Unknown action received: {action}")
+        await sender(connection, message)
 
     @staticmethod
-    def on_received(data: bytes, protocol: typing.Any = None) -> None:
-        """Routes received characteristic data to the appropriate handler based on protocol key extraction."""
-        from gshock_api.watch_info import watch_info
+    def on_received(
+        data: bytes,
+        protocol: typing.Any = None,
+        connection: ConnectionProtocol | None = None,
+        handle: int | None = None,
+    ) -> None:
+        """
+        Routes received characteristic data to its handler through the protocol's dispatch table.
+        The handler resolves the matching request in the connection's pending registry.
+        handle is the ATT handle the notification arrived on, if the caller knows it.
+        """
+        if connection is None:
+            logger.info("Received data without a connection, dropping.")
+            return
 
         if not data:
             logger.info("Received empty data.")
             return
 
-        prot = protocol if protocol is not None else watch_info.protocol
-        key = prot.extract_key(data)
-        if key is None:
-            logger.info("Could not extract key from data.")
-            return
+        prot = protocol if protocol is not None else connection.watch_info.protocol
+
+        # Continuation fragments carry no key; they belong to the transfer in progress
+        transfer = connection.pending.receiving()
+        if transfer is not None and transfer.fragments is not None:
+            fragments = transfer.fragments
+            if handle is not None and fragments.handle is not None:
+                continues = handle == fragments.handle
+            else:
+                # Without handles, only a frame that doesn't start with a known key can be one
+                continues = prot.extract_key(data) not in prot.data_received_handlers
+            if continues:
+                fragments.handler(data, connection)
+                return
 
-        handlers = prot.data_received_handlers
-        if key not in handlers:
-            logger.info(f"Unknown characteristic key received: {key}")
-        else:
-            unwrapped_data = prot.unwrap_payload(data, key)
-            handlers[key](unwrapped_data)
+        if not prot.dispatch(data, connection):
+            logger.info("Unknown characteristic key received: %s", Hex(data[:5]))
@@ -0,0 +1,203 @@
+"""
+Prometheus metrics for gateways serving many watches.
+
+GatewayMetrics subscribes to an Instrumentation (see gshock_api.instrumentation)
+and turns its events into counters and histograms in the Prometheus text
+exposition format. They can be served over HTTP for scraping, or written
+periodically to a file for node_exporter's textfile collector:
+
+    instrumentation = Instrumentation()
+    metrics = GatewayMetrics(instrumentation)
+    server = await metrics.serve(port=9464)          # http://127.0.0.1:9464/metrics
+    await metrics.write_textfile_periodically("/var/lib/node_exporter/gshock.prom")
+"""
+
+import asyncio
+import bisect
+from collections.abc import Sequence
+import os
+from pathlib import Path
+from typing import Final
+
+from gshock_api.instrumentation import (
+    API,
+    CONNECT,
+    NOTIFICATION,
+    SCAN,
+    Instrumentation,
+    OperationEvent,
+)
+from gshock_api.logger import logger
+from gshock_api.message_dispatcher import MessageDispatcher
+
+# Seconds; BLE operations range from tens of milliseconds to the 10 s request timeout
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+DEFAULT_PORT: Final[int] = 9464
+DEFAULT_TEXTFILE_INTERVAL: Final[float] = 15.0
+
+Labels = tuple[tuple[str, str], ...]
+
+HELP: Final[dict[str, tuple[str, str]]] = {
+    "gshock_connections_total": ("counter", "Connection attempts by model and result."),
+    "gshock_reconnects_total": ("counter", "Successful connections to a watch that was connected before."),
+    "gshock_connect_seconds": ("histogram", "Time to connect and subscribe to a watch."),
+    "gshock_api_call_seconds": ("histogram", "Duration of GshockAPI calls."),
+    "gshock_time_set_seconds": ("histogram", "Duration of a complete time set."),
+    "gshock_notifications_total": ("counter", "Notifications received from watches."),
+    "gshock_timeouts_total": ("counter", "Requests the watch did not answer in time, by IO class."),
+    "gshock_scan_hits_total": ("counter", "Watches found by scanning."),
+}
+
+
+def io_class_for_key(key: int | None) -> str:
+    """Name of the IO class handling a protocol key, e.g. 0x1F -> "WorldCitiesIO"."""
+    handler = MessageDispatcher.data_received_messages.get(key) if key is not None else None
+    if handler is None:
+        return "unknown"
+    return handler.__qualname__.split(".")[0]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class BucketHistogram:
+    """Cumulative-bucket histogram as Prometheus expects it."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: Labels) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts, strict=True):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f"{name}_bucket{_format_labels((*labels, ('le', le)))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{_format_labels(labels)} {self.count}")
+        return lines
+
+
+class GatewayMetrics:
+    def __init__(
+        self,
+        instrumentation: Instrumentation | None = None,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = buckets
+        self.counters: dict[str, dict[Labels, float]] = {}
+        self.histograms: dict[str, dict[Labels, BucketHistogram]] = {}
+        self._connected_before: set[str] = set()
+        if instrumentation is not None:
+            instrumentation.subscribe(self.on_event)
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1) -> None:
+        series = self.counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        series = self.histograms.setdefault(name, {})
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = BucketHistogram(self.buckets)
+        histogram.observe(value)
+
+    def on_event(self, event: OperationEvent) -> None:
+        model = (("model", event.model),)
+        if event.kind == NOTIFICATION:
+            self.inc("gshock_notifications_total", model)
+        elif event.kind == SCAN:
+            self.inc("gshock_scan_hits_total", model)
+        elif event.kind == CONNECT:
+            self.inc("gshock_connections_total", (*model, ("result", "error" if event.error else "ok")))
+            self.observe("gshock_connect_seconds", model, event.duration)
+            if event.error is None and event.address is not None:
+                if event.address in self._connected_before:
+                    self.inc("gshock_reconnects_total", model)
+                self._connected_before.add(event.address)
+        elif event.kind == API:
+            self.observe("gshock_api_call_seconds", (*model, ("method", event.name)), event.duration)
+            if event.name == "set_time":
+                self.observe("gshock_time_set_seconds", model, event.duration)
+
+        if event.timed_out:
+            self.inc("gshock_timeouts_total", (*model, ("io", io_class_for_key(event.timeout_key))))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        for name, (metric_type, help_text) in HELP.items():
+            counters = self.counters.get(name, {})
+            histograms = self.histograms.get(name, {})
+            if not counters and not histograms:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in sorted(counters.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for labels, histogram in sorted(histograms.items()):
+                lines.extend(histogram.lines(name, labels))
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path | str) -> None:
+        """Writes the metrics atomically, so the collector never reads a partial file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render())
+        tmp.replace(path)
+
+    async def write_textfile_periodically(
+        self, path: Path | str, interval: float = DEFAULT_TEXTFILE_INTERVAL
+    ) -> None:
+        while True:
+            try:
+                self.write_textfile(path)
+            except OSError as e:
+                logger.warning(f"Could not write metrics to {path}: {e}")
+            await asyncio.sleep(interval)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.Server:
+        """Serves GET /metrics over plain HTTP/1.0 until the returned server is closed."""
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                request_line = await reader.readline()
+                while (await reader.readline()).strip():
+                    pass  # headers
+                method, _, rest = request_line.decode("latin-1").partition(" ")
+                target = rest.split(maxsplit=1)[0].partition("?")[0] if rest.strip() else ""
+                if method == "GET" and target == "/metrics":
+                    body = self.render().encode()
+                    status = "200 OK"
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    body, status, content_type = b"Not Found\n", "404 Not Found", "text/plain"
+                writer.write(
+                    f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
@@ -0,0 +1,127 @@
+"""
+Ingress stage between the BLE notification callback and the decoders.
+
+The bleak callback only copies the frame into a bounded queue; a consumer
+task on the same event loop dispatches frames in arrival order and yields
+between them, so a burst (e.g. a step-counter transfer) is decoded without
+holding up the BLE stack's reader. When the queue is full the policy
+decides what gives:
+
+  DECODE_INLINE  catch up in the callback: decode everything queued, then
+                 the new frame (backpressure on the reader, nothing is lost)
+  DROP_OLDEST    discard the oldest queued frame
+  DROP_NEWEST    discard the new frame
+
+Counters are kept in ``stats``.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Final, Generic, TypeVar
+
+from gshock_api.logger import logger
+
+DECODE_INLINE: Final[str] = "inline"
+DROP_OLDEST: Final[str] = "drop_oldest"
+DROP_NEWEST: Final[str] = "drop_newest"
+POLICIES: Final[frozenset[str]] = frozenset({DECODE_INLINE, DROP_OLDEST, DROP_NEWEST})
+
+# A 400-byte activity record in 20-byte fragments is 20 frames; leave plenty of room
+DEFAULT_CAPACITY: Final[int] = 256
+
+# What the callback queues, e.g. the frame bytes or (handle, bytes)
+Frame = TypeVar("Frame")
+
+
+@dataclass
+class IngressStats:
+    received: int = 0
+    dispatched: int = 0
+    dropped: int = 0
+    inline: int = 0  # frames dispatched in the callback because the queue was full
+    errors: int = 0  # frames whose handler raised
+    max_depth: int = 0
+
+
+class NotificationQueue(Generic[Frame]):  # noqa: UP046
+    def __init__(
+        self,
+        dispatch: Callable[[Frame], None],
+        capacity: int = DEFAULT_CAPACITY,
+        policy: str = DECODE_INLINE,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown notification queue policy: {policy}")
+        self.dispatch = dispatch
+        self.capacity = capacity
+        self.policy = policy
+        self.stats = IngressStats()
+        self._frames: deque[Frame] = deque()
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()  # set while nothing is queued
+        self._idle.set()
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def put(self, data: Frame) -> None:
+        """Called from the notification callback, on the event loop."""
+        stats = self.stats
+        stats.received += 1
+
+        if len(self._frames) >= self.capacity:
+            if self.policy == DROP_NEWEST:
+                stats.dropped += 1
+                return
+            if self.policy == DROP_OLDEST:
+                self._frames.popleft()
+                stats.dropped += 1
+            else:
+                while self._frames:
+                    self._dispatch(self._frames.popleft())
+                    stats.inline += 1
+                self._dispatch(data)
+                stats.inline += 1
+                self._idle.set()
+                return
+
+        self._frames.append(data)
+        self._idle.clear()
+        stats.max_depth = max(stats.max_depth, len(self._frames))
+        self._ready.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._consume())
+
+    async def drain(self) -> None:
+        """Waits until every queued frame has been dispatched."""
+        await self._idle.wait()
+
+    def close(self) -> None:
+        """Stops the consumer and discards queued frames."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._frames.clear()
+        self._ready.clear()
+        self._idle.set()
+
+    def _dispatch(self, data: Frame) -> None:
+        try:
+            self.dispatch(data)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Notification handler failed: {e}")
+        self.stats.dispatched += 1
+
+    async def _consume(self) -> None:
+        while True:
+            await self._ready.wait()
+            while self._frames:
+                self._dispatch(self._frames.popleft())
+                # Let the BLE reader run between frames of a burst
+                await asyncio.sleep(0)
+            self._ready.clear()
+            self._idle.set()
@@ -0,0 +1,175 @@
+from collections import deque
+from typing import TYPE_CHECKING, Final, Generic, TypeVar
+
+from gshock_api.cancelable_result import CancelableResult
+from gshock_api.exceptions import GShockConnectionError, GShockTimeoutError
+
+if TYPE_CHECKING:
+    from gshock_api.fragment_buffer import FragmentBuffer
+
+# Keys whose responses echo the requested slot in the second byte,
+# e.g. request "1F01" -> response "1F 01 ...".
+INDEXED_KEYS: Final[frozenset[int]] = frozenset({
+    0x1D,  # DST_WATCH_STATE
+    0x1E,  # DST_SETTING
+    0x1F,  # WORLD_CITIES
+    0x24,  # HOME_TIME (MTG-B3000)
+    0x30,  # REMINDER_TITLE
+    0x31,  # REMINDER_TIME
+})
+
+T = TypeVar("T")
+
+RequestKey = tuple[int, int | None]
+
+
+class PendingRequest(Generic[T]):  # noqa: UP046
+    """
+    A single in-flight request on one connection.
+
+    Holds the result the caller awaits, plus scratch space for handlers that
+    need to accumulate several notifications before resolving. Multi-packet
+    transfers attach a FragmentBuffer through PendingRequests.start_transfer.
+    """
+
+    def __init__(self, key: int, sub_index: int | None, timeout: float) -> None:
+        self.key = key
+        self.sub_index = sub_index
+        self.result: CancelableResult[T] = CancelableResult[T](timeout)
+        self.fragments: FragmentBuffer | None = None
+        self.context: dict[str, object] = {}
+
+    @property
+    def done(self) -> bool:
+        return self.result.done()
+
+    def set_result(self, value: T) -> None:
+        self.result.set_result(value)
+
+    async def get_result(self) -> T:
+        try:
+            return await self.result.get_result()
+        except GShockTimeoutError as e:
+            e.key = self.key
+            raise
+
+
+class PendingRequests:
+    """
+    Per-connection registry of in-flight requests keyed by (protocol key, sub-index).
+
+    Each ``Connection`` owns one registry. IO classes register a request before
+    writing to the watch, and ``MessageDispatcher.on_received`` resolves it via
+    the handler when the matching notification arrives. Requests with the same
+    key are served first-in, first-out.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[RequestKey, deque[PendingRequest[object]]] = {}
+        self._last_responses: dict[RequestKey, bytes] = {}
+        # At most one multi-packet transfer runs at a time
+        self._transfer: PendingRequest[object] | None = None
+
+    @staticmethod
+    def sub_index_of(data: bytes) -> int | None:
+        """Returns the slot index echoed in a response, or None for non-indexed keys."""
+        if len(data) > 1 and data[0] in INDEXED_KEYS:
+            return data[1]
+        return None
+
+    def register(
+        self, key: int, sub_index: int | None = None, timeout: float = 10.0
+    ) -> PendingRequest[object]:
+        entry = PendingRequest[object](key, sub_index, timeout)
+        self._entries.setdefault((key, sub_index), deque()).append(entry)
+        return entry
+
+    def lookup(self, key: int, sub_index: int | None = None) -> PendingRequest[object] | None:
+        """
+        Finds the oldest unresolved request for (key, sub_index).
+
+        If nothing is registered for that exact slot, falls back to the only
+        pending request for the key, so watches that don't echo the index
+        still resolve.
+        """
+        entry = self._first_open(self._entries.get((key, sub_index)))
+        if entry is not None:
+            return entry
+
+        candidates = [
+            e for (k, _), queue in self._entries.items() if k == key
+            for e in queue if not e.done
+        ]
+        return candidates[0] if len(candidates) == 1 else None
+
+    def resolve(self, key: int, sub_index: int | None, value: object) -> bool:
+        entry = self.lookup(key, sub_index)
+        if entry is None:
+            return False
+        entry.set_result(value)
+        return True
+
+    def start_transfer(self, entry: PendingRequest[object], fragments: "FragmentBuffer") -> None:
+        """Attaches fragments to entry and makes it the transfer that continuation frames go to."""
+        entry.fragments = fragments
+        self._transfer = entry
+
+    def receiving(self) -> PendingRequest[object] | None:
+        """
+        The request whose multi-packet transfer is under way, if any.
+
+        Called for every frame, so it only checks the current transfer; a
+        stale transfer is restarted by FragmentBuffer.feed.
+        """
+        entry = self._transfer
+        if entry is None:
+            return None
+        if entry.done:
+            self._transfer = None
+            return None
+        fragments = entry.fragments
+        if fragments is None or not fragments.started or fragments.complete:
+            return None
+        return entry
+
+    def discard(self, entry: PendingRequest[object]) -> None:
+        if entry is self._transfer:
+            self._transfer = None
+        queue = self._entries.get((entry.key, entry.sub_index))
+        if queue is None:
+            return
+        try:
+            queue.remove(entry)
+        except ValueError:
+            return
+        if not queue:
+            del self._entries[(entry.key, entry.sub_index)]
+
+    def fail_all(self, reason: str = "Connection closed") -> None:
+        """Fails every pending request, e.g. when the watch disconnects."""
+        for queue in self._entries.values():
+            for entry in queue:
+                entry.result.set_exception(GShockConnectionError(reason))
+        self._entries.clear()
+        self._transfer = None
+
+    def remember(self, key: int, sub_index: int | None, data: bytes) -> None:
+        """Stores the last raw response seen for a slot (e.g. for read-modify-write)."""
+        self._last_responses[(key, sub_index)] = bytes(data)
+
+    def recall(self, key: int, sub_index: int | None = None) -> bytes | None:
+        return self._last_responses.get((key, sub_index))
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._entries.values())
+
+    @staticmethod
+    def _first_open(
+        queue: deque[PendingRequest[object]] | None,
+    ) -> PendingRequest[object] | None:
+        if not queue:
+            return None
+        for entry in queue:
+            if not entry.done:
+                return entry
+        return None
@@ -1,11 +1,29 @@
-from gshock_api.protocols.analogue_protocol import AnalogueProtocol
-from gshock_api.protocols.mip_protocol import MipProtocol
-from gshock_api.protocols.standard_protocol import StandardProtocol
-from gshock_api.protocols.watch_protocol import WatchProtocol
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from gshock_api.protocols.analogue_protocol import AnalogueProtocol
+    from gshock_api.protocols.mip_protocol import MipProtocol
+    from gshock_api.protocols.standard_protocol import StandardProtocol
+    from gshock_api.protocols.watch_protocol import WatchProtocol
 
 __all__ = [
-    "WatchProtocol",
-    "StandardProtocol",
-    "MipProtocol",
     "AnalogueProtocol",
+    "MipProtocol",
+    "StandardProtocol",
+    "WatchProtocol",
 ]
+
+# The protocol modules pull in most of iolib, so each is imported on first access
+_MODULES = {
+    "WatchProtocol": "watch_protocol",
+    "StandardProtocol": "standard_protocol",
+    "MipProtocol": "mip_protocol",
+    "AnalogueProtocol": "analogue_protocol",
+}
+
+
+def __getattr__(name: str) -> type:
+    if name in _MODULES:
+        return getattr(importlib.import_module(f"{__name__}.{_MODULES[name]}"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
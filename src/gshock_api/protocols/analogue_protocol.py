@@ -1,11 +1,49 @@
-from typing import Any
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, Final
 
-from gshock_api.protocols.standard_protocol import StandardProtocol
+from gshock_api.protocols.standard_protocol import PreambleRead, Route, StandardProtocol
+
+if TYPE_CHECKING:
+    from gshock_api.iolib.connection_protocol import ConnectionProtocol
+    from gshock_api.protocols.standard_protocol import DispatchTable
+
+# Frames starting with WRAPPER carry another key: 28 00 xx <key> or 28 01 xx xx <key>
+WRAPPER: Final[int] = 0x28
+# Shortest frame treated as wrapped, as in extract_key
+MIN_WRAPPED_LENGTH: Final[int] = 5
 
 
 class AnalogueProtocol(StandardProtocol):
     """Protocol implementation for analogue G-Shock watches (e.g. MTG-B1000, MTG-B3000)."""
 
+    def __init__(self) -> None:
+        super().__init__()
+        # Second level for wrapped frames, indexed by data[1] (0 or 1) then by the inner
+        # key at 3 + data[1]. Unknown inner keys, and 0x28 itself, go to the 0x28 handler
+        # with the frame as is, like extract_key/unwrap_payload do.
+        self.wrapped_tables: tuple[DispatchTable, DispatchTable] = (
+            self.compile_dispatch_table(self.wrapped_route(0)),
+            self.compile_dispatch_table(self.wrapped_route(1)),
+        )
+
+    def wrapped_route(self, kind: int) -> Callable[[int], Route]:
+        def route(key: int) -> Route:
+            if key != WRAPPER and key in self.data_received_handlers:
+                return (3 + kind, key)
+            return self.plain_route(WRAPPER)
+
+        return route
+
+    def dispatch(self, data: bytes, connection: "ConnectionProtocol") -> bool:
+        if data[0] == WRAPPER and len(data) >= MIN_WRAPPED_LENGTH and data[1] <= 1:
+            entry = self.wrapped_tables[data[1]][data[3 + data[1]]]
+        else:
+            entry = self.dispatch_table[data[0]]
+        if entry is None:
+            return False
+        entry(data, connection)
+        return True
+
     def extract_key(self, data: bytes) -> int | None:
         if not data:
             return None
@@ -30,20 +68,25 @@ class AnalogueProtocol(StandardProtocol):
             return data[skip:]
         return data
 
+    def city_preamble(self, connection: "ConnectionProtocol") -> list[PreambleRead]:
+        from gshock_api import message_dispatcher
+
+        return [
+            (message_dispatcher.HomeTimeIO.request_raw, city_number)
+            for city_number in range(connection.watch_info.worldCitiesCount)
+        ]
+
     def get_watch_condition_request(self) -> str:
         return "280000"
 
     async def set_time(self, connection: Any, current_time: Any = None, offset: int = 0) -> None:
-        from gshock_api.iolib.second_dial_io import SecondDialIO
-        from gshock_api.watch_info import watch_info
         from gshock_api import message_dispatcher
+        from gshock_api.iolib.second_dial_io import SecondDialIO
 
-        await self.read_write_dst_watch_states(connection)
-        await self.read_write_dst_for_world_cities(connection)
-        await self.read_write_home_times(connection)
+        await self.initialize_for_setting_time(connection)
         await message_dispatcher.TimeIO.request(connection, current_time, offset)
 
-        if watch_info.hasSecondDial:
+        if connection.watch_info.hasSecondDial:
             await SecondDialIO.set_second_dial(connection)
 
     def get_timer_request(self) -> str:
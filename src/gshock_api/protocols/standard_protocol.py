@@ -1,20 +1,79 @@
-import json
-from typing import Any, Callable
+import asyncio
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Callable
+from gshock_api.commands import SetAlarms, SetReminders, SetSettings, SetTimeAdjustment, SetTimer
+from gshock_api.exceptions import GShockConnectionError
+from gshock_api.instrumentation import note_retry
 from gshock_api.iolib.dst_watch_state_io import DtsState
-from gshock_api.utils import to_compact_string, to_hex_string
+from gshock_api.logger import logger
 
-from gshock_api.protocols.watch_protocol import WatchProtocol
+from gshock_api.protocols.watch_protocol import DispatchEntry, WatchProtocol
+
+if TYPE_CHECKING:
+    from gshock_api.iolib.connection_protocol import ConnectionProtocol
 
 HANDLE_ALL_FEATURES = 0x0E
 
+# A read in the time-set preamble: (request function, slot), written back as-is.
+PreambleRead = tuple[Callable[[Any, Any], Any], Any]
+
+DispatchTable = list[DispatchEntry | None]
+# Where a table slot routes: (payload offset, handler key), or None for no handler
+Route = tuple[int, int] | None
+
+
 class StandardProtocol(WatchProtocol):
     """Standard protocol implementation for digital G-Shock watches."""
 
+    def __init__(self) -> None:
+        # Entry for every possible first byte, so dispatch is a single index.
+        # Handlers are resolved on a slot's first hit, so no IO module is imported here.
+        self.dispatch_table: DispatchTable = self.compile_dispatch_table(self.plain_route)
+
     @property
-    def data_received_handlers(self) -> dict[int, Callable[[bytes], None]]:
+    def data_received_handlers(self) -> Mapping[int, Callable[[bytes], None]]:
         from gshock_api.message_dispatcher import MessageDispatcher
         return MessageDispatcher.data_received_messages
 
+    def plain_route(self, key: int) -> Route:
+        return (0, key) if key in self.data_received_handlers else None
+
+    def compile_dispatch_table(self, route: Callable[[int], Route]) -> DispatchTable:
+        table: DispatchTable = [None] * 256
+        for index in range(256):
+            target = route(index)
+            if target is not None:
+                table[index] = self._lazy_entry(table, index, *target)
+        return table
+
+    def _lazy_entry(self, table: DispatchTable, index: int, offset: int, key: int) -> DispatchEntry:
+        """Entry that looks up its handler on the first frame, then puts it in the slot."""
+
+        def resolve(data: bytes, connection: "ConnectionProtocol") -> None:
+            entry = self._entry(self.data_received_handlers[key], offset)  # type: ignore[arg-type]
+            table[index] = entry
+            entry(data, connection)
+
+        return resolve
+
+    @staticmethod
+    def _entry(handler: DispatchEntry, offset: int) -> DispatchEntry:
+        """The handler itself, or for a wrapped key an adapter that slices out the payload."""
+        if not offset:
+            return handler
+
+        def unwrapped(data: bytes, connection: "ConnectionProtocol") -> None:
+            handler(data[offset:], connection)
+
+        return unwrapped
+
+    def dispatch(self, data: bytes, connection: "ConnectionProtocol") -> bool:
+        entry = self.dispatch_table[data[0]]
+        if entry is None:
+            return False
+        entry(data, connection)
+        return True
+
     def extract_key(self, data: bytes) -> int | None:
         if not data:
             return None
@@ -48,63 +107,140 @@ class StandardProtocol(WatchProtocol):
 
     async def set_time(self, connection: Any, current_time: Any = None, offset: int = 0) -> None:
         from gshock_api.iolib.second_dial_io import SecondDialIO
-        from gshock_api.watch_info import watch_info
         from gshock_api import message_dispatcher
 
         await self.initialize_for_setting_time(connection)
         await message_dispatcher.TimeIO.request(connection, current_time, offset)
 
-        if watch_info.hasSecondDial:
+        if connection.watch_info.hasSecondDial:
             await SecondDialIO.set_second_dial(connection)
 
     async def initialize_for_setting_time(self, connection: Any) -> None:
-        from gshock_api.watch_info import watch_info, WatchModel
+        """
+        Reads the DST and city slots and writes them back, which the watch
+        expects before it accepts a new time.
+
+        In pipelined mode all reads go out at once and the replies are matched
+        by key and slot; the write-backs then follow in the usual order. Models
+        with pipelinedTimeSet off, or a pipelined attempt that fails, use the
+        one-read-one-write sequence instead.
+
+        If the connection has a snapshot cache, the write-backs are skipped
+        when the reads match what was last seen for this watch. When they
+        don't, the payloads already read are written back without reading
+        them again. Serial models with no snapshot yet use the
+        one-read-one-write sequence.
+        """
+        reads = self.time_set_preamble(connection)
+        cache = connection.snapshot_cache
+        address = connection.watch_info.address
+        pipelined = connection.watch_info.pipelinedTimeSet
+
+        if cache is not None and address:
+            if pipelined or cache.get(address) is not None:
+                payloads = await self.read_preamble(connection, reads)
+                if cache.matches(address, payloads):
+                    logger.info(f"Watch configuration unchanged for {address}, skipping write-backs")
+                    return
+                for ret in payloads:
+                    await connection.write(HANDLE_ALL_FEATURES, ret)
+            else:
+                payloads = [await self.read_and_write(connection, function, param) for function, param in reads]
+            cache.put(address, payloads)
+            return
 
-        await self.read_write_dst_watch_states(connection)
-        await self.read_write_dst_for_world_cities(connection)
+        if pipelined:
+            try:
+                await self.pipelined_read_and_write(connection, reads)
+                return
+            except GShockConnectionError as e:
+                logger.warning(f"Pipelined time-set preamble failed, retrying serially: {e}")
+                note_retry(connection)
+
+        for function, param in reads:
+            await self.read_and_write(connection, function, param)
+
+    async def read_preamble(self, connection: "ConnectionProtocol", reads: list[PreambleRead]) -> list[bytes]:
+        """Performs the reads without writing anything back."""
+        if connection.watch_info.pipelinedTimeSet:
+            try:
+                return await self.pipelined_read(connection, reads)
+            except GShockConnectionError as e:
+                logger.warning(f"Pipelined time-set preamble failed, retrying serially: {e}")
+                note_retry(connection)
+        return [await function(connection, param) for function, param in reads]
+
+    def time_set_preamble(self, connection: "ConnectionProtocol") -> list[PreambleRead]:
+        """Lists the reads to echo back before setting the time, in write order."""
+        watch_info = connection.watch_info
+        reads: list[PreambleRead] = [
+            (self.get_dst_watch_state, state)
+            for state in [DtsState.ZERO, DtsState.TWO, DtsState.FOUR][:watch_info.dstCount]
+        ]
+        reads += [
+            (self.get_dst_for_world_cities, city_number)
+            for city_number in range(watch_info.worldCitiesCount)
+        ]
+        return reads + self.city_preamble(connection)
+
+    def city_preamble(self, connection: "ConnectionProtocol") -> list[PreambleRead]:
+        from gshock_api import message_dispatcher
+        from gshock_api.watch_info import WatchModel
 
+        watch_info = connection.watch_info
+        cities = range(watch_info.worldCitiesCount)
         if watch_info.hasWorldCities:
-            await self.read_write_world_cities(connection)
-        elif watch_info.model == WatchModel.MTG_B3000:
-            await self.read_write_home_times(connection)
+            return [(self.get_world_cities, city_number) for city_number in cities]
+        if watch_info.model == WatchModel.MTG_B3000:
+            return [(message_dispatcher.HomeTimeIO.request_raw, city_number) for city_number in cities]
+        return []
+
+    async def pipelined_read_and_write(self, connection: "ConnectionProtocol", reads: list[PreambleRead]) -> None:
+        for ret in await self.pipelined_read(connection, reads):
+            await connection.write(HANDLE_ALL_FEATURES, ret)
+
+    async def pipelined_read(self, connection: "ConnectionProtocol", reads: list[PreambleRead]) -> list[bytes]:
+        """Issues all reads at once; replies are matched by key and slot."""
+        tasks = [asyncio.ensure_future(function(connection, param)) for function, param in reads]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # Withdraw the remaining reads so a serial retry doesn't match stale requests
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return results
 
     async def read_write_dst_watch_states(self, connection: Any) -> None:
-        from gshock_api.watch_info import watch_info
-        for state in [DtsState.ZERO, DtsState.TWO, DtsState.FOUR][:watch_info.dstCount]:
+        for state in [DtsState.ZERO, DtsState.TWO, DtsState.FOUR][:connection.watch_info.dstCount]:
             await self.read_and_write(connection, self.get_dst_watch_state, state)
 
     async def read_write_dst_for_world_cities(self, connection: Any) -> None:
-        from gshock_api.watch_info import watch_info
-        for city_number in range(watch_info.worldCitiesCount):
+        for city_number in range(connection.watch_info.worldCitiesCount):
             await self.read_and_write(connection, self.get_dst_for_world_cities, city_number)
 
     async def read_write_world_cities(self, connection: Any) -> None:
-        from gshock_api.watch_info import watch_info
-        for city_number in range(watch_info.worldCitiesCount):
+        for city_number in range(connection.watch_info.worldCitiesCount):
             await self.read_and_write(connection, self.get_world_cities, city_number)
 
     async def read_write_home_times(self, connection: Any) -> None:
-        from gshock_api.watch_info import watch_info
         from gshock_api import message_dispatcher
-        for city_number in range(watch_info.worldCitiesCount):
+        for city_number in range(connection.watch_info.worldCitiesCount):
             raw_bytes = await message_dispatcher.HomeTimeIO.request_raw(connection, city_number)
-            hex_data = to_hex_string(raw_bytes)
-            short_str = to_compact_string(hex_data)
-            await connection.write(HANDLE_ALL_FEATURES, short_str)
+            await connection.write(HANDLE_ALL_FEATURES, raw_bytes)
 
-    async def read_and_write(self, connection: Any, function: Callable, param: Any) -> None:
+    async def read_and_write(self, connection: Any, function: Callable, param: Any) -> bytes:
         ret = await function(connection, param)
-        hex_data = to_hex_string(ret)
-        short_str = to_compact_string(hex_data)
-        await connection.write(HANDLE_ALL_FEATURES, short_str)
+        await connection.write(HANDLE_ALL_FEATURES, ret)
+        return ret
 
     async def get_timer(self, connection: Any) -> int:
         from gshock_api import message_dispatcher
         return await message_dispatcher.TimerIO.request(connection)
 
     async def set_timer(self, connection: Any, timer_value: int) -> None:
-        message = f'{{"action": "SET_TIMER", "value": {timer_value} }}'
-        await connection.send_message(message)
+        await connection.send_message(SetTimer(timer_value))
 
     def get_timer_request(self) -> str:
         return "18"
@@ -129,18 +265,13 @@ class StandardProtocol(WatchProtocol):
         return getattr(cond, "temperature", 0)
 
     async def get_alarms(self, connection: Any) -> list[Any]:
-        from gshock_api.alarms import alarms_inst
         from gshock_api import message_dispatcher
-        alarms_inst.clear()
-        await message_dispatcher.AlarmsIO.request(connection)
-        return alarms_inst.alarms
+        return await message_dispatcher.AlarmsIO.request(connection)
 
     async def set_alarms(self, connection: Any, alarms: list[Any]) -> None:
         if not alarms:
             return
-        alarms_str = json.dumps(alarms)
-        set_action_cmd = f'{{"action":"SET_ALARMS", "value":{alarms_str} }}'
-        await connection.send_message(set_action_cmd)
+        await connection.send_message(SetAlarms(alarms))
 
     async def get_settings(self, connection: Any) -> dict[str, Any]:
         from gshock_api import message_dispatcher
@@ -155,16 +286,11 @@ class StandardProtocol(WatchProtocol):
         return settings
 
     async def set_settings(self, connection: Any, settings: Any) -> None:
-        setting_json = json.dumps(settings)
-        message = f'{{"action": "SET_SETTINGS", "value": {setting_json} }}'
-        await connection.send_message(message)
+        await connection.send_message(SetSettings(settings))
 
     async def get_basic_settings(self, connection: Any) -> dict[str, Any]:
         from gshock_api import message_dispatcher
-        result_str = await message_dispatcher.SettingsIO.request(connection)
-        if isinstance(result_str, dict):
-            return result_str
-        return json.loads(result_str)
+        return await message_dispatcher.SettingsIO.request(connection)
 
     async def get_time_adjustment(self, connection: Any) -> Any:
         from gshock_api import message_dispatcher
@@ -175,8 +301,7 @@ class StandardProtocol(WatchProtocol):
         return bool(result)
 
     async def set_time_adjustment(self, connection: Any, time_adjustment: bool, minutes_after_hour: int) -> None:
-        message = f'{{"action": "SET_TIME_ADJUSTMENT", "timeAdjustment": "{time_adjustment}", "minutesAfterHour": "{minutes_after_hour}" }}'
-        await connection.send_message(message)
+        await connection.send_message(SetTimeAdjustment(time_adjustment, minutes_after_hour))
 
     async def get_watch_condition(self, connection: Any) -> Any:
         from gshock_api import message_dispatcher
@@ -205,4 +330,4 @@ class StandardProtocol(WatchProtocol):
             return
 
         enabled = [event for event in events if event.get("time", {}).get("enabled")]
-        await connection.send_message(f'{{"action": "SET_REMINDERS", "value": {json.dumps(enabled)}}}')
+        await connection.send_message(SetReminders(enabled))
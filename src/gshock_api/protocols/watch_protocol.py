@@ -1,5 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Any, Callable
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from gshock_api.iolib.connection_protocol import ConnectionProtocol
+
+# Takes a whole frame: the key's handler itself, or for a wrapped key an
+# adapter that hands the handler the payload behind the envelope
+DispatchEntry = Callable[[bytes, "ConnectionProtocol"], None]
 
 
 class WatchProtocol(ABC):
@@ -7,7 +15,7 @@ class WatchProtocol(ABC):
 
     @property
     @abstractmethod
-    def data_received_handlers(self) -> dict[int, Callable[[bytes], None]]:
+    def data_received_handlers(self) -> Mapping[int, Callable[[bytes], None]]:
         """Maps characteristic key integers to handler functions."""
         pass
 
@@ -21,6 +29,18 @@ class WatchProtocol(ABC):
         """Unwraps payload from envelope if necessary."""
         pass
 
+    def dispatch(self, data: bytes, connection: "ConnectionProtocol") -> bool:
+        """
+        Hands a non-empty frame to its handler. Returns False if no handler
+        takes its key. Protocols with a dispatch table override this.
+        """
+        key = self.extract_key(data)
+        handlers = self.data_received_handlers
+        if key is None or key not in handlers:
+            return False
+        handlers[key](self.unwrap_payload(data, key), connection)  # type: ignore[call-arg]
+        return True
+
     @abstractmethod
     def get_watch_condition_request(self) -> str:
         """Returns hex request command string for watch condition."""
@@ -0,0 +1,220 @@
+"""
+Replays btsnoop captures through the real MessageDispatcher.
+
+The watch side of a capture (its notifications) is fed to
+MessageDispatcher.on_received on a ReplayConnection, while the library code
+under test runs against the same connection. Writes the library makes are
+recorded and compared with the host side of the capture. Notifications are
+held back until the library has made as many writes as the original app had
+at that point, so replies never arrive before the request that asks for them.
+
+    connection = ReplayConnection("CASIO ABL-100WE")
+    replay = CaptureReplay.from_file("test_data/btsnoop_hci_ABL.log", connection, start=1125, end=1147)
+    task = asyncio.create_task(StepCounterIO.request(connection))
+    result = await replay.run()
+    result.check()
+"""
+
+import asyncio
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from itertools import zip_longest
+from pathlib import Path
+import time
+from typing import TYPE_CHECKING, Final
+
+from gshock_api.btsnoop import AttPacket, read_att_packets
+from gshock_api.commands import WatchCommand
+from gshock_api.message_dispatcher import MessageDispatcher
+from gshock_api.pending_requests import PendingRequests
+from gshock_api.utils import ByteData, as_bytes
+from gshock_api.watch_info import WatchInfo
+
+if TYPE_CHECKING:
+    from gshock_api.link_latency import RoundTripEstimator
+    from gshock_api.snapshot_cache import SnapshotCache
+    from gshock_api.time_scheduler import TimeSetScheduler
+
+# Handles the library writes to. CCCD writes (0x0F, 0x15, 0x1A) are done by
+# the BLE stack when subscribing and are not compared.
+DATA_HANDLES: Final[frozenset[int]] = frozenset({0x0C, 0x0D, 0x0E, 0x11, 0x14, 0x17, 0x19})
+
+Write = tuple[int, bytes]
+
+
+class ReplayConnection:
+    """ConnectionProtocol that records writes instead of sending them."""
+
+    def __init__(self, name: str, address: str = "00:00:00:00:00:00") -> None:
+        self.pending: PendingRequests = PendingRequests()
+        self.watch_info: WatchInfo = WatchInfo()
+        self.watch_info.set_name_and_model(name)
+        self.watch_info.set_address(address)
+        self.snapshot_cache: SnapshotCache | None = None
+        self.latency: RoundTripEstimator | None = None
+        self.time_scheduler: TimeSetScheduler | None = None
+        self.writes: list[Write] = []
+        self._written = asyncio.Condition()
+
+    async def request(self, code: ByteData) -> None:
+        await self.write(0x0C, code)
+
+    async def write(self, handle: int, data: ByteData) -> None:
+        async with self._written:
+            self.writes.append((handle, as_bytes(data)))
+            self._written.notify_all()
+
+    async def flush(self) -> None:
+        pass
+
+    async def send_message(self, message: WatchCommand | str) -> None:
+        await MessageDispatcher.send_to_watch(message, self)
+
+    async def wait_for_writes(self, count: int) -> None:
+        """Waits until at least count writes were made."""
+        async with self._written:
+            await self._written.wait_for(lambda: len(self.writes) >= count)
+
+
+@dataclass(frozen=True)
+class WriteMismatch:
+    position: int
+    expected: Write | None
+    actual: Write | None
+
+    def __str__(self) -> str:
+        def show(write: Write | None) -> str:
+            return "-" if write is None else f"0x{write[0]:02X} {write[1].hex()}"
+
+        return f"#{self.position}: expected {show(self.expected)}, got {show(self.actual)}"
+
+
+@dataclass
+class ReplayResult:
+    expected: list[Write] = field(default_factory=list)
+    actual: list[Write] = field(default_factory=list)
+    delivered: int = 0
+    stalls: int = 0
+    elapsed: float = 0.0
+
+    def mismatches(self, ordered: bool = True) -> list[WriteMismatch]:
+        """
+        Differences between captured and actual writes. With ordered=False
+        only the multiset is compared, for code that sends reads in a
+        different order than the captured app (e.g. pipelined time set).
+        """
+        if ordered:
+            return [
+                WriteMismatch(i, e, a)
+                for i, (e, a) in enumerate(zip_longest(self.expected, self.actual))
+                if e != a
+            ]
+        missing = Counter(self.expected) - Counter(self.actual)
+        extra = Counter(self.actual) - Counter(self.expected)
+        return [WriteMismatch(-1, w, None) for w in missing.elements()] + [
+            WriteMismatch(-1, None, w) for w in extra.elements()
+        ]
+
+    def check(self, ordered: bool = True) -> None:
+        """Raises AssertionError listing every mismatch."""
+        mismatches = self.mismatches(ordered)
+        if mismatches:
+            raise AssertionError(
+                "Writes differ from capture:\n" + "\n".join(str(m) for m in mismatches)
+            )
+
+
+class CaptureReplay:
+    """
+    Feeds a capture's notifications to a ReplayConnection.
+
+    speed scales the captured timing (1.0 = real time); None replays as fast
+    as possible. With follow_writes off, notifications are not held back for
+    the library's writes, which is what throughput benchmarks want.
+    """
+
+    def __init__(
+        self,
+        packets: Sequence[AttPacket],
+        connection: ReplayConnection,
+        speed: float | None = None,
+        follow_writes: bool = True,
+        sync_timeout: float = 1.0,
+    ) -> None:
+        self.packets = packets
+        self.connection = connection
+        self.speed = speed
+        self.follow_writes = follow_writes
+        self.sync_timeout = sync_timeout
+
+    @classmethod
+    def from_file(
+        cls,
+        path: Path | str,
+        connection: ReplayConnection,
+        start: int = 0,
+        end: int | None = None,
+        acl_handle: int | None = None,
+        **kwargs: float | bool | None,
+    ) -> "CaptureReplay":
+        """Replays records start..end (inclusive, btsnoop record numbers) of a capture."""
+        packets = [
+            p
+            for p in read_att_packets(path)
+            if p.index >= start
+            and (end is None or p.index <= end)
+            and (acl_handle is None or p.acl_handle == acl_handle)
+        ]
+        return cls(packets, connection, **kwargs)  # type: ignore[arg-type]
+
+    def expected_writes(self) -> list[Write]:
+        return [
+            (p.handle, p.value)
+            for p in self.packets
+            if p.sent and p.is_write and p.handle in DATA_HANDLES
+        ]
+
+    async def run(self) -> ReplayResult:
+        result = ReplayResult(expected=self.expected_writes())
+        if not self.packets:
+            return result
+
+        first = self.packets[0].timestamp
+        started = time.monotonic()
+        writes_so_far = 0
+
+        for packet in self.packets:
+            if packet.sent:
+                if packet.is_write and packet.handle in DATA_HANDLES:
+                    writes_so_far += 1
+                continue
+            if not packet.is_notification:
+                continue
+
+            if self.speed:
+                due = started + (packet.timestamp - first) / self.speed
+                await asyncio.sleep(max(due - time.monotonic(), 0.0))
+            if self.follow_writes and not await self._caught_up(writes_so_far):
+                result.stalls += 1
+
+            MessageDispatcher.on_received(packet.value, connection=self.connection, handle=packet.handle)
+            result.delivered += 1
+            # Let handlers' follow-up tasks (acks, write-backs) run
+            await asyncio.sleep(0)
+
+        if self.follow_writes and not await self._caught_up(len(result.expected)):
+            result.stalls += 1
+
+        result.elapsed = time.monotonic() - started
+        result.actual = list(self.connection.writes)
+        return result
+
+    async def _caught_up(self, count: int) -> bool:
+        """Waits up to sync_timeout for the library's first count writes. False on timeout."""
+        try:
+            async with asyncio.timeout(self.sync_timeout):
+                await self.connection.wait_for_writes(count)
+        except TimeoutError:
+            return False
+        return True
@@ -1,14 +1,15 @@
 import asyncio
-from collections.abc import Callable
+from collections.abc import Callable, Collection
 import sys
-from typing import Final
-
-from bleak import BleakScanner, BLEDevice
-from bleak.backends.scanner import AdvertisementData  # Required for typing ad
-from bleak.exc import BleakError
+from typing import TYPE_CHECKING, Final
 
 from gshock_api.logger import logger
-from gshock_api.watch_info import watch_info
+from gshock_api.watch_info import WatchInfo
+
+if TYPE_CHECKING:
+    # bleak is imported when a scan starts, not when this module is imported
+    from bleak import BLEDevice
+    from bleak.backends.scanner import AdvertisementData  # Required for typing ad
 
 # --- Constants ---
 
@@ -27,7 +28,7 @@ MAX_SCAN_RETRIES: Final[int] = 60
 type WatchFilter = Callable[[str], bool] | None
 
 # Type for the filter used in find_device_by_filter (takes device and ad data, returns bool)
-type BleakDeviceFilter = Callable[[BLEDevice, AdvertisementData], bool]
+type BleakDeviceFilter = Callable[["BLEDevice", "AdvertisementData"], bool]
 
 
 class Scanner:
@@ -39,9 +40,24 @@ class Scanner:
         self,
         device_address: str | None = None,
         watch_filter: WatchFilter = None,
-        max_retries: int = MAX_SCAN_RETRIES
-    ) -> BLEDevice | None:
-        
+        max_retries: int = MAX_SCAN_RETRIES,
+        exclude_addresses: Collection[str] = (),
+        *,
+        info: WatchInfo | None = None,
+    ) -> "BLEDevice | None":
+        """
+        Finds a Casio watch, either by address or by advertised service.
+
+        Devices in exclude_addresses are skipped, so several callers can scan
+        concurrently without picking up a watch that is already connected.
+        The name and model of the found watch are recorded in info, if given.
+        """
+        if info is None:
+            info = WatchInfo()
+        # bleak loads on first scan
+        from bleak import BleakScanner  # noqa: PLC0415
+        from bleak.exc import BleakError  # noqa: PLC0415
+
         # Use the class constant
         found: BLEDevice | None = None
         scanner = BleakScanner()
@@ -52,7 +68,7 @@ class Scanner:
                 try:
                     # Define the Bleak device filter function
                     # The second argument to the lambda function is usually AdvertisementData
-                    def uuid_filter(d: BLEDevice, ad: AdvertisementData) -> bool:
+                    def uuid_filter(d: "BLEDevice", ad: "AdvertisementData") -> bool:
                         # ad.service_uuids is a list of strings
                         service_uuids: list[str] = ad.service_uuids if ad.service_uuids else []
                         
@@ -60,6 +76,8 @@ class Scanner:
                         device_name: str = d.name if d.name else ""
 
                         is_casio_service: bool = CASIO_SERVICE_UUID in service_uuids
+                        if d.address in exclude_addresses:
+                            return False
                         
                         # If watch_filter is provided, use it on the device name
                         passes_custom_filter: bool = watch_filter is None or watch_filter(device_name)
@@ -72,7 +90,7 @@ class Scanner:
                     if found:
                         logger.info(f"✅ Found: {found.name} ({found.address})")
                         if found.name:
-                            watch_info.set_name_and_model(found.name)
+                            info.set_name_and_model(found.name)
                         return found
                         
                     logger.debug("⚠️ No matching device found, retrying...")
@@ -99,7 +117,7 @@ class Scanner:
                 return None
                 
             if found.name:
-                watch_info.set_name_and_model(found.name)
+                info.set_name_and_model(found.name)
                 
         return found
     
@@ -0,0 +1,184 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+import time
+from typing import Final
+
+from gshock_api.connection import Connection, WatchFilter
+from gshock_api.continuous_scanner import ContinuousScanner
+from gshock_api.exceptions import GShockConnectionError, GShockIgnorableException
+from gshock_api.gshock_api import GshockAPI
+from gshock_api.logger import logger
+from gshock_api.watch_info import WatchInfo
+
+DEFAULT_MAX_SESSIONS: Final[int] = 4
+# Pause after a watch could not be connected, so a failing adapter is not retried in a tight loop
+ACCEPT_RETRY_DELAY: Final[float] = 1.0
+
+SessionHandler = Callable[[GshockAPI], Awaitable[None]]
+ConnectionFactory = Callable[[WatchInfo], Connection]
+
+
+@dataclass
+class Session:
+    """One connected watch, served by its own task."""
+
+    address: str
+    connection: Connection
+    api: GshockAPI
+    started_at: float = field(default_factory=time.monotonic)
+    task: "asyncio.Task[None] | None" = None
+
+    @property
+    def watch_info(self) -> WatchInfo:
+        return self.connection.watch_info
+
+
+def _new_connection(info: WatchInfo) -> Connection:
+    return Connection(watch_info=info)
+
+
+class SessionManager:
+    """
+    Serves several watches at once.
+
+    Keeps scanning while fewer than max_sessions watches are connected. Each
+    watch gets its own Connection and WatchInfo, and the handler runs in a
+    separate task per session, so a slow watch does not hold up the others.
+    Already connected addresses are excluded from the next scan.
+
+    With a ContinuousScanner, watches are taken from its stream of
+    advertisements instead of starting a new scan for every connection.
+    """
+
+    def __init__(
+        self,
+        handler: SessionHandler,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        watch_filter: WatchFilter = None,
+        connection_factory: ConnectionFactory = _new_connection,
+        scanner: ContinuousScanner | None = None,
+    ) -> None:
+        if max_sessions < 1:
+            raise ValueError(f"max_sessions must be at least 1, got {max_sessions}")
+
+        self.handler = handler
+        self.max_sessions = max_sessions
+        self.watch_filter = watch_filter
+        self.connection_factory = connection_factory
+        self.scanner = scanner
+        # Pause after a watch could not be connected, before scanning again
+        self.retry_delay = ACCEPT_RETRY_DELAY
+        self.sessions: dict[str, Session] = {}
+        self._slots = asyncio.Semaphore(max_sessions)
+        self._running = False
+        self._run_task: asyncio.Task[None] | None = None
+
+    @property
+    def active_addresses(self) -> frozenset[str]:
+        return frozenset(self.sessions)
+
+    async def run(self) -> None:
+        """
+        Accepts watches until stop() is called. A watch that fails to connect
+        is logged and skipped; it does not stop the other sessions.
+        """
+        self._running = True
+        self._run_task = asyncio.current_task()
+        if self.scanner is not None:
+            await self.scanner.start()
+        try:
+            while self._running:
+                await self._slots.acquire()
+                session = None
+                try:
+                    session = await self._accept()
+                except Exception as e:
+                    logger.error(f"Could not start a session: {e}")
+                    await asyncio.sleep(self.retry_delay)
+                finally:
+                    if session is None:
+                        self._slots.release()
+        except asyncio.CancelledError:
+            # stop() cancels a run() waiting for a slot or a watch; anyone else is propagated
+            if self._running or self._run_task is None:
+                raise
+            self._run_task.uncancel()
+        finally:
+            self._running = False
+            self._run_task = None
+            if self.scanner is not None:
+                await self.scanner.stop()
+
+    async def _accept(self) -> Session | None:
+        """Scans for one more watch and starts a session for it."""
+        logger.info(f"Waiting for connection ({len(self.sessions)}/{self.max_sessions} active)...")
+        if self.scanner is not None:
+            # A live view, so a watch whose session ends during the wait is not skipped
+            seen = await self.scanner.next_watch(exclude_addresses=self.sessions.keys())
+            if self.watch_filter is not None and not self.watch_filter(seen.name):
+                return None
+            info = WatchInfo()
+            info.set_name_and_model(seen.name)
+            connection = self.connection_factory(info)
+            connection.address = seen.address
+            connection.device = seen.device
+            connected = await connection.connect()
+        else:
+            connection = self.connection_factory(WatchInfo())
+            connected = await connection.connect(
+                self.watch_filter, exclude_addresses=self.active_addresses
+            )
+        if not connected or connection.address is None:
+            return None
+
+        return self._start_session(connection)
+
+    def _start_session(self, connection: Connection) -> Session:
+        address = connection.address or ""
+        session = Session(address=address, connection=connection, api=GshockAPI(connection))
+        self.sessions[address] = session
+        session.task = asyncio.create_task(
+            self._serve(session), name=f"gshock-session-{address}"
+        )
+        logger.info(f"Connected to {session.watch_info.name} ({address})")
+        return session
+
+    async def stop(self) -> None:
+        """Stops accepting watches and closes all open sessions."""
+        self._running = False
+        tasks = [s.task for s in self.sessions.values() if s.task is not None]
+        if self._run_task is not None:
+            tasks.append(self._run_task)
+        current = asyncio.current_task()
+        tasks = [task for task in tasks if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # A task cancelled before it started never ran _serve's cleanup
+        for session in list(self.sessions.values()):
+            await self._close(session)
+
+    async def _serve(self, session: Session) -> None:
+        try:
+            await self.handler(session.api)
+        except (GShockConnectionError, GShockIgnorableException) as e:
+            logger.error(f"Session {session.address} failed: {e}")
+        except Exception as e:
+            # Nobody awaits the session task, so an escaping error would only be reported at exit
+            logger.error(f"Session {session.address} handler raised {type(e).__name__}: {e}")
+        finally:
+            await self._close(session)
+
+    async def _close(self, session: Session) -> None:
+        try:
+            if not session.watch_info.alwaysConnected:
+                await session.connection.disconnect()
+        except Exception as e:
+            logger.error(f"Session {session.address} did not disconnect cleanly: {e}")
+        finally:
+            if self.sessions.pop(session.address, None) is not None:
+                self._slots.release()
+                if self.scanner is not None:
+                    # Still advertising, it would not be reported again until it went quiet for ttl
+                    self.scanner.forget(session.address)
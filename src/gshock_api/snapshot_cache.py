@@ -0,0 +1,96 @@
+"""
+Per-watch cache of the configuration read back during a time set.
+
+Before setting the time, the watch expects its DST states (0x1D), DST rules
+(0x1E) and world cities (0x1F) or home times (0x24) to be read and written
+back. These rarely change between connections, so the payloads seen last time
+are kept here, keyed by watch address, together with a digest. When a fresh
+read produces the same digest the write-backs can be skipped.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+import hashlib
+from pathlib import Path
+from typing import Any, Final
+
+from gshock_api.json_store import JsonStore
+
+DEFAULT_CACHE_PATH: Final[Path] = Path.home() / ".cache" / "gshock_api" / "snapshots.json"
+
+
+def snapshot_digest(payloads: Sequence[bytes]) -> str:
+    """Hashes payloads in order; each is length-prefixed so boundaries count."""
+    digest = hashlib.sha256()
+    for payload in payloads:
+        digest.update(len(payload).to_bytes(2, "big"))
+        digest.update(payload)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class WatchSnapshot:
+    address: str
+    payloads: tuple[bytes, ...]
+    digest: str
+
+    @classmethod
+    def of(cls, address: str, payloads: Sequence[bytes]) -> "WatchSnapshot":
+        payloads = tuple(bytes(p) for p in payloads)
+        return cls(address, payloads, snapshot_digest(payloads))
+
+
+class SnapshotCache:
+    """
+    Snapshots by watch address, persisted as JSON.
+
+    With path=None the cache lives in memory only.
+    """
+
+    def __init__(self, path: Path | str | None = DEFAULT_CACHE_PATH) -> None:
+        self.store = JsonStore(path, "snapshot cache")
+        self._snapshots: dict[str, WatchSnapshot] = {}
+        self.store.load(self._decode)
+
+    @property
+    def path(self) -> Path | None:
+        return self.store.path
+
+    def get(self, address: str) -> WatchSnapshot | None:
+        return self._snapshots.get(address)
+
+    def matches(self, address: str, payloads: Sequence[bytes]) -> bool:
+        """True if payloads are what was last stored for this watch."""
+        snapshot = self._snapshots.get(address)
+        return snapshot is not None and snapshot.digest == snapshot_digest(payloads)
+
+    def put(self, address: str, payloads: Sequence[bytes]) -> WatchSnapshot:
+        """Stores payloads for this watch; the file is only rewritten if they changed."""
+        snapshot = WatchSnapshot.of(address, payloads)
+        current = self._snapshots.get(address)
+        if current is not None and current.digest == snapshot.digest:
+            return current
+        self._snapshots[address] = snapshot
+        self._save()
+        return snapshot
+
+    def invalidate(self, address: str) -> None:
+        if self._snapshots.pop(address, None) is not None:
+            self._save()
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def _decode(self, raw: dict[str, Any]) -> None:
+        for address, entry in raw.items():
+            payloads = tuple(bytes.fromhex(p) for p in entry["payloads"])
+            snapshot = WatchSnapshot(address, payloads, str(entry["digest"]))
+            # Drop entries that were edited or truncated on disk
+            if snapshot.digest == snapshot_digest(payloads):
+                self._snapshots[address] = snapshot
+
+    def _save(self) -> None:
+        self.store.save({
+            address: {"digest": s.digest, "payloads": [p.hex() for p in s.payloads]}
+            for address, s in self._snapshots.items()
+        })
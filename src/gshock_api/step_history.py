@@ -0,0 +1,164 @@
+"""
+Local history of ABL-100 step counts, kept in SQLite per watch address.
+
+Each StepCounterData covers the last few days: 144 hourly slots (6 days of
+24 hours, oldest first, the last 24 being the record's own day), 14 daily
+totals (oldest first, ending the day before the record) and the running
+total for the record's day. Successive syncs overlap almost entirely, so
+slots are upserted by (address, day[, hour]) and unchanged rows are not
+rewritten. Days before the last synced day are complete and are skipped on
+later syncs, so a sync only touches the slots that can still change.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import sqlite3
+from typing import Final
+
+from gshock_api.logger import logger
+from gshock_api.step_counter_data import StepCounterData
+
+DEFAULT_STEP_HISTORY_PATH: Final[Path] = Path.home() / ".local" / "share" / "gshock_api" / "steps.db"
+
+HOURS_PER_DAY: Final[int] = 24
+
+SCHEMA: Final[str] = """
+CREATE TABLE IF NOT EXISTS hourly_steps (
+    address TEXT NOT NULL,
+    day TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    steps INTEGER NOT NULL,
+    PRIMARY KEY (address, day, hour)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_steps (
+    address TEXT NOT NULL,
+    day TEXT NOT NULL,
+    steps INTEGER NOT NULL,
+    PRIMARY KEY (address, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    address TEXT PRIMARY KEY,
+    last_day TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+"""
+
+
+def record_date(data: StepCounterData, synced_at: datetime) -> date | None:
+    """
+    The calendar day a record describes. The watch sends month and day only;
+    the year is the sync year, or the one before for a late-December record
+    synced in early January.
+    """
+    if not data.month or not data.day_of_month:
+        return None
+    try:
+        day = date(synced_at.year, data.month, data.day_of_month)
+        if day > synced_at.date() + timedelta(days=1):
+            day = date(synced_at.year - 1, data.month, data.day_of_month)
+    except ValueError:
+        return None
+    return day
+
+
+class StepHistoryStore:
+    """
+    Step history per watch address. With path=None the store lives in memory only.
+    """
+
+    def __init__(self, path: Path | str | None = DEFAULT_STEP_HISTORY_PATH) -> None:
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(":memory:" if path is None else str(path))
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "StepHistoryStore":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        with self.db:
+            yield self.db.cursor()
+
+    def last_synced_day(self, address: str) -> date | None:
+        row = self.db.execute(
+            "SELECT last_day FROM sync_state WHERE address = ?", (address,)
+        ).fetchone()
+        return date.fromisoformat(row[0]) if row else None
+
+    def ingest(self, address: str, data: StepCounterData, synced_at: datetime | None = None) -> int:
+        """Merges one record into the history. Returns the number of rows inserted or changed."""
+        synced_at = synced_at or datetime.now()
+        today = record_date(data, synced_at)
+        if today is None:
+            logger.info(f"Step record from {address} has no date, not stored")
+            return 0
+
+        # Days before the last synced one were already complete when stored
+        floor = self.last_synced_day(address) or date.min
+
+        hourly_days = len(data.hourly_steps) // HOURS_PER_DAY
+        hourly: list[tuple[str, str, int, int]] = []
+        for slot, steps in enumerate(data.hourly_steps[: hourly_days * HOURS_PER_DAY]):
+            day = today - timedelta(days=hourly_days - 1 - slot // HOURS_PER_DAY)
+            if steps is not None and day >= floor:
+                hourly.append((address, day.isoformat(), slot % HOURS_PER_DAY, steps))
+
+        daily: list[tuple[str, str, int]] = []
+        for slot, steps in enumerate(data.daily_history):
+            day = today - timedelta(days=len(data.daily_history) - slot)
+            if steps is not None and day >= floor:
+                daily.append((address, day.isoformat(), steps))
+        if data.current_day_steps is not None:
+            daily.append((address, today.isoformat(), data.current_day_steps))
+
+        with self._transaction() as cursor:
+            before = self.db.total_changes
+            cursor.executemany(
+                "INSERT INTO hourly_steps (address, day, hour, steps) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (address, day, hour) DO UPDATE SET steps = excluded.steps "
+                "WHERE steps != excluded.steps",
+                hourly,
+            )
+            cursor.executemany(
+                "INSERT INTO daily_steps (address, day, steps) VALUES (?, ?, ?) "
+                "ON CONFLICT (address, day) DO UPDATE SET steps = excluded.steps "
+                "WHERE steps != excluded.steps",
+                daily,
+            )
+            changed = self.db.total_changes - before
+            cursor.execute(
+                "INSERT INTO sync_state (address, last_day, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (address) DO UPDATE SET last_day = max(last_day, excluded.last_day), "
+                "synced_at = excluded.synced_at",
+                (address, today.isoformat(), synced_at.isoformat()),
+            )
+        return changed
+
+    def hourly(self, address: str, start: date, end: date) -> list[tuple[datetime, int]]:
+        """Hourly step counts for start..end inclusive, in time order."""
+        rows = self.db.execute(
+            "SELECT day, hour, steps FROM hourly_steps "
+            "WHERE address = ? AND day BETWEEN ? AND ? ORDER BY day, hour",
+            (address, start.isoformat(), end.isoformat()),
+        )
+        return [
+            (datetime.combine(date.fromisoformat(day), datetime.min.time()) + timedelta(hours=hour), steps)
+            for day, hour, steps in rows
+        ]
+
+    def daily(self, address: str, start: date, end: date) -> list[tuple[date, int]]:
+        """Daily step totals for start..end inclusive, in date order."""
+        rows = self.db.execute(
+            "SELECT day, steps FROM daily_steps WHERE address = ? AND day BETWEEN ? AND ? ORDER BY day",
+            (address, start.isoformat(), end.isoformat()),
+        )
+        return [(date.fromisoformat(day), steps) for day, steps in rows]
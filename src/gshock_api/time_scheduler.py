@@ -0,0 +1,84 @@
+"""
+Releases the time-set write on a precise deadline.
+
+Without a scheduler the time packet goes out whenever the preamble finishes
+and carries an arbitrary fraction of a second, which the watch only receives
+in 1/256 s steps. With one attached to a connection (connection.time_scheduler),
+TimeIO and GwBx5600TimeIO instead pick the next whole second at least
+``lead`` seconds away, encode it (fraction byte 0), and start the write one
+link delay before it, so the packet lands on the watch as that second begins.
+
+The wait is an asyncio sleep until ``spin`` seconds before the deadline and
+a busy-wait on perf_counter for the rest; the event loop is blocked only for
+that last stretch. Each time set is reported in ``reports``.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+import math
+import time
+from typing import Final
+
+from gshock_api.logger import logger
+
+# Time left between planning and releasing, for building the packet
+DEFAULT_LEAD: Final[float] = 0.2
+# Final stretch before the deadline spent busy-waiting instead of sleeping
+DEFAULT_SPIN: Final[float] = 0.002
+MAX_REPORTS: Final[int] = 100
+
+
+@dataclass(frozen=True)
+class ScheduledTimeSet:
+    target: float  # Unix time encoded in the packet, i.e. when it should land
+    link_delay: float  # one-way delay the release was advanced by
+    release_error: float  # actual minus planned release, in seconds
+
+    @property
+    def release_error_ms(self) -> float:
+        return self.release_error * 1000
+
+
+class TimeSetScheduler:
+    def __init__(
+        self,
+        lead: float = DEFAULT_LEAD,
+        spin: float = DEFAULT_SPIN,
+        clock: Callable[[], float] = time.perf_counter,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.lead = lead
+        self.spin = spin
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.reports: deque[ScheduledTimeSet] = deque(maxlen=MAX_REPORTS)
+
+    def plan(self, link_delay: float = 0.0) -> tuple[float, float]:
+        """
+        Returns (target, deadline): the whole-second Unix time to encode and
+        the clock() reading at which to start the write.
+        """
+        now_clock = self.clock()
+        now_wall = self.wall_clock()
+        target = float(math.ceil(now_wall + link_delay + self.lead))
+        return target, now_clock + (target - link_delay - now_wall)
+
+    async def wait_until(self, deadline: float) -> float:
+        """Waits for deadline on clock(); returns how late it returned, in seconds."""
+        remaining = deadline - self.spin - self.clock()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        while self.clock() < deadline:
+            pass
+        return self.clock() - deadline
+
+    def record(self, target: float, link_delay: float, release_error: float) -> ScheduledTimeSet:
+        report = ScheduledTimeSet(target, link_delay, release_error)
+        self.reports.append(report)
+        logger.info(
+            f"Scheduled time set for {target:.0f}: released {report.release_error_ms:.3f}ms "
+            f"after deadline, link delay {link_delay * 1000:.1f}ms"
+        )
+        return report
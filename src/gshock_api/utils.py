@@ -8,19 +8,34 @@ hex_prefix: Final[str] = "0x"
 # Constant for the null character used in trimming
 null_char: Final[str] = "\0"
 
+# Anything that can be written to the watch. Strings are compact hex and are
+# only accepted for backward compatibility.
+ByteData = bytes | bytearray | memoryview | str
+
+
+def as_bytes(data: ByteData) -> bytes:
+    """
+    Returns data as bytes. Bytes-like input is passed through without copying
+    when it is already bytes; compact hex strings go through to_casio_cmd.
+    """
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, (bytearray, memoryview)):
+        return bytes(data)
+    return to_casio_cmd(data)
+
 
 def to_casio_cmd(bytes_str: str) -> bytes:
     """
     Converts a compact hexadecimal string (e.g., 'A3010C') into a bytes object.
     """
-    # Split the string into two-character parts ('A3', '01', '0C')
-    parts: list[str] = [bytes_str[i: i + 2] for i in range(0, len(bytes_str), 2)]
-    
-    # Convert each part to an integer from base 16
-    hex_arr: list[int] = [int(s, 16) for s in parts]
-    
-    # Return the final bytes object
-    return bytes(hex_arr)
+    try:
+        return bytes.fromhex(bytes_str)
+    except ValueError:
+        # Odd-length strings such as '301' are split into two-character parts
+        # ('30', '1'), as they always have been.
+        parts: list[str] = [bytes_str[i: i + 2] for i in range(0, len(bytes_str), 2)]
+        return bytes(int(s, 16) for s in parts)
 
 
 def to_int_array(hex_str: str) -> list[int]:
@@ -64,8 +79,9 @@ def to_hex_string(byte_arr: bytes | bytearray | Sequence[int]) -> str:
     Converts a bytes-like object or sequence of integers into a space-separated 
     hexadecimal string with '0x' prefix (e.g., b'\x01\x2A' -> '0x01 2A').
     """
-    hex_parts: str = " ".join(format(x, "02X") for x in byte_arr)
-    return f"{hex_prefix}{hex_parts}"
+    if not isinstance(byte_arr, (bytes, bytearray)):
+        byte_arr = bytes(byte_arr)
+    return f"{hex_prefix}{byte_arr.hex(' ').upper()}"
 
 
 def remove_prefix(input_string: str, prefix: str) -> str:
@@ -0,0 +1,434 @@
+"""
+Emulated G-Shock peripheral for running the library without Bluetooth.
+
+VirtualWatch answers the same GATT traffic a real watch does, as seen in the
+btsnoop captures under test_data/:
+
+  * reads on READ_REQUEST (0x0C) are answered with a notification on
+    ALL_FEATURES (0x0E), e.g. "1F01" -> "1F 01 <city name>"
+  * writes on ALL_FEATURES are stored and returned by later reads
+  * GW-BX5600 / GMW-BZ5000 SP_REQUEST (0x17) reads are answered on SP_DATA (0x19)
+  * ABL-100 activity records are announced on DATA_REQUEST_SP (0x11) and
+    streamed in MTU-sized fragments on CONVOY (0x14)
+  * analogue models (MTG-B1000, MTG-B3000) send their replies inside a 0x28
+    envelope, alternating between the two forms AnalogueProtocol unwraps:
+    "28 00 00 <reply>" and "28 01 00 00 <reply>"
+
+VirtualWatch.client has the BleakClient constructor signature, so it can be
+passed to Connection as client_factory. Latency, jitter and notification loss
+are set per watch with LinkConditions and are reproducible for a given seed.
+"""
+
+import asyncio
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+import random
+import struct
+import time
+from typing import Final
+
+from gshock_api.casio_constants import CasioConstants
+from gshock_api.logger import logger
+from gshock_api.message_dispatcher import MessageDispatcher
+from gshock_api.pending_requests import INDEXED_KEYS
+from gshock_api.watch_info import (
+    ANALOGUE,
+    ModelInfo,
+    WatchModel,
+    resolve_model,
+    resolve_model_info,
+)
+
+CASIO_SERVICE: Final[str] = "26eb0000-b012-49a8-b1f8-394fb2032b0f"
+GENERIC_ACCESS_SERVICE: Final[str] = "00001800-0000-1000-8000-00805f9b34fb"
+TX_POWER_SERVICE: Final[str] = "00001804-0000-1000-8000-00805f9b34fb"
+
+READ_REQUEST: Final[str] = CasioConstants.CASIO_READ_REQUEST_FOR_ALL_FEATURES_CHARACTERISTIC_UUID
+ALL_FEATURES: Final[str] = CasioConstants.CASIO_ALL_FEATURES_CHARACTERISTIC_UUID
+DATA_REQUEST_SP: Final[str] = CasioConstants.CASIO_DATA_REQUEST_SP_CHARACTERISTIC_UUID
+CONVOY: Final[str] = CasioConstants.CASIO_CONVOY_CHARACTERISTIC_UUID
+SP_REQUEST: Final[str] = CasioConstants.CASIO_SET_CONFIGURATION_CHARACTERISTIC_UUID
+SP_DATA: Final[str] = CasioConstants.CASIO_GET_CONFIGURATION_CHARACTERISTIC_UUID
+
+SP_MODELS: Final[frozenset[WatchModel]] = frozenset({WatchModel.GW_BX5600, WatchModel.GMW_BZ5000})
+# Envelopes of analogue replies, as AnalogueProtocol.unwrap_payload expects them
+WRAPPER: Final[int] = 0x28
+WRAPPER_HEADERS: Final[tuple[bytes, bytes]] = (bytes([WRAPPER, 0x00, 0x00]), bytes([WRAPPER, 0x01, 0x00, 0x00]))
+
+CURRENT_TIME: Final[int] = CasioConstants.CHARACTERISTICS["CASIO_CURRENT_TIME"]
+# DATA_REQUEST_SP commands are <command> <category> ...; 00 11 starts an activity transfer
+DRSP_START: Final[int] = 0x00
+DRSP_CATEGORY_EXERCISE: Final[int] = 0x11
+
+# GwBx5600TimeIO reads on SP_REQUEST: command -> (reply body, reply length)
+SP_REGISTERS: Final[dict[int, tuple[str, int]]] = {
+    0x05: ("0F001D00010606E9760000FFFFFFFFFFFF0F00", 101),
+    0x03: ("07001E00E97604040207001E01000000000007", 28),
+}
+# Answered with one 22-byte record per (0x1F, slot) pair in the request
+SP_CITY_RECORDS: Final[int] = 0x06
+
+ACTIVITY_RECORD_LENGTH: Final[int] = 400
+ATT_HEADER_SIZE: Final[int] = 3
+
+DEFAULT_CITIES: Final[tuple[str, ...]] = ("TOKYO", "LONDON", "NEW YORK", "PARIS", "SYDNEY", "LOS ANGELES")
+
+# A notification the watch sends: (characteristic uuid, value)
+Notification = tuple[str, bytes]
+
+
+def _bleak_error(message: str) -> Exception:
+    """A BleakError; bleak is only imported once an error is raised, as elsewhere in the package."""
+    from bleak.exc import BleakError  # noqa: PLC0415
+
+    return BleakError(message)
+
+
+@dataclass(frozen=True)
+class LinkConditions:
+    """Radio link model. latency is one way, in seconds; loss drops notifications."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    loss: float = 0.0
+    mtu: int = 247
+
+
+IDEAL_LINK: Final[LinkConditions] = LinkConditions()
+
+
+@dataclass(frozen=True)
+class VirtualCharacteristic:
+    uuid: str
+    properties: tuple[str, ...]
+    handle: int  # ATT handle, as in the captures
+
+
+NotifyCallback = Callable[[VirtualCharacteristic, bytearray], None]
+
+
+@dataclass(frozen=True)
+class VirtualService:
+    uuid: str
+    characteristics: tuple[VirtualCharacteristic, ...]
+
+
+def _record(key: int, index: int, body: bytes, size: int) -> bytes:
+    return (bytes([key, index]) + body).ljust(size, b"\x00")[:size]
+
+
+def _ascii(text: str, size: int) -> bytes:
+    return text.encode("ascii")[:size].ljust(size, b"\x00")
+
+
+def default_registers(name: str, info: ModelInfo, cities: Sequence[str] = DEFAULT_CITIES) -> dict[bytes, bytes]:
+    """Responses a freshly reset watch gives to READ_REQUEST, keyed by request bytes."""
+    registers: dict[bytes, bytes] = {
+        b"\x22": bytes.fromhex("22CF148F33D36D666E400002"),
+        b"\x23": b"\x23" + _ascii(name, 19),
+        b"\x11": bytes.fromhex("110F0F0F0600500004000100001E03"),
+        b"\x13": bytes.fromhex("130001000000000000000000"),
+        b"\x15": bytes.fromhex("1500000000"),
+        b"\x16": bytes.fromhex("16" + "00" * 16),
+        b"\x18": bytes.fromhex("18000A00").ljust(15 if info.protocol_name == ANALOGUE else 8, b"\x00"),
+        b"\x20": bytes.fromhex("2023020101000000000000000317000000000000"),
+        b"\x26": bytes.fromhex("262CEA7F0145231240218F00000671FFFF"),
+        b"\x28": bytes.fromhex("281716000000020000"),
+    }
+    for state in (0, 2, 4):
+        registers[bytes([0x1D, state])] = _record(0x1D, state, bytes.fromhex("0106062676C500"), 15)
+    for slot in range(max(info.worldCitiesCount, info.dstCount)):
+        registers[bytes([0x1E, slot])] = _record(0x1E, slot, bytes.fromhex("2676160400"), 7)
+        city = cities[slot % len(cities)]
+        registers[bytes([0x1F, slot])] = _record(0x1F, slot, _ascii(city, 18), 20)
+        registers[bytes([0x24, slot])] = _record(
+            0x24, slot, bytes.fromhex("014023F438BA5BB1014053123A35F15395"), 20
+        )
+    for slot in range(1, 6):
+        registers[bytes([0x30, slot])] = _record(0x30, slot, b"\xff" * 18, 20)
+        registers[bytes([0x31, slot])] = _record(0x31, slot, b"", 11)
+    return registers
+
+
+def activity_record(rng: random.Random, now: time.struct_time | None = None) -> bytes:
+    """Builds a 400-byte ABL-100 activity record (key 0x26) with random step counts."""
+    now = now or time.localtime()
+    header = bytes([0x26, now.tm_wday, now.tm_mon, now.tm_mday, 0x00, 0x00])
+    hourly = struct.pack("<144H", *(rng.randrange(0, 600) for _ in range(144)))
+    daily = struct.pack("<14I", *(rng.randrange(0, 15000) for _ in range(14)))
+    today = struct.pack("<I", rng.randrange(0, 15000))
+    return (header + hourly + b"\x00" * 24 + daily + today).ljust(ACTIVITY_RECORD_LENGTH, b"\x00")
+
+
+class VirtualWatch:
+    """
+    One emulated watch. Its state (registers, received writes, last time set)
+    survives reconnects, like a real watch.
+    """
+
+    def __init__(
+        self,
+        name: str = "CASIO GW-B5600",
+        address: str = "00:00:00:00:00:01",
+        link: LinkConditions = IDEAL_LINK,
+        seed: int = 0,
+        button: int = 0x04,  # right button, see ButtonPressedIOFunctional.decode
+    ) -> None:
+        self.name = name
+        self.address = address
+        self.link = link
+        self.model: WatchModel = resolve_model(name)
+        self.info: ModelInfo = resolve_model_info(self.model)
+        self.rng = random.Random(seed)  # noqa: S311 - reproducible link noise, not secrets
+        self.registers = default_registers(name, self.info)
+        self.registers[b"\x10"] = bytes.fromhex("1026E04E2C02D37F") + bytes([button]) + bytes.fromhex(
+            "030FFFFFFFFF27000000"
+        )
+        self.activity = activity_record(self.rng)
+        self.sp_writes: list[bytes] = []
+        self.time_set: bytes | None = None
+        self.connections = 0
+        self.wrap_replies = self.info.protocol_name == ANALOGUE
+        self.wrapped = 0  # replies sent in a 0x28 envelope
+        self._write_handlers: dict[str, Callable[[bytes], list[Notification]]] = {
+            READ_REQUEST: self._on_read_request,
+            ALL_FEATURES: self._on_all_features,
+            SP_REQUEST: self._on_sp_request,
+            SP_DATA: self._on_sp_data,
+            DATA_REQUEST_SP: self._on_data_request,
+        }
+
+    def client(
+        self, _address: object = None, services: Iterable[str] | None = None, **_kwargs: object
+    ) -> "VirtualBleakClient":
+        """Drop-in for the BleakClient constructor, bound to this watch."""
+        return VirtualBleakClient(self, services)
+
+    def gatt(self) -> tuple[VirtualService, ...]:
+        def char(uuid: str, handle: int, *properties: str) -> VirtualCharacteristic:
+            return VirtualCharacteristic(uuid, properties, handle)
+
+        casio = [
+            char(READ_REQUEST, CasioConstants.HANDLE_READ_ALL_FEATURES, "write-without-response"),
+            char(ALL_FEATURES, CasioConstants.HANDLE_ALL_FEATURES_WRITE, "write", "notify"),
+            char(
+                CasioConstants.CASIO_NOTIFICATION_CHARACTERISTIC_UUID,
+                CasioConstants.HANDLE_ALL_FEATURES_NOTIFICATION,
+                "write-without-response",
+            ),
+            char(DATA_REQUEST_SP, CasioConstants.HANDLE_DATA_REQUEST_SP, "write", "notify"),
+            char(CONVOY, CasioConstants.HANDLE_CONVOY_NOTIFICATION, "write-without-response", "notify"),
+        ]
+        if self.model in SP_MODELS:
+            casio += [
+                char(SP_REQUEST, CasioConstants.HANDLE_SP_REQUEST, "write-without-response"),
+                char(SP_DATA, CasioConstants.HANDLE_SP_DATA, "write", "notify"),
+            ]
+
+        return (
+            VirtualService(
+                GENERIC_ACCESS_SERVICE,
+                (
+                    char(CasioConstants.CASIO_GET_DEVICE_NAME, CasioConstants.HANDLE_DEVICE_NAME_LEGACY, "read"),
+                    char(CasioConstants.CASIO_APPEARANCE, CasioConstants.HANDLE_APPEARANCE, "read"),
+                ),
+            ),
+            VirtualService(
+                TX_POWER_SERVICE,
+                (char(CasioConstants.TX_POWER_LEVEL_CHARACTERISTIC_UUID, CasioConstants.HANDLE_TX_POWER, "read"),),
+            ),
+            VirtualService(CASIO_SERVICE, tuple(casio)),
+        )
+
+    def respond(self, uuid: str, data: bytes) -> list[Notification]:
+        """Applies a write and returns the notifications the watch sends back."""
+        handler = self._write_handlers.get(uuid)
+        if not data or handler is None:
+            return []
+        return handler(data)
+
+    def _on_read_request(self, data: bytes) -> list[Notification]:
+        response = self.registers.get(data[:2]) or self.registers.get(data[:1])
+        return [(ALL_FEATURES, self._wrap(response))] if response else []
+
+    def _on_all_features(self, data: bytes) -> list[Notification]:
+        if data[0] == CURRENT_TIME:
+            self.time_set = data
+        else:
+            register = data[:2] if data[0] in INDEXED_KEYS else data[:1]
+            self.registers[register] = data
+        return []
+
+    def _on_sp_request(self, data: bytes) -> list[Notification]:
+        return [(SP_DATA, chunk) for chunk in self._fragments(self._sp_response(data))]
+
+    def _on_sp_data(self, data: bytes) -> list[Notification]:
+        self.sp_writes.append(data)
+        return []
+
+    def _on_data_request(self, data: bytes) -> list[Notification]:
+        command, category = data[0], data[1:2]
+        if command != DRSP_START or not category:
+            return []
+        if category[0] != DRSP_CATEGORY_EXERCISE:
+            return [(DATA_REQUEST_SP, bytes([DRSP_START, category[0], 0, 0, 0, 0, 0]))]
+        size = len(self.activity).to_bytes(3, "little")
+        announce = bytes([DRSP_START, DRSP_CATEGORY_EXERCISE]) + size + b"\x00\x00"
+        return [(DATA_REQUEST_SP, announce)] + [(CONVOY, c) for c in self._fragments(self.activity)]
+
+    def _wrap(self, reply: bytes) -> bytes:
+        """Puts an analogue model's reply in a 0x28 envelope, alternating the two forms."""
+        if not self.wrap_replies or reply[0] == WRAPPER or reply[0] not in MessageDispatcher.data_received_messages:
+            return reply
+        self.wrapped += 1
+        return WRAPPER_HEADERS[self.wrapped % 2] + reply
+
+    def _sp_response(self, request: bytes) -> bytes:
+        command = request[0]
+        if command == SP_CITY_RECORDS:
+            records = b"".join(
+                bytes([0x14, 0x00, 0x1F, slot])
+                + _ascii(DEFAULT_CITIES[slot % len(DEFAULT_CITIES)], 18)
+                for slot in request[2::2]
+            )
+            return bytes([SP_CITY_RECORDS]) + records
+        if command not in SP_REGISTERS:
+            return b""
+        body, length = SP_REGISTERS[command]
+        return (bytes([command]) + bytes.fromhex(body)).ljust(length, b"\x00")
+
+    def _fragments(self, payload: bytes) -> list[bytes]:
+        size = max(self.link.mtu - ATT_HEADER_SIZE, 1)
+        return [payload[i : i + size] for i in range(0, len(payload), size)]
+
+    def delay(self) -> float:
+        jitter = self.rng.uniform(-self.link.jitter, self.link.jitter) if self.link.jitter else 0.0
+        return max(self.link.latency + jitter, 0.0)
+
+    def lost(self) -> bool:
+        return self.link.loss > 0 and self.rng.random() < self.link.loss
+
+
+@dataclass
+class _Subscription:
+    characteristic: VirtualCharacteristic
+    callback: NotifyCallback
+
+
+class VirtualBleakClient:
+    """The subset of BleakClient that Connection uses, talking to a VirtualWatch."""
+
+    def __init__(self, watch: VirtualWatch, services: Iterable[str] | None = None) -> None:
+        self.watch = watch
+        wanted = set(services) if services is not None else None
+        self.services: tuple[VirtualService, ...] = tuple(
+            s for s in watch.gatt() if wanted is None or s.uuid in wanted
+        )
+        self._characteristics = {c.uuid: c for s in self.services for c in s.characteristics}
+        self._subscriptions: dict[str, _Subscription] = {}
+        self._outbox: asyncio.Queue[tuple[float, str, bytes]] = asyncio.Queue()
+        self._delivery: asyncio.Task[None] | None = None
+        self._connected = False
+
+    @property
+    def address(self) -> str:
+        return self.watch.address
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self, **_kwargs: object) -> bool:
+        await asyncio.sleep(self.watch.delay() * 2)
+        self._connected = True
+        self.watch.connections += 1
+        self._delivery = asyncio.create_task(self._deliver())
+        return True
+
+    async def disconnect(self) -> bool:
+        self._connected = False
+        self._subscriptions.clear()
+        if self._delivery is not None:
+            self._delivery.cancel()
+            self._delivery = None
+        return True
+
+    async def start_notify(self, uuid: str, callback: NotifyCallback, **_kwargs: object) -> None:
+        characteristic = self._characteristic(uuid)
+        if "notify" not in characteristic.properties and "indicate" not in characteristic.properties:
+            raise _bleak_error(f"Characteristic {uuid} does not support notifications")
+        self._subscriptions[uuid] = _Subscription(characteristic, callback)
+
+    async def stop_notify(self, uuid: str) -> None:
+        self._subscriptions.pop(uuid, None)
+
+    async def read_gatt_char(self, uuid: str, **_kwargs: object) -> bytearray:
+        self._characteristic(uuid)
+        await asyncio.sleep(self.watch.delay() * 2)
+        if uuid == CasioConstants.CASIO_GET_DEVICE_NAME:
+            return bytearray(self.watch.name.encode("ascii"))
+        return bytearray()
+
+    async def write_gatt_char(self, uuid: str, data: bytes | bytearray, response: bool = False) -> None:
+        if not self._connected:
+            raise _bleak_error("Not connected")
+        self._characteristic(uuid)
+
+        arrival = time.monotonic() + self.watch.delay()
+        for notify_uuid, payload in self.watch.respond(uuid, bytes(data)):
+            self._outbox.put_nowait((arrival + self.watch.delay(), notify_uuid, payload))
+
+        if response:
+            # Wait for the write response to travel back
+            await asyncio.sleep(max(arrival - time.monotonic(), 0.0) + self.watch.delay())
+
+    def _characteristic(self, uuid: str) -> VirtualCharacteristic:
+        characteristic = self._characteristics.get(uuid)
+        if characteristic is None:
+            raise _bleak_error(f"Characteristic {uuid} was not found!")
+        return characteristic
+
+    async def _deliver(self) -> None:
+        """Delivers notifications in order, each no earlier than its due time."""
+        while True:
+            due, uuid, payload = await self._outbox.get()
+            wait = due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            subscription = self._subscriptions.get(uuid)
+            if subscription is None or self.watch.lost():
+                logger.debug(f"VirtualWatch {self.watch.address}: notification {payload[:4].hex()} dropped")
+                continue
+            subscription.callback(subscription.characteristic, bytearray(payload))
+
+
+@dataclass
+class VirtualFleet:
+    """A set of virtual watches with distinct addresses, e.g. for load tests."""
+
+    watches: list[VirtualWatch] = field(default_factory=list)
+
+    @classmethod
+    def of(
+        cls, names: Sequence[str], count: int, link: LinkConditions = IDEAL_LINK, seed: int = 0
+    ) -> "VirtualFleet":
+        return cls([
+            VirtualWatch(
+                name=names[i % len(names)],
+                address=f"00:00:00:{(i >> 16) & 0xFF:02X}:{(i >> 8) & 0xFF:02X}:{i & 0xFF:02X}",
+                link=link,
+                seed=seed + i,
+            )
+            for i in range(count)
+        ])
+
+    def client(
+        self, address: object, services: Iterable[str] | None = None, **kwargs: object
+    ) -> VirtualBleakClient:
+        """BleakClient-compatible factory that routes by address."""
+        key = getattr(address, "address", address)
+        for watch in self.watches:
+            if watch.address == key:
+                return watch.client(address, services, **kwargs)
+        raise _bleak_error(f"Device with address {key} was not found")
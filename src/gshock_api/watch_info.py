@@ -1,11 +1,11 @@
-from dataclasses import dataclass, field
+from dataclasses import InitVar, dataclass
 from enum import Enum, auto
-from typing import Any
+from functools import cached_property
+import importlib
+from typing import TYPE_CHECKING, Any, Final
 
-from gshock_api.protocols.analogue_protocol import AnalogueProtocol
-from gshock_api.protocols.mip_protocol import MipProtocol
-from gshock_api.protocols.standard_protocol import StandardProtocol
-from gshock_api.protocols.watch_protocol import WatchProtocol
+if TYPE_CHECKING:
+    from gshock_api.protocols.watch_protocol import WatchProtocol
 
 
 class WatchModel(Enum):
@@ -34,10 +34,50 @@ class WatchModel(Enum):
     UNKNOWN = auto()  # Legacy fallback alias for GENERIC
 
 
-# Standard protocol instances for ModelInfo defaults
-STANDARD_PROTOCOL = StandardProtocol()
-MIP_PROTOCOL = MipProtocol()
-ANALOGUE_PROTOCOL = AnalogueProtocol()
+STANDARD: Final[str] = "standard"
+MIP: Final[str] = "mip"
+ANALOGUE: Final[str] = "analogue"
+
+# Protocol classes by name. Each is instantiated once, on first use, since
+# the protocol modules pull in most of iolib.
+PROTOCOL_CLASSES: Final[dict[str, str]] = {
+    STANDARD: "gshock_api.protocols.standard_protocol:StandardProtocol",
+    MIP: "gshock_api.protocols.mip_protocol:MipProtocol",
+    ANALOGUE: "gshock_api.protocols.analogue_protocol:AnalogueProtocol",
+}
+_protocols: dict[str, "WatchProtocol"] = {}
+
+# Module attributes kept for callers of the former eager instances
+_PROTOCOL_ALIASES: Final[dict[str, str]] = {
+    "STANDARD_PROTOCOL": STANDARD,
+    "MIP_PROTOCOL": MIP,
+    "ANALOGUE_PROTOCOL": ANALOGUE,
+}
+
+
+def get_protocol(name: str) -> "WatchProtocol":
+    protocol = _protocols.get(name)
+    if protocol is None:
+        module, class_name = PROTOCOL_CLASSES[name].split(":")
+        protocol = _protocols[name] = getattr(importlib.import_module(module), class_name)()
+    return protocol
+
+
+def _protocol_name(protocol: "WatchProtocol") -> str:
+    """Name under which protocol is served, registering protocols outside PROTOCOL_CLASSES."""
+    target = f"{type(protocol).__module__}:{type(protocol).__qualname__}"
+    for name, known in PROTOCOL_CLASSES.items():
+        if known == target:
+            return name
+    PROTOCOL_CLASSES[target] = target
+    _protocols.setdefault(target, protocol)
+    return target
+
+
+def __getattr__(name: str) -> "WatchProtocol":
+    if name in _PROTOCOL_ALIASES:
+        return get_protocol(_PROTOCOL_ALIASES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @dataclass
@@ -76,8 +116,21 @@ class ModelInfo:
     hasTimeFormat: bool = True
     hasHourlyChime: bool = True
     hasLongTimerKey: bool = False
+    # Issue all time-set preamble reads before writing any of them back
+    pipelinedTimeSet: bool = True  # noqa: N815 - named like the other capability flags
     settingsSize: int = 17
-    protocol: WatchProtocol = field(default_factory=lambda: STANDARD_PROTOCOL)
+    protocol_name: str = STANDARD  # key of PROTOCOL_CLASSES
+    # Former field, still accepted as ModelInfo(protocol=<instance>). Its
+    # default is the property below, which __post_init__ takes as "not given".
+    protocol: InitVar["WatchProtocol | None"] = None
+
+    def __post_init__(self, protocol: "WatchProtocol | property | None") -> None:
+        if protocol is not None and not isinstance(protocol, property):
+            self.protocol_name = _protocol_name(protocol)
+
+    @property  # type: ignore[no-redef]
+    def protocol(self) -> "WatchProtocol":  # noqa: F811 - replaces the InitVar once the class is built
+        return get_protocol(self.protocol_name)
 
 
 _MODEL_LIST: list[ModelInfo] = [
@@ -112,7 +165,7 @@ _MODEL_LIST: list[ModelInfo] = [
         batteryLevelLowerLimit=14, batteryLevelUpperLimit=24,
         hasMultipleFonts=True,
         hasNewTimeFormat=True,
-        protocol=MIP_PROTOCOL,
+        protocol_name=MIP,
     ),
     ModelInfo(
         model=WatchModel.MTG_B1000,
@@ -123,7 +176,8 @@ _MODEL_LIST: list[ModelInfo] = [
         hasSecondDial=True,
         hasFineWatchCondition=True,
         hasHourlyChime=False,
-        protocol=ANALOGUE_PROTOCOL,
+        pipelinedTimeSet=False,  # 0x28-wrapped replies, not verified out of order
+        protocol_name=ANALOGUE,
     ),
     ModelInfo(
         model=WatchModel.MTG_B3000,
@@ -139,7 +193,8 @@ _MODEL_LIST: list[ModelInfo] = [
         hasPowerSavingMode=False,
         hasHourlyChime=False,
         hasLongTimerKey=True,
-        protocol=ANALOGUE_PROTOCOL,
+        pipelinedTimeSet=False,  # 0x28-wrapped replies, not verified out of order
+        protocol_name=ANALOGUE,
     ),
     ModelInfo(
         model=WatchModel.MRG_B5000,
@@ -444,6 +499,7 @@ class WatchInfo:
         self.short_name = derive_short_name(name)
         self.model = resolve_model(name)
         self.info = resolve_model_info(self.model)
+        self.__dict__.pop("protocol", None)
 
     def lookup_watch_info(self, name: str) -> dict[str, Any]:
         short_name = derive_short_name(name)
@@ -479,6 +535,7 @@ class WatchInfo:
         self.address = ""
         self.model = WatchModel.GENERIC
         self.info = resolve_model_info(WatchModel.GENERIC)
+        self.__dict__.pop("protocol", None)
 
     # Capability properties forwarded from self.info
     @property
@@ -617,12 +674,18 @@ class WatchInfo:
     def hasLongTimerKey(self) -> bool:
         return self.info.hasLongTimerKey
 
+    @property
+    def pipelinedTimeSet(self) -> bool:  # noqa: N802 - named like the other capability flags
+        return self.info.pipelinedTimeSet
+
     @property
     def settingsSize(self) -> int:
         return self.info.settingsSize
 
-    @property
-    def protocol(self) -> WatchProtocol:
+    @cached_property
+    def protocol(self) -> "WatchProtocol":
+        # Kept in the instance until the model changes, so the dispatcher's
+        # per-frame lookup is a plain attribute read
         return self.info.protocol
 
     def __getattr__(self, item: str) -> Any:
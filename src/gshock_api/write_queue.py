@@ -0,0 +1,113 @@
+"""
+Outgoing GATT writes of one connection, sent in order.
+
+Writes without response (Connection.NO_RESPONSE_HANDLES) are queued and the
+caller continues at once, so a run of them goes out back to back instead of
+each one waiting for the BLE stack to return. Writes with response still
+wait for the watch's acknowledgement, which also guarantees that everything
+queued before them has been sent. flush() is a barrier for the whole queue.
+
+A queued write that fails has no caller left to tell, so its error is
+raised from the next write or flush instead. Ignorable errors (see
+GShockIgnorableException) are only logged.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+from gshock_api.exceptions import GShockConnectionError, GShockIgnorableException
+from gshock_api.logger import logger
+
+# Sends one write: (handle, data, response)
+SendFunction = Callable[[int, bytes, bool], Awaitable[None]]
+
+QueuedWrite = tuple[int, bytes, bool, "asyncio.Future[None] | None"]
+
+
+class WriteQueue:
+    def __init__(self, send: SendFunction) -> None:
+        self._send = send
+        self._queue: deque[QueuedWrite] = deque()
+        self._task: asyncio.Task[None] | None = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._error: Exception | None = None
+        # Statistics
+        self.queued = 0  # writes that did not make their caller wait
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    async def put(self, handle: int, data: bytes, response: bool) -> None:
+        """Sends data, or queues it if it is a write without response."""
+        self._raise_deferred()
+
+        if response and self._idle.is_set():
+            # Nothing ahead of it: send inline, without a task switch before a timed write
+            self._idle.clear()
+            try:
+                await self._send(handle, data, True)
+            finally:
+                self._drain_or_idle()
+            return
+
+        future = asyncio.get_running_loop().create_future() if response else None
+        self._queue.append((handle, data, response, future))
+        self.max_depth = max(self.max_depth, len(self._queue))
+        if future is None:
+            self.queued += 1
+        if self._idle.is_set():
+            self._idle.clear()
+            self._drain_or_idle()
+        if future is not None:
+            await future
+
+    async def flush(self) -> None:
+        """Waits until every queued write has been sent."""
+        await self._idle.wait()
+        self._raise_deferred()
+
+    def close(self, reason: str) -> None:
+        """Drops queued writes; writers waiting for an acknowledgement get GShockConnectionError."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        while self._queue:
+            future = self._queue.popleft()[3]
+            if future is not None and not future.done():
+                future.set_exception(GShockConnectionError(reason))
+        self._error = None
+        self._idle.set()
+
+    def _drain_or_idle(self) -> None:
+        if self._queue:
+            self._task = asyncio.create_task(self._drain())
+        else:
+            self._task = None
+            self._idle.set()
+
+    async def _drain(self) -> None:
+        while self._queue:
+            handle, data, response, future = self._queue.popleft()
+            try:
+                await self._send(handle, data, response)
+            except Exception as e:
+                if future is not None:
+                    if not future.done():
+                        future.set_exception(e)
+                elif isinstance(e, GShockIgnorableException):
+                    logger.debug("Queued write to 0x%02X failed, ignored: %s", handle, e)
+                elif self._error is None:
+                    self._error = e
+            else:
+                if future is not None and not future.done():
+                    future.set_result(None)
+        self._task = None
+        self._idle.set()
+
+    def _raise_deferred(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
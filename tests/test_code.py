@@ -1,22 +1,110 @@
-from datetime import datetime
-from typing import TYPE_CHECKING
+import asyncio
+from collections.abc import Callable
+from datetime import date, datetime
+import json
+import os
+from pathlib import Path
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from typing import TYPE_CHECKING, ClassVar
 import unittest
 
+from gshock_api import message_dispatcher, watch_info as watch_info_module
+from gshock_api.app_notification import AppNotification, NotificationType
+from gshock_api.btsnoop import AttIndex, AttOpcode, BtsnoopCapture
+from gshock_api.casio_constants import CasioConstants
+from gshock_api.casio_time_zone_helper import CasioTimeZoneHelper
+from gshock_api.commands import (
+    SetAlarms,
+    SetTime,
+    SetTimeAdjustment,
+    SetTimer,
+    WatchCommand,
+    from_json,
+)
+from gshock_api.connection import Connection
+from gshock_api.continuous_scanner import CASIO_SERVICE_UUID, ContinuousScanner
+from gshock_api.exceptions import GShockConnectionError, GShockTimeoutError
+from gshock_api.fleet_benchmark import run_fleet_benchmark
+from gshock_api.fragment_buffer import FragmentBuffer
+from gshock_api.gatt_cache import GATT_CACHE_VERSION, GattCache
+from gshock_api.instrumentation import (
+    API,
+    CONNECT,
+    Instrumentation,
+    LatencyHistogram,
+    OperationEvent,
+    Traffic,
+    instrumented,
+)
 from gshock_api.iolib.alarms_io import AlarmsIOFunctional
 from gshock_api.iolib.app_info_io import AppInfoIOFunctional
-from gshock_api.iolib.button_pressed_io import ButtonPressedIOFunctional, WatchButton
+from gshock_api.iolib.app_notification_io import AppNotificationIO
+from gshock_api.iolib.button_pressed_io import (
+    ButtonPressedIO,
+    ButtonPressedIOFunctional,
+    WatchButton,
+)
 from gshock_api.iolib.dst_for_world_cities_io import DstForWorldCitiesIOFunctional
 from gshock_api.iolib.dst_watch_state_io import DstWatchStateIOFunctional
-
-if TYPE_CHECKING:
-    from gshock_api.iolib.settings_io import SettingsDict
+from gshock_api.iolib.events_io import EventsIOFunctional
+from gshock_api.iolib.gw_bx5600_time_io import GwBx5600TimeIO
 from gshock_api.iolib.settings_io import SettingsIOFunctional
+from gshock_api.iolib.step_counter_io import END_TRANSACTION_CMD, StepCounterIO, StepCounterIOFunctional
 from gshock_api.iolib.time_adjustment_io import TimeAdjustmentIOFunctional
-from gshock_api.iolib.time_io import TimeEncoder, TimeEncoderPure, TimeIOFunctional
+from gshock_api.iolib.time_io import (
+    TimeEncoder,
+    TimeEncoderPure,
+    TimeIO,
+    TimeIOFunctional,
+)
 from gshock_api.iolib.timer_io import TimerIOFunctional
-from gshock_api.iolib.watch_condition_io import WatchConditionIOFunctional
-from gshock_api.iolib.watch_name_io import WatchNameIOFunctional
-from gshock_api.iolib.world_cities_io import WorldCitiesIOFunctional
+from gshock_api.iolib.watch_condition_io import (
+    WatchConditionIO,
+    WatchConditionIOFunctional,
+)
+from gshock_api.iolib.watch_name_io import WatchNameIO, WatchNameIOFunctional
+from gshock_api.iolib.world_cities_io import WorldCitiesIO, WorldCitiesIOFunctional
+from gshock_api.link_latency import RoundTripEstimator
+from gshock_api.logger import Hex, logger
+from gshock_api.message_dispatcher import MessageDispatcher
+from gshock_api.metrics import GatewayMetrics
+from gshock_api.notification_queue import (
+    DECODE_INLINE,
+    DROP_NEWEST,
+    DROP_OLDEST,
+    NotificationQueue,
+)
+from gshock_api.pending_requests import PendingRequests
+from gshock_api.protocols.analogue_protocol import AnalogueProtocol
+from gshock_api.protocols.mip_protocol import MipProtocol
+from gshock_api.protocols.standard_protocol import StandardProtocol
+from gshock_api.protocols.watch_protocol import WatchProtocol
+from gshock_api.replay import CaptureReplay, ReplayConnection
+from gshock_api.session_manager import SessionManager
+from gshock_api.snapshot_cache import SnapshotCache
+from gshock_api.step_counter_data import StepCounterData
+from gshock_api.step_history import StepHistoryStore
+from gshock_api.time_scheduler import TimeSetScheduler
+from gshock_api.utils import ByteData, as_bytes, to_casio_cmd, to_hex_string
+from gshock_api.virtual_watch import LinkConditions, VirtualWatch, activity_record
+from gshock_api.watch_info import (
+    ANALOGUE,
+    STANDARD,
+    ModelInfo,
+    WatchInfo,
+    WatchModel,
+    watch_info,
+)
+from gshock_api.write_queue import WriteQueue
+
+if TYPE_CHECKING:
+    from gshock_api.iolib.settings_io import SettingsDict
 
 
 class TestGShockFunctionalAPI(unittest.TestCase):
@@ -65,7 +153,6 @@ class TestGShockFunctionalAPI(unittest.TestCase):
 
     # --- SettingsIO Tests ---
     def test_settings_encode_decode(self):
-        from gshock_api.watch_info import watch_info
         watch_info.set_name_and_model("CASIO GW-B5600")
         settings_dict: SettingsDict = {
             "time_format": "24h",
@@ -115,6 +202,15 @@ class TestGShockFunctionalAPI(unittest.TestCase):
         self.assertEqual(commands[0].handle, 0x000C)
         self.assertEqual(commands[0].data, b"\x18")
 
+    # --- Codec Tests ---
+    def test_as_bytes_accepts_bytes_and_compat_hex(self):
+        self.assertEqual(as_bytes(b"\x1d\x00"), b"\x1d\x00")
+        self.assertEqual(as_bytes(memoryview(b"\x1d\x00")), b"\x1d\x00")
+        self.assertEqual(as_bytes("1D00"), b"\x1d\x00")
+        # Legacy odd-length codes keep their historical meaning
+        self.assertEqual(to_casio_cmd("301"), b"\x30\x01")
+        self.assertEqual(to_hex_string([0x01, 0x2A]), "0x01 2A")
+
     # --- TimeAdjustmentIO Tests ---
     def test_time_adjustment_encode_decode(self):
         original_hex = "0x11 0F 0F 0F 06 00 50 00 04 00 01 00 80 10 D2"
@@ -210,7 +306,6 @@ class TestGShockFunctionalAPI(unittest.TestCase):
         self.assertEqual(set_commands[0].data, encoded)
 
     def test_mtg_b3000_settings_encode_decode(self):
-        from gshock_api.watch_info import watch_info, WatchModel
         watch_info.model = WatchModel.MTG_B3000
 
         settings_dict = {
@@ -237,11 +332,6 @@ class TestGShockFunctionalAPI(unittest.TestCase):
 
     # --- WatchInfo & Protocol Tests ---
     def test_watch_info_exact_lookup_and_protocols(self):
-        from gshock_api.watch_info import watch_info, WatchModel
-        from gshock_api.protocols.mip_protocol import MipProtocol
-        from gshock_api.protocols.analogue_protocol import AnalogueProtocol
-        from gshock_api.protocols.standard_protocol import StandardProtocol
-
         watch_info.set_name_and_model("CASIO GW-BX5600")
         self.assertEqual(watch_info.model, WatchModel.GW_BX5600)
         self.assertTrue(watch_info.hasNewTimeFormat)
@@ -263,11 +353,14 @@ class TestGShockFunctionalAPI(unittest.TestCase):
         self.assertIsInstance(watch_info.protocol, StandardProtocol)
         watch_info.reset()
 
+    def test_model_info_accepts_protocol_instance(self):
+        info = ModelInfo(model=WatchModel.MTG_B1000, protocol=AnalogueProtocol())
+        self.assertEqual(info.protocol_name, ANALOGUE)
+        self.assertIsInstance(info.protocol, AnalogueProtocol)
+        self.assertEqual(ModelInfo(model=WatchModel.GW).protocol_name, STANDARD)
+
     # --- Step Counter Tests ---
     def test_step_counter_data_and_parse(self):
-        from gshock_api.step_counter_data import StepCounterData
-        from gshock_api.iolib.step_counter_io import StepCounterIOFunctional
-
         unavail = StepCounterData.unavailable()
         self.assertEqual(unavail.current_day_steps, None)
         self.assertEqual(unavail.hourly_steps, [])
@@ -299,10 +392,25 @@ class TestGShockFunctionalAPI(unittest.TestCase):
         self.assertEqual(len(parsed.daily_history), 14)
         self.assertEqual(parsed.daily_history[0], 5000)
 
+    def test_step_counter_parse_batch_matches_parse(self):
+        records = [bytearray(_step_record(seed)) for seed in (7, 8, 9)]
+        records[1][6:8] = (0xFFFE).to_bytes(2, "little")  # unmeasured hour
+        payloads = [bytes(records[0]), b"\x26\x00", bytes(records[1]), bytes(records[2])]
+
+        batch = StepCounterIOFunctional.parse_batch(payloads)
+        self.assertEqual(len(batch), 3)
+        self.assertEqual(len(batch.hourly), 3 * 144)
+        self.assertEqual(len(batch.daily), 3 * 15)
+        for row, record in enumerate(records):
+            parsed = StepCounterIOFunctional.parse(bytes(record))
+            hourly = [None if v == StepCounterIOFunctional.HOURLY_MISSING else v for v in batch.hourly_row(row)]
+            self.assertEqual(hourly, parsed.hourly_steps)
+            self.assertEqual(list(batch.daily_row(row)), [*parsed.daily_history, parsed.current_day_steps])
+            self.assertEqual(batch.dates[row], (parsed.day_of_week, parsed.month, parsed.day_of_month))
+        self.assertIsNone(StepCounterIOFunctional.parse(bytes(records[1])).hourly_steps[0])
+
     # --- CasioTimeZoneHelper Tests ---
     def test_casio_time_zone_helper(self):
-        from gshock_api.casio_time_zone_helper import CasioTimeZoneHelper
-
         lat, lon, exact = CasioTimeZoneHelper.get_world_city_coordinates("Europe/Madrid")
         self.assertTrue(exact)
         self.assertAlmostEqual(lat, 41.4548, places=4)
@@ -314,8 +422,6 @@ class TestGShockFunctionalAPI(unittest.TestCase):
 
     # --- GwBx5600 Time IO City Records Test ---
     def test_gw_bx5600_city_records(self):
-        from gshock_api.iolib.gw_bx5600_time_io import GwBx5600TimeIO
-
         city_records = GwBx5600TimeIO._build_world_city_records()
         self.assertEqual(len(city_records), 66)  # 3 x 22 bytes
         self.assertEqual(city_records[0], 0x14)
@@ -325,5 +431,1100 @@ class TestGShockFunctionalAPI(unittest.TestCase):
         self.assertEqual(city_records[4], 0x01)  # Flag
 
 
+
+class FakeConnection:
+    """Records requests and writes; replies are injected by the test."""
+
+    def __init__(self, name: str = "CASIO GW-B5600") -> None:
+        self.pending = PendingRequests()
+        self.watch_info = WatchInfo()
+        self.watch_info.set_name_and_model(name)
+        self.snapshot_cache: SnapshotCache | None = None
+        self.latency: RoundTripEstimator | None = None
+        self.time_scheduler: TimeSetScheduler | None = None
+        self.requests: list[ByteData] = []
+        self.writes: list[tuple[int, ByteData]] = []
+
+    async def request(self, code: ByteData) -> None:
+        self.requests.append(code)
+
+    async def write(self, handle: int, data: ByteData) -> None:
+        self.writes.append((handle, data))
+
+    async def flush(self) -> None:
+        pass
+
+    async def send_message(self, message: WatchCommand | str) -> None:
+        await MessageDispatcher.send_to_watch(message, self)
+
+
+class TestPendingRequests(unittest.IsolatedAsyncioTestCase):
+    async def test_requests_resolved_per_connection_and_index(self):
+        watch_a, watch_b = FakeConnection(), FakeConnection()
+
+        tasks = [
+            asyncio.create_task(WorldCitiesIO.request(watch_a, 0)),
+            asyncio.create_task(WorldCitiesIO.request(watch_a, 1)),
+            asyncio.create_task(WorldCitiesIO.request(watch_b, 0)),
+        ]
+        await asyncio.sleep(0)
+        self.assertEqual(len(watch_a.pending), 2)
+        self.assertEqual(watch_a.requests, [b"\x1f\x00", b"\x1f\x01"])
+
+        # Replies arrive out of order and interleaved between watches
+        MessageDispatcher.on_received(b"\x1f\x01B", connection=watch_a)
+        MessageDispatcher.on_received(b"\x1f\x00C", connection=watch_b)
+        MessageDispatcher.on_received(b"\x1f\x00A", connection=watch_a)
+
+        results = await asyncio.gather(*tasks)
+        self.assertEqual(results, [b"\x1f\x00A", b"\x1f\x01B", b"\x1f\x00C"])
+        self.assertEqual(len(watch_a.pending), 0)
+        self.assertEqual(len(watch_b.pending), 0)
+
+    async def test_unindexed_reply_falls_back_to_single_pending(self):
+        registry = PendingRequests()
+        entry = registry.register(0x1D, 2)
+        self.assertTrue(registry.resolve(0x1D, 0, b"\x1d\x00"))
+        self.assertEqual(await entry.get_result(), b"\x1d\x00")
+        self.assertFalse(registry.resolve(0x1D, 0, b"\x1d\x00"))
+
+    async def test_transfer_slot_follows_its_request(self):
+        registry = PendingRequests()
+        entry = registry.register(0x11)
+        fragments = FragmentBuffer(lambda *_: None, expected=4)
+        registry.start_transfer(entry, fragments)
+        self.assertIsNone(registry.receiving())
+
+        fragments.feed(b"\x11\x00")
+        self.assertIs(registry.receiving(), entry)
+        registry.discard(entry)
+        self.assertIsNone(registry.receiving())
+
+        entry = registry.register(0x11)
+        registry.start_transfer(entry, FragmentBuffer(lambda *_: None, expected=4))
+        entry.fragments.feed(b"\x11\x00")
+        entry.set_result(b"")
+        self.assertIsNone(registry.receiving())
+
+    async def test_basic_settings_resolve_to_a_dict(self):
+        watch = FakeConnection("CASIO GW-B5600")
+        task = asyncio.create_task(watch.watch_info.protocol.get_basic_settings(watch))
+        await asyncio.sleep(0)
+        MessageDispatcher.on_received(b"\x13\x01" + bytes(10), connection=watch)  # 24h bit set
+
+        settings_dict = await asyncio.wait_for(task, 1)
+        self.assertIsInstance(settings_dict, dict)
+        self.assertEqual(settings_dict["time_format"], "24h")
+
+    async def test_watch_info_is_per_connection(self):
+        standard, bx = FakeConnection("CASIO GW-B5600"), FakeConnection("CASIO GW-BX5600")
+
+        tasks = [
+            asyncio.create_task(WatchConditionIO.request(standard)),
+            asyncio.create_task(WatchConditionIO.request(bx)),
+        ]
+        await asyncio.sleep(0)
+
+        # Same raw battery reading, decoded with each model's own limits
+        MessageDispatcher.on_received(b"\x28\x13\x19", connection=standard)
+        MessageDispatcher.on_received(b"\x28\x13\x19", connection=bx)
+
+        results = await asyncio.gather(*tasks)
+        self.assertEqual(results[0]["battery_level_percent"], 100)
+        self.assertEqual(results[1]["battery_level_percent"], 50)
+
+    async def test_transfer_takes_only_fragments_on_its_handle(self):
+        watch = FakeConnection("CASIO ABL-100WE")
+        convoy = CasioConstants.HANDLE_CONVOY_NOTIFICATION
+        record = bytearray(_step_record(3))
+        record[20] = 0x1F  # a continuation fragment that starts like a world city reply
+
+        steps = asyncio.create_task(StepCounterIO.request(watch))
+        city = asyncio.create_task(WorldCitiesIO.request(watch, 0))
+        await asyncio.sleep(0)
+
+        MessageDispatcher.on_received(b"\x00\x11\x90\x01\x00", connection=watch, handle=0x11)
+        MessageDispatcher.on_received(bytes(record[:20]), connection=watch, handle=convoy)
+        # A reply on another handle mid-transfer is dispatched, not buffered
+        MessageDispatcher.on_received(b"\x1f\x00A", connection=watch, handle=0x0D)
+        for i in range(20, len(record), 20):
+            MessageDispatcher.on_received(bytes(record[i : i + 20]), connection=watch, handle=convoy)
+
+        self.assertEqual(await asyncio.wait_for(city, 1), b"\x1f\x00A")
+        data = await asyncio.wait_for(steps, 1)
+        self.assertEqual(data, StepCounterIOFunctional.parse(bytes(record)))
+
+    async def test_short_step_record_completes_without_timeout(self):
+        record = _step_record(4)[: StepCounterIOFunctional.RECORD_SIZE]
+        expected = StepCounterIOFunctional.parse(record)
+        convoy = CasioConstants.HANDLE_CONVOY_NOTIFICATION
+
+        # Not announced at all, or announced as 400 and ended early by the watch
+        for announced in (False, True):
+            with self.subTest(announced=announced):
+                watch = FakeConnection("CASIO ABL-100WE")
+                steps = asyncio.create_task(StepCounterIO.request(watch))
+                await asyncio.sleep(0)
+                if announced:
+                    MessageDispatcher.on_received(b"\x00\x11\x90\x01\x00", connection=watch, handle=0x11)
+                for i in range(0, len(record), 20):
+                    MessageDispatcher.on_received(record[i : i + 20], connection=watch, handle=convoy)
+                if announced:
+                    MessageDispatcher.on_received(b"\x04\x11\x00\x00\x00", connection=watch, handle=0x11)
+
+                self.assertEqual(await asyncio.wait_for(steps, 1), expected)
+                await asyncio.sleep(0)
+                # END is only sent when the watch didn't end the transfer itself
+                ends = [w for w in watch.writes if w == (0x11, END_TRANSACTION_CMD)]
+                self.assertEqual(len(ends), 0 if announced else 1)
+
+
+
+class TestDispatchTables(unittest.TestCase):
+    def test_tables_route_like_extract_key_and_unwrap(self):
+        def recording(protocol_class: type) -> StandardProtocol:
+            calls: list[tuple[int, bytes]] = []
+            keys = list(MessageDispatcher.data_received_messages)
+            handlers = {key: (lambda data, _c, key=key: calls.append((key, data))) for key in keys}
+
+            class Recording(protocol_class):  # type: ignore[misc, valid-type]
+                data_received_handlers = handlers
+                log = calls
+
+            return Recording()
+
+        frames = [bytes([first, 1, 0x1F, 0x1D, 0x28, 9]) for first in range(256)]
+        frames += [bytes([0x28, kind, 0, key, key, 9]) for kind in range(3) for key in range(256)]
+        frames += [b"\x28", b"\x28\x01\x00\x1f"]
+        for protocol_class in (StandardProtocol, AnalogueProtocol):
+            table, reference = recording(protocol_class), recording(protocol_class)
+            for frame in frames:
+                self.assertEqual(
+                    table.dispatch(frame, None), WatchProtocol.dispatch(reference, frame, None), frame.hex()
+                )
+            self.assertEqual(table.log, reference.log)
+        self.assertIn((0x1F, b"\x1f\x09"), table.log)  # 28 01 00 1F 1F 09, unwrapped by the analogue table
+
+
+class TestTimeSetPreamble(unittest.IsolatedAsyncioTestCase):
+    async def test_pipelined_reads_go_out_before_write_backs(self):
+        watch = FakeConnection("CASIO GW-B5600")
+        task = asyncio.create_task(watch.watch_info.protocol.initialize_for_setting_time(watch))
+        await asyncio.sleep(0.01)
+
+        # 3 DST states, 6 DST cities, 6 world cities, all requested up front
+        self.assertEqual(len(watch.requests), 15)
+        self.assertEqual(watch.writes, [])
+
+        for code in reversed(watch.requests):
+            MessageDispatcher.on_received(bytes(code) + b"\xaa", connection=watch)
+        await task
+
+        self.assertEqual([data for _, data in watch.writes], [bytes(c) + b"\xaa" for c in watch.requests])
+
+    async def test_snapshot_cache_skips_unchanged_write_backs(self):
+        async def set_up_watch(cache: SnapshotCache, suffix: bytes) -> FakeConnection:
+            watch = FakeConnection("CASIO GW-B5600")
+            watch.watch_info.set_address("AA:BB")
+            watch.snapshot_cache = cache
+            task = asyncio.create_task(watch.watch_info.protocol.initialize_for_setting_time(watch))
+            await asyncio.sleep(0.01)
+            for code in watch.requests:
+                MessageDispatcher.on_received(bytes(code) + suffix, connection=watch)
+            await task
+            return watch
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "snapshots.json"
+            first = await set_up_watch(SnapshotCache(path), b"\x01")
+            self.assertEqual(len(first.writes), 15)
+
+            # A new process loads the snapshot from disk
+            unchanged = await set_up_watch(SnapshotCache(path), b"\x01")
+            self.assertEqual(unchanged.writes, [])
+
+            changed = await set_up_watch(SnapshotCache(path), b"\x02")
+            self.assertEqual(len(changed.writes), 15)
+
+    async def test_serial_models_read_each_slot_once_with_snapshot_cache(self):
+        class EchoingConnection(FakeConnection):
+            """Answers every read with the request plus suffix, logging reads and writes in order."""
+
+            suffix = b"\x01"
+            log: list[str]
+
+            async def request(self, code):
+                self.log.append("read")
+                reply = bytes(code) + self.suffix
+                asyncio.get_running_loop().call_soon(MessageDispatcher.on_received, reply, None, self)
+
+            async def write(self, _handle, _data):
+                self.log.append("write")
+
+        async def set_time(suffix: bytes) -> list[str]:
+            watch = EchoingConnection("CASIO MTG-B1000")
+            watch.watch_info.set_address("AA:BB")
+            watch.snapshot_cache = cache
+            watch.suffix, watch.log = suffix, []
+            await watch.watch_info.protocol.initialize_for_setting_time(watch)
+            return watch.log
+
+        cache = SnapshotCache(None)
+        first = await set_time(b"\x01")
+        slots = first.count("read")
+        self.assertEqual(first, ["read", "write"] * slots)
+        self.assertEqual(await set_time(b"\x01"), ["read"] * slots)
+        # Changed: what the validation pass read is written back, not read again
+        self.assertEqual(await set_time(b"\x02"), ["read"] * slots + ["write"] * slots)
+
+    def test_snapshot_cache_saves_only_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "snapshots.json"
+            cache = SnapshotCache(path)
+            first = cache.put("AA:BB", [b"\x1d\x00"])
+            path.unlink()
+            self.assertIs(cache.put("AA:BB", [b"\x1d\x00"]), first)
+            self.assertFalse(path.exists())
+            cache.put("AA:BB", [b"\x1d\x01"])
+            self.assertTrue(path.exists())
+
+    async def test_serial_models_wait_for_each_reply(self):
+        watch = FakeConnection("CASIO MTG-B1000")
+        self.assertFalse(watch.watch_info.pipelinedTimeSet)
+        task = asyncio.create_task(watch.watch_info.protocol.initialize_for_setting_time(watch))
+        await asyncio.sleep(0)
+        self.assertEqual(watch.requests, [b"\x1d\x00"])
+        task.cancel()
+
+
+
+class TestTimeLatencyCompensation(unittest.IsolatedAsyncioTestCase):
+    def test_round_trip_estimate_uses_fastest_recent_sample(self):
+        latency = RoundTripEstimator(window=3)
+        self.assertEqual(latency.one_way_delay(), 0.0)
+        for sample in (0.05, 0.30, 0.20, 0.25, 30.0):
+            latency.add(sample)
+        # 0.05 has left the window and the 30s stall is discarded
+        self.assertAlmostEqual(latency.round_trip(), 0.20)
+        self.assertAlmostEqual(latency.one_way_delay(), 0.10)
+
+    async def test_time_set_encodes_arrival_time(self):
+        watch = FakeConnection("CASIO GW-B5600")
+        watch.latency = RoundTripEstimator()
+        watch.latency.add(0.6)
+
+        before = time.time()
+        await TimeIO.send_to_watch_set(watch, SetTime())
+        handle, packet = watch.writes[0]
+        self.assertEqual(handle, 0x0E)
+
+        year = int.from_bytes(packet[1:3], "little")
+        encoded = datetime(year, *packet[3:8]).timestamp() + packet[9] / 256
+        self.assertGreaterEqual(encoded, before + 0.3 - 1 / 256)
+        self.assertLess(encoded, time.time() + 0.3)
+
+    async def test_scheduled_time_set_is_released_on_deadline(self):
+        watch = FakeConnection("CASIO GW-B5600")
+        watch.latency = RoundTripEstimator()
+        watch.latency.add(0.02)
+        watch.time_scheduler = TimeSetScheduler(lead=0.05)
+
+        await TimeIO.send_to_watch_set(watch, SetTime())
+        written_at = time.time()
+        report = watch.time_scheduler.reports[-1]
+        packet = watch.writes[0][1]
+
+        self.assertEqual(packet[9], 0)  # whole second, no fraction
+        year = int.from_bytes(packet[1:3], "little")
+        self.assertEqual(datetime(year, *packet[3:8]).timestamp(), report.target)
+        self.assertAlmostEqual(written_at, report.target - 0.01, delta=0.05)
+        self.assertGreaterEqual(report.release_error, 0.0)
+
+    async def test_scheduled_sp_time_set(self):
+        watch = VirtualWatch("CASIO GW-BX5600")
+        connection = VirtualLinkConnection(watch)
+        connection.time_scheduler = TimeSetScheduler(lead=0.05)
+        await connection.connect()
+
+        await GwBx5600TimeIO.set_time(connection)
+
+        report = connection.time_scheduler.reports[-1]
+        self.assertEqual(watch.time_set[7], datetime.fromtimestamp(report.target).second)
+        self.assertEqual(watch.time_set[9], 0)
+        await connection.client.disconnect()
+
+
+class TestWriteQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.sent: list[tuple[int, bytes, bool]] = []
+        self.failing: set[bytes] = set()
+        self.queue = WriteQueue(self.send)
+
+    async def send(self, handle: int, data: bytes, response: bool) -> None:
+        await asyncio.sleep(0.01)  # every write takes a while to go out
+        if data in self.failing:
+            raise GShockConnectionError("write failed")
+        self.sent.append((handle, data, response))
+
+    async def test_writes_without_response_do_not_wait(self):
+        started = time.perf_counter()
+        for i in range(5):
+            await self.queue.put(0x0C, bytes([i]), response=False)
+        self.assertLess(time.perf_counter() - started, 0.01)
+        self.assertEqual(len(self.queue), 5)  # the sender has not run yet
+
+        # A write with response waits for its acknowledgement and everything before it
+        await self.queue.put(0x0E, b"\x09", response=True)
+        self.assertEqual([data for _, data, _ in self.sent], [b"\x00", b"\x01", b"\x02", b"\x03", b"\x04", b"\x09"])
+        self.assertEqual((self.queue.queued, self.queue.max_depth), (5, 6))
+
+    async def test_queued_error_is_raised_by_flush(self):
+        self.failing.add(b"\x01")
+        await self.queue.put(0x0C, b"\x01", response=False)
+        await self.queue.put(0x0C, b"\x02", response=False)
+        with self.assertRaises(GShockConnectionError):
+            await self.queue.flush()
+        self.assertEqual(self.sent, [(0x0C, b"\x02", False)])
+        await self.queue.flush()  # reported once
+
+        self.failing.add(b"\x0e")
+        with self.assertRaises(GShockConnectionError):
+            await self.queue.put(0x0E, b"\x0e", response=True)
+
+    async def test_failed_sp_request_fails_its_request_at_once(self):
+        class QueuedConnection(FakeConnection):
+            def __init__(self, queue: WriteQueue) -> None:
+                super().__init__("CASIO GW-BX5600")
+                self.queue = queue
+
+            async def write(self, handle, data):
+                await self.queue.put(handle, as_bytes(data), handle not in Connection.NO_RESPONSE_HANDLES)
+
+            async def flush(self):
+                await self.queue.flush()
+
+        request = b"\x01\x02"
+        self.failing.add(request)
+        watch = QueuedConnection(self.queue)
+        started = time.perf_counter()
+        with self.assertRaises(GShockConnectionError):
+            await GwBx5600TimeIO._request(watch, 1, request)
+        self.assertLess(time.perf_counter() - started, 1.0)  # not the 5 s reply timeout
+        self.assertEqual(len(watch.pending), 0)
+
+
+class TestNotificationQueue(unittest.IsolatedAsyncioTestCase):
+    async def test_frames_are_decoded_after_the_callback_in_order(self):
+        decoded: list[bytes] = []
+        queue = NotificationQueue(decoded.append)
+        for i in range(3):
+            queue.put(bytes([i]))
+        self.assertEqual(decoded, [])  # nothing decoded inside the callback
+
+        await queue.drain()
+        self.assertEqual(decoded, [b"\x00", b"\x01", b"\x02"])
+        self.assertEqual((queue.stats.received, queue.stats.dispatched, queue.stats.max_depth), (3, 3, 3))
+        queue.close()
+
+    async def test_full_queue_policies(self):
+        expected = {
+            DECODE_INLINE: [b"\x00", b"\x01", b"\x02"],
+            DROP_OLDEST: [b"\x01", b"\x02"],
+            DROP_NEWEST: [b"\x00", b"\x01"],
+        }
+        for policy, frames in expected.items():
+            decoded: list[bytes] = []
+            queue = NotificationQueue(decoded.append, capacity=2, policy=policy)
+            for i in range(3):
+                queue.put(bytes([i]))
+            await queue.drain()
+            self.assertEqual(decoded, frames, policy)
+            self.assertEqual(queue.stats.dropped, 3 - len(frames), policy)
+            queue.close()
+
+
+class TestInstrumentation(unittest.IsolatedAsyncioTestCase):
+    def test_histogram_percentiles_within_precision(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.percentile(50), 0.500, delta=0.005)
+        self.assertAlmostEqual(histogram.percentile(99), 0.990, delta=0.01)
+        self.assertEqual(histogram.percentile(100), 1.0)
+
+    async def test_api_calls_are_timed_per_model(self):
+        class Api:
+            def __init__(self, connection):
+                self.connection = connection
+
+            @instrumented
+            async def get_watch_name(self):
+                return await WatchNameIO.request(self.connection)
+
+            @instrumented
+            async def get_unanswered(self):
+                return await self.connection.pending.register(0x10, timeout=0.01).get_result()
+
+        instrumentation = Instrumentation()
+        events = []
+        instrumentation.subscribe(events.append)
+        watch = FakeConnection("CASIO GW-B5600")
+        watch.address = "AA:BB"
+        watch.instrumentation = instrumentation
+        watch.traffic = Traffic()
+
+        task = asyncio.create_task(Api(watch).get_watch_name())
+        await asyncio.sleep(0)
+        watch.traffic.bytes_received += 18
+        MessageDispatcher.on_received(b"\x23CASIO GW-B5600\x00\x00", connection=watch)
+        await task
+
+        model = watch.watch_info.model.name
+        event = events[0]
+        self.assertEqual((event.kind, event.name, event.model), (API, "get_watch_name", model))
+        self.assertEqual(event.bytes_received, 18)
+        self.assertFalse(event.timed_out)
+        self.assertEqual(instrumentation.histogram(model, "get_watch_name").count, 1)
+
+        with self.assertRaises(GShockTimeoutError):
+            await Api(watch).get_unanswered()
+        self.assertTrue(events[-1].timed_out)
+        self.assertEqual(instrumentation.timeouts[(model, 0x10)], 1)
+
+
+class TestGatewayMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_events_are_exported_in_prometheus_format(self):
+        instrumentation = Instrumentation()
+        metrics = GatewayMetrics(instrumentation)
+        for _ in range(2):
+            instrumentation.record(OperationEvent(CONNECT, "connect", "GW", "AA:BB", 0.0, 1.5))
+        instrumentation.record(OperationEvent(API, "set_time", "GW", "AA:BB", 2.0, 2.2))
+        instrumentation.record(
+            OperationEvent(API, "get_watch_name", "GW", "AA:BB", 3.0, 13.0, timed_out=True, timeout_key=0x23)
+        )
+
+        text = metrics.render()
+        self.assertIn('gshock_connections_total{model="GW",result="ok"} 2', text)
+        self.assertIn('gshock_reconnects_total{model="GW"} 1', text)
+        self.assertIn('gshock_connect_seconds_bucket{model="GW",le="2.5"} 2', text)
+        self.assertIn('gshock_time_set_seconds_bucket{model="GW",le="0.25"} 1', text)
+        self.assertIn('gshock_timeouts_total{model="GW",io="WatchNameIO"} 1', text)
+
+        server = await metrics.serve(port=0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.0\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        self.assertTrue(response.startswith(b"HTTP/1.0 200 OK"))
+        self.assertTrue(response.endswith(text.encode()))
+
+
+class TestLogger(unittest.TestCase):
+    def test_disabled_levels_do_not_format(self):
+        class Expensive:
+            formatted = 0
+
+            def __str__(self):
+                Expensive.formatted += 1
+                return "x"
+
+        with self.assertLogs("gshock_api.logger", level="INFO") as logs:
+            logger.debug("skipped %s", Expensive())
+            logger.debug(Expensive(), Expensive())
+            logger.info("kept %s %d%%", Hex(b"\x01\xff"), 5)
+            logger.info("joined", 1, 2)
+        self.assertEqual(Expensive.formatted, 0)
+        self.assertEqual([r.getMessage() for r in logs.records], ["kept 01ff 5%", "joined 1 2"])
+
+    def test_flight_recorder_is_dumped_on_error(self):
+        recorder = logger.enable_flight_recorder(capacity=2)
+        try:
+            for i in range(3):
+                logger.frame("rx", 0x0E, bytes([0x1F, i]))
+            with self.assertLogs("gshock_api.logger", level="ERROR") as logs:
+                logger.error("Session failed")
+            self.assertEqual(len(logs.records), 2)
+            dump = logs.records[1].getMessage()
+            self.assertIn("Last 2 BLE frames", dump)
+            self.assertNotIn("1f00", dump)
+            self.assertIn("rx 0x0E 1f02", dump)
+            self.assertEqual(len(recorder.frames), 0)
+        finally:
+            logger.disable_flight_recorder()
+
+class TestGattCache(unittest.TestCase):
+    def test_layout_persists_per_address_and_model(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "gatt.json"
+            GattCache(path).put("aa:bb", "GW", ["svc"], ["c1", "c2"], ["c2"])
+
+            cache = GattCache(path)
+            layout = cache.get("AA:BB", "GW")
+            self.assertIsNotNone(layout)
+            self.assertEqual(layout.notify, ("c2",))
+            self.assertIsNone(cache.get("AA:BB", "GA"))
+
+    def test_other_versions_are_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "gatt.json"
+            path.write_text(json.dumps({"AA:BB|GW": {
+                "services": [], "characteristics": [], "notify": [],
+                "version": GATT_CACHE_VERSION + 1,
+            }}))
+            self.assertEqual(len(GattCache(path)), 0)
+
+
+class TestCommands(unittest.IsolatedAsyncioTestCase):
+    def test_json_round_trip(self):
+        for command in (
+            SetTimer(90),
+            SetTimeAdjustment(True, 25),
+            SetAlarms([{"enabled": True, "hasHourlyChime": False, "hour": 7, "minute": 30}]),
+        ):
+            self.assertEqual(from_json(command.to_json()), command)
+
+    def test_unknown_action_rejected(self):
+        with self.assertRaises(ValueError):
+            from_json('{"action": "SELF_DESTRUCT"}')
+
+    async def test_typed_and_json_commands_write_the_same_bytes(self):
+        typed, legacy = FakeConnection(), FakeConnection()
+        await typed.send_message(SetTimer(3725))
+        await legacy.send_message('{"action": "SET_TIMER", "value": 3725}')
+        self.assertEqual(typed.writes, legacy.writes)
+        self.assertEqual(len(typed.writes), 1)
+
+
+class Advertisement:
+    def __init__(self, address, name, rssi=-60, service_uuids=(CASIO_SERVICE_UUID,)):
+        self.address = address
+        self.name = name
+        self.local_name = name
+        self.rssi = rssi
+        self.service_uuids = list(service_uuids)
+
+
+class TestContinuousScanner(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.scanner = ContinuousScanner(ttl=10, clock=lambda: self.now)
+
+    def advertise(self, ad):
+        self.scanner.on_advertisement(ad, ad)
+
+    async def test_reports_watch_once_until_it_expires(self):
+        ad = Advertisement("AA:BB", "CASIO GW-B5600")
+        self.advertise(ad)
+        self.advertise(Advertisement("CC:DD", "Headphones", service_uuids=()))
+        self.now = 5
+        self.advertise(ad)
+
+        watch = await self.scanner.next_watch()
+        self.assertEqual((watch.address, watch.last_seen), ("AA:BB", 5))
+        self.assertTrue(self.scanner._ready.empty())
+
+        self.now = 20
+        self.assertEqual(self.scanner.active(), [])
+        self.advertise(ad)
+        self.assertEqual((await self.scanner.next_watch()).address, "AA:BB")
+
+    async def test_skips_excluded_and_stale_reports(self):
+        self.advertise(Advertisement("AA:BB", "CASIO GW-B5600"))
+        self.now = 11
+        self.advertise(Advertisement("CC:DD", "CASIO GA-B2100"))
+        self.advertise(Advertisement("EE:FF", "CASIO GBD-H1000"))
+
+        watch = await self.scanner.next_watch(exclude_addresses={"CC:DD"})
+        self.assertEqual(watch.address, "EE:FF")
+
+    async def test_forgotten_watch_is_reported_on_its_next_advertisement(self):
+        ad = Advertisement("AA:BB", "CASIO GW-B5600")
+        self.advertise(ad)
+        await self.scanner.next_watch()
+        self.advertise(ad)
+        self.assertTrue(self.scanner._ready.empty())
+
+        self.scanner.forget("AA:BB")
+        self.advertise(ad)
+        self.assertEqual((await self.scanner.next_watch()).address, "AA:BB")
+
+
+class StubSessionConnection:
+    def __init__(self, info, address, error=None):
+        self.watch_info = info
+        self.address = address
+        self.error = error
+        self.disconnected = False
+
+    async def connect(self, _watch_filter=None, **_kwargs):
+        if self.error is not None:
+            raise self.error
+        return True
+
+    async def disconnect(self):
+        self.disconnected = True
+
+
+class TestSessionManager(unittest.IsolatedAsyncioTestCase):
+    async def test_scanned_device_is_used_and_reported_again_after_its_session(self):
+        class IdleScanner(ContinuousScanner):
+            async def start(self):
+                pass
+
+            async def stop(self):
+                pass
+
+        scanner = IdleScanner(ttl=10)
+        ad = Advertisement("AA:BB", "CASIO GW-B5600")
+        devices = []
+        served = [asyncio.Event(), asyncio.Event()]
+
+        async def handler(api):
+            devices.append(api.connection.device)
+            served[len(devices) - 1].set()
+
+        manager = SessionManager(
+            handler, connection_factory=lambda info: StubSessionConnection(info, None), scanner=scanner
+        )
+        runner = asyncio.create_task(manager.run())
+        scanner.on_advertisement(ad, ad)
+        await asyncio.wait_for(served[0].wait(), 1)
+        await asyncio.sleep(0)  # let the session close
+        # The watch kept advertising through its session
+        scanner.on_advertisement(ad, ad)
+        await asyncio.wait_for(served[1].wait(), 1)
+        await manager.stop()
+        await runner
+
+        self.assertEqual(devices, [ad, ad])
+
+    async def test_connections_default_to_their_own_watch_info(self):
+        first, second = Connection(), Connection("AA:BB")
+        self.assertIsNot(first.watch_info, second.watch_info)
+        self.assertEqual(second.address, "AA:BB")
+
+    async def test_failures_do_not_stop_the_gateway(self):
+        outcomes = [OSError("adapter busy"), None, None]
+        connections = []
+
+        def factory(info):
+            connection = StubSessionConnection(info, f"AA:{len(connections)}", outcomes.pop(0))
+            connections.append(connection)
+            return connection
+
+        served = []
+        second_served = asyncio.Event()
+
+        async def handler(api):
+            served.append(api.connection.address)
+            if len(served) == 1:
+                raise ValueError("bad reply")
+            second_served.set()
+
+        manager = SessionManager(handler, max_sessions=1, connection_factory=factory)
+        manager.retry_delay = 0
+        runner = asyncio.create_task(manager.run())
+        await asyncio.wait_for(second_served.wait(), 1)
+        await manager.stop()
+        await runner
+
+        self.assertEqual(served, ["AA:1", "AA:2"])
+        self.assertTrue(connections[1].disconnected)
+        self.assertTrue(runner.done())
+
+    async def test_stop_wakes_run_waiting_for_a_slot(self):
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def handler(_api):
+            started.set()
+            await release.wait()
+
+        manager = SessionManager(
+            handler, max_sessions=1, connection_factory=lambda info: StubSessionConnection(info, "AA:00")
+        )
+        runner = asyncio.create_task(manager.run())
+        await asyncio.wait_for(started.wait(), 1)
+        await manager.stop()
+        await asyncio.wait_for(runner, 1)
+        self.assertEqual(manager.sessions, {})
+
+
+class VirtualLinkConnection(FakeConnection):
+    """FakeConnection whose writes reach a VirtualWatch, as Connection's would."""
+
+    HANDLES: ClassVar[dict[int, str]] = {
+        0x0C: CasioConstants.CASIO_READ_REQUEST_FOR_ALL_FEATURES_CHARACTERISTIC_UUID,
+        0x0E: CasioConstants.CASIO_ALL_FEATURES_CHARACTERISTIC_UUID,
+        0x11: CasioConstants.CASIO_DATA_REQUEST_SP_CHARACTERISTIC_UUID,
+        0x17: CasioConstants.CASIO_SET_CONFIGURATION_CHARACTERISTIC_UUID,
+        0x19: CasioConstants.CASIO_GET_CONFIGURATION_CHARACTERISTIC_UUID,
+    }
+
+    def __init__(self, watch: VirtualWatch) -> None:
+        super().__init__(watch.name)
+        self.client = watch.client(watch.address)
+
+    async def connect(self) -> None:
+        await self.client.connect()
+        for service in self.client.services:
+            for char in service.characteristics:
+                if "notify" in char.properties:
+                    await self.client.start_notify(
+                        char.uuid,
+                        lambda _c, data: MessageDispatcher.on_received(bytes(data), connection=self, handle=_c.handle),
+                    )
+
+    async def request(self, code: ByteData) -> None:
+        self.requests.append(code)
+        await self.client.write_gatt_char(self.HANDLES[0x0C], as_bytes(code), response=False)
+
+    async def write(self, handle: int, data: ByteData) -> None:
+        await super().write(handle, data)
+        await self.client.write_gatt_char(self.HANDLES[handle], as_bytes(data), response=handle == 0x0E)
+
+
+class TestVirtualWatch(unittest.IsolatedAsyncioTestCase):
+    async def test_time_set_on_standard_watch(self):
+        watch = VirtualWatch("CASIO GW-B5600")
+        connection = VirtualLinkConnection(watch)
+        await connection.connect()
+
+        self.assertEqual(await WatchNameIO.request(connection), "CASIO GW-B5600")
+        self.assertEqual(await ButtonPressedIO.request(connection), WatchButton.LOWER_RIGHT)
+        await connection.watch_info.protocol.set_time(connection, 1_700_000_000)
+
+        self.assertEqual(watch.time_set[0], 0x09)
+        self.assertEqual(len(connection.requests), 2 + 15)
+        self.assertEqual(len(connection.writes), 15 + 1)
+        await connection.client.disconnect()
+
+    async def test_sp_time_set_on_gw_bx5600(self):
+        watch = VirtualWatch("CASIO GW-BX5600")
+        connection = VirtualLinkConnection(watch)
+        await connection.connect()
+
+        await GwBx5600TimeIO.set_time(connection, datetime(2026, 1, 2, 3, 4, 5))
+
+        self.assertEqual([len(w) for w in watch.sp_writes], [101, 94, 133])
+        self.assertEqual(watch.time_set[:2], b"\x09\xea")
+        await connection.client.disconnect()
+
+    async def test_time_set_on_analogue_watch_with_wrapped_replies(self):
+        watch = VirtualWatch("CASIO MTG-B1000")
+        connection = VirtualLinkConnection(watch)
+        await connection.connect()
+
+        self.assertEqual(await WatchNameIO.request(connection), "CASIO MTG-B1000")
+        await connection.watch_info.protocol.set_time(connection, 1_700_000_000)
+
+        self.assertGreater(watch.wrapped, 2)  # both envelope forms
+        self.assertEqual(watch.time_set[0], 0x09)
+        # Write-backs echo the unwrapped replies
+        self.assertEqual({data[0] for _, data in connection.writes[:-1]} & {0x28}, set())
+        await connection.client.disconnect()
+
+    async def test_fragmented_transfers_are_reassembled(self):
+        small_mtu = LinkConditions(mtu=23)
+
+        abl = VirtualWatch("CASIO ABL-100WE", link=small_mtu)
+        connection = VirtualLinkConnection(abl)
+        await connection.connect()
+        steps = await StepCounterIO.request(connection)
+        self.assertEqual(steps.hourly_steps[:3], list(struct.unpack_from("<3H", abl.activity, 6)))
+        await asyncio.sleep(0)
+        self.assertEqual(connection.writes[-1], (0x11, bytes.fromhex("0411000000")))
+        await connection.client.disconnect()
+
+        bx = VirtualWatch("CASIO GW-BX5600", link=small_mtu)
+        connection = VirtualLinkConnection(bx)
+        await connection.connect()
+        await GwBx5600TimeIO.set_time(connection, datetime(2026, 1, 2, 3, 4, 5))
+        self.assertEqual([len(w) for w in bx.sp_writes], [101, 94, 133])
+        await connection.client.disconnect()
+
+    def test_stale_transfer_restarts(self):
+        now = [0.0]
+        fragments = FragmentBuffer(lambda *_: None, expected=4, timeout=1.0, clock=lambda: now[0])
+        self.assertFalse(fragments.feed(b"\x01\x02"))
+        self.assertTrue(fragments.in_progress())
+        now[0] = 5.0
+        self.assertFalse(fragments.in_progress())
+        self.assertFalse(fragments.feed(b"\x03"))
+        self.assertTrue(fragments.feed(b"\x04\x05\x06"))
+        self.assertEqual(fragments.payload(), b"\x03\x04\x05\x06")
+
+    async def test_link_latency_and_loss_are_reproducible(self):
+        link = LinkConditions(latency=0.005, loss=0.5)
+        a, b = VirtualWatch(link=link, seed=7), VirtualWatch(link=link, seed=7)
+        self.assertEqual([a.lost() for _ in range(20)], [b.lost() for _ in range(20)])
+
+        connection = VirtualLinkConnection(VirtualWatch(link=LinkConditions(latency=0.005)))
+        await connection.connect()
+        started = asyncio.get_running_loop().time()
+        await WatchNameIO.request(connection)
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - started, 0.01)
+        await connection.client.disconnect()
+
+
+class TestFleetBenchmark(unittest.IsolatedAsyncioTestCase):
+    async def test_time_set_on_every_protocol(self):
+        result = await run_fleet_benchmark(6, link=LinkConditions())
+
+        self.assertEqual((result.completed, result.failed), (6, 0))
+        self.assertEqual(set(result.latency_by_model), {"GW", "GW_BX5600", "MTG_B1000"})
+        self.assertGreater(result.time_sets_per_second, 0)
+        self.assertGreater(result.loop_lag.count, 0)
+
+
+TEST_DATA = Path(__file__).parent.parent / "test_data"
+
+
+class TestCaptureReplay(unittest.IsolatedAsyncioTestCase):
+    async def test_step_counter_matches_abl_capture(self):
+        connection = ReplayConnection("CASIO ABL-100WE")
+        replay = CaptureReplay.from_file(
+            TEST_DATA / "btsnoop_hci_ABL.log", connection, start=1125, end=1147
+        )
+        task = asyncio.create_task(StepCounterIO.request(connection))
+        result = await replay.run()
+
+        result.check()
+        self.assertEqual(result.stalls, 0)
+        steps = await task
+        self.assertEqual((steps.month, steps.day_of_month), (1, 0x18))
+
+    async def test_unexpected_write_is_reported(self):
+        connection = ReplayConnection("CASIO ABL-100WE")
+        replay = CaptureReplay.from_file(
+            TEST_DATA / "btsnoop_hci_ABL.log", connection, start=1125, end=1147,
+            sync_timeout=0.01,
+        )
+        await connection.write(0x0C, b"\x28")
+        result = await replay.run()
+
+        self.assertEqual(len(result.mismatches()), 2)
+        self.assertEqual(len(result.mismatches(ordered=False)), 3)
+        with self.assertRaises(AssertionError):
+            result.check()
+
+
+class TestBtsnoopIndex(unittest.TestCase):
+    def test_query_sp_data_notifications_from_saved_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "bx.log"
+            path.write_bytes((TEST_DATA / "btsnoop_hci_bx.log").read_bytes())
+
+            with BtsnoopCapture(path) as capture:
+                built = capture.index()
+                streamed = list(capture.att_packets())
+            self.assertTrue(path.with_name("bx.log.attidx").exists())
+
+            with BtsnoopCapture(path) as capture:
+                stat = path.stat()
+                loaded = AttIndex.load(capture.path.with_name("bx.log.attidx"), stat.st_size, stat.st_mtime_ns)
+                self.assertEqual(list(loaded.fragment_offsets), list(built.fragment_offsets))
+
+                sp_data = list(capture.query(handle=0x19, opcode=AttOpcode.NOTIFICATION))
+                self.assertEqual([len(p.value) for p in sp_data], [101, 28, 133])
+                self.assertEqual(sp_data, [p for p in streamed if p.handle == 0x19 and p.is_notification])
+
+                window = capture.index().select(since=sp_data[0].timestamp, until=sp_data[-1].timestamp)
+                self.assertEqual(capture.packet(window[0]), sp_data[0])
+
+
+class TestStepHistoryStore(unittest.TestCase):
+    def test_overlapping_syncs_are_merged(self):
+        address = "AA:BB:CC:DD:EE:FF"
+        hourly = [None] * 120 + [100] * 10 + [None] * 14
+        first = StepCounterData(3, 3, 4, hourly, list(range(1, 15)), 1000)
+        later_hourly = [None] * 96 + [100] * 10 + [None] * 14 + [50] * 12 + [None] * 12
+        later = StepCounterData(4, 3, 5, later_hourly, list(range(2, 16)), 600)
+
+        with StepHistoryStore(None) as store:
+            self.assertEqual(store.ingest(address, first, datetime(2026, 3, 4, 12)), 10 + 14 + 1)
+            self.assertEqual(store.ingest(address, first, datetime(2026, 3, 4, 13)), 0)
+            # New hours, March 4's final total and March 5 so far; older days are skipped
+            self.assertEqual(store.ingest(address, later, datetime(2026, 3, 5, 12)), 12 + 2)
+
+            self.assertEqual(store.daily(address, date(2026, 3, 3), date(2026, 3, 5)), [
+                (date(2026, 3, 3), 14), (date(2026, 3, 4), 15), (date(2026, 3, 5), 600),
+            ])
+            hours = store.hourly(address, date(2026, 3, 4), date(2026, 3, 5))
+            self.assertEqual(len(hours), 22)
+            self.assertEqual(hours[0], (datetime(2026, 3, 4, 0), 100))
+            self.assertEqual(hours[-1], (datetime(2026, 3, 5, 11), 50))
+            self.assertEqual(store.last_synced_day(address), date(2026, 3, 5))
+
+    def test_december_record_synced_in_january(self):
+        with StepHistoryStore(None) as store:
+            data = StepCounterData(3, 12, 31, [], [], 42)
+            store.ingest("addr", data, datetime(2027, 1, 1, 0, 5))
+            self.assertEqual(store.daily("addr", date(2026, 12, 31), date(2026, 12, 31)), [(date(2026, 12, 31), 42)])
+
+
+# Imported in a fresh interpreter; prints the import time and which lazy modules got loaded
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import gshock_api.continuous_scanner
+import gshock_api.gshock_api
+import gshock_api.message_dispatcher
+import gshock_api.virtual_watch
+import gshock_api.watch_info
+elapsed = time.perf_counter() - start
+lazy = [m for m in sys.modules if m in ("bleak", "importlib.metadata", "gshock_api.protocols")
+        or m.startswith(("bleak.", "gshock_api.protocols.", "gshock_api.iolib."))
+        and m != "gshock_api.iolib.connection_protocol"]
+print(elapsed, *lazy)
+"""
+# Builds every protocol after importing its module; prints the IO modules that loaded
+PROTOCOL_PROBE = """
+import sys
+from gshock_api.watch_info import PROTOCOL_CLASSES, get_protocol
+import gshock_api.protocols.analogue_protocol
+import gshock_api.protocols.mip_protocol
+import gshock_api.protocols.standard_protocol
+before = set(sys.modules)
+for name in PROTOCOL_CLASSES:
+    get_protocol(name)
+print(0, *[m for m in set(sys.modules) - before if m.startswith("gshock_api.iolib.")])
+"""
+# Generous bound for slow CI machines; eager imports took about 0.15 s here
+MAX_IMPORT_SECONDS = 0.5
+
+
+class TestImportTime(unittest.TestCase):
+    def _probe(self, script: str = IMPORT_PROBE) -> tuple[float, list[str]]:
+        src = str(Path(__file__).resolve().parents[1] / "src")
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join([src, os.environ.get("PYTHONPATH", "")])}
+        out = subprocess.run(
+            [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True
+        ).stdout.split()
+        return float(out[0]), out[1:]
+
+    def test_import_is_lazy_and_fast(self):
+        elapsed, lazy = min(self._probe() for _ in range(3))
+        self.assertEqual(lazy, [])
+        self.assertLess(elapsed, MAX_IMPORT_SECONDS)
+
+    def test_building_dispatch_tables_imports_no_handlers(self):
+        self.assertEqual(self._probe(PROTOCOL_PROBE)[1], [])
+
+    def test_handlers_and_protocols_resolve_on_first_use(self):
+        key = CasioConstants.CHARACTERISTICS["CASIO_WORLD_CITIES"]
+        self.assertIn(key, MessageDispatcher.data_received_messages)
+        self.assertEqual(MessageDispatcher.data_received_messages[key], WorldCitiesIO.on_received)
+        self.assertIs(message_dispatcher.TimeIO, TimeIO)
+        self.assertIsInstance(watch_info_module.MIP_PROTOCOL, MipProtocol)
+        self.assertIs(watch_info_module.MIP_PROTOCOL, watch_info_module.get_protocol("mip"))
+        with self.assertRaises(AttributeError):
+            message_dispatcher.NoSuchIO  # noqa: B018
+
+
+# Per-packet CPU cost of the pure codecs, relative to a fixed reference loop
+# so the stored baselines carry across machines. A codec fails once it costs
+# MAX_CODEC_SLOWDOWN times its baseline. After an intended change in cost,
+# rewrite the baselines with GSHOCK_UPDATE_BASELINES=1 and commit them.
+CODEC_BASELINES = Path(__file__).with_name("codec_baselines.json")
+MAX_CODEC_SLOWDOWN = 2.0
+BENCHMARK_BATCH_SECONDS = 0.002
+BENCHMARK_REPEAT = 7
+
+# Notifications from the captures in test_data/
+ALARM_PACKET = bytes.fromhex("154000082d")  # btsnoop_hci_mgt_b1000.log
+ALARMS2_PACKET = bytes.fromhex("1640000000400000004000000040000000")  # btsnoop_hci_ABL_smart_sync.log, alarms set
+SETTINGS_PACKET = bytes.fromhex("130501000100000020000000")  # btsnoop_hci.log
+WATCH_CONDITION_PACKET = bytes.fromhex("2805130000fa00000101")  # btsnoop_hci-DW-B5600.log
+# No capture holds a reminder or a whole activity record; these match what the watch sends
+REMINDER_PACKET = bytes.fromhex("3101052603022612312200")
+NOTIFICATION = AppNotification(
+    NotificationType.MESSAGE, "20260317T091500", "Signal", "Alice",
+    "See you at the station at 6, I will bring the tickets.",
+)
+REFERENCE_PAYLOAD = bytes(range(32))
+
+
+def _step_record(seed: int = 1) -> bytes:
+    return bytes(activity_record(random.Random(seed)))  # noqa: S311 - test data
+
+
+def _gw_info() -> WatchInfo:
+    info = WatchInfo()
+    info.set_name_and_model("CASIO GW-B5600")
+    return info
+
+
+def _codec_cases() -> dict[str, Callable[[], object]]:
+    info = _gw_info()
+    settings = SettingsIOFunctional.decode(SETTINGS_PACKET, info)
+    step_record = _step_record()
+    now = datetime(2026, 3, 17, 9, 15, 30, 250_000)
+    return {
+        "time_encode": lambda: TimeEncoderPure.encode_current_time(now),
+        "settings_encode": lambda: SettingsIOFunctional.encode(settings, info),  # type: ignore[arg-type]
+        "settings_decode": lambda: SettingsIOFunctional.decode(SETTINGS_PACKET, info),
+        "alarm_parse": lambda: AlarmsIOFunctional.parse_packet(ALARM_PACKET),
+        "alarms2_parse": lambda: AlarmsIOFunctional.parse_packet(ALARMS2_PACKET),
+        "reminder_decode": lambda: EventsIOFunctional.decode_time(REMINDER_PACKET),
+        "watch_condition_decode": lambda: WatchConditionIOFunctional.decode(WATCH_CONDITION_PACKET, info),
+        "step_counter_parse": lambda: StepCounterIOFunctional.parse(step_record),
+        "notification_encode": lambda: AppNotificationIO.encode_notification_packet(NOTIFICATION),
+    }
+
+
+def _reference() -> object:
+    return [b ^ 0x5A for b in REFERENCE_PAYLOAD]
+
+
+def _traced() -> bool:
+    """True under coverage, a debugger or a profiler, which slow each codec by a different factor."""
+    if sys.gettrace() is not None:
+        return True
+    monitoring = getattr(sys, "monitoring", None)
+    return monitoring is not None and any(monitoring.get_tool(tool) is not None for tool in range(6))
+
+
+def _cost(fn: Callable[[], object]) -> float:
+    """Best seconds per call over BENCHMARK_REPEAT batches of about BENCHMARK_BATCH_SECONDS."""
+    timer = timeit.Timer(fn)
+    single = min(timer.repeat(repeat=3, number=1))
+    number = max(int(BENCHMARK_BATCH_SECONDS / max(single, 1e-9)), 1)
+    return min(timer.repeat(repeat=BENCHMARK_REPEAT, number=number)) / number
+
+
+class TestCodecBenchmarks(unittest.TestCase):
+    def test_codec_cost_within_baseline(self):
+        if _traced():
+            self.skipTest("codec timings are only comparable without a tracer, e.g. run with --no-cov")
+        reference = _cost(_reference)
+        costs = {name: _cost(fn) / reference for name, fn in _codec_cases().items()}
+
+        if os.environ.get("GSHOCK_UPDATE_BASELINES"):
+            CODEC_BASELINES.write_text(json.dumps({k: round(v, 2) for k, v in costs.items()}, indent=2) + "\n")
+        baselines: dict[str, float] = json.loads(CODEC_BASELINES.read_text())
+
+        self.assertEqual(set(costs), set(baselines), "add new codecs with GSHOCK_UPDATE_BASELINES=1")
+        slower = {
+            name: f"{cost:.2f}x reference, baseline {baselines[name]:.2f}x"
+            for name, cost in costs.items()
+            if cost > baselines[name] * MAX_CODEC_SLOWDOWN
+        }
+        self.assertEqual(slower, {})
+
+    def test_codec_cases_decode_the_captures(self):
+        cases = _codec_cases()
+        baselines = json.loads(CODEC_BASELINES.read_text())
+        self.assertEqual(set(cases), set(baselines), "add new codecs with GSHOCK_UPDATE_BASELINES=1")
+        self.assertEqual(cases["settings_decode"]()["time_format"], "24h")  # type: ignore[index]
+        self.assertEqual(cases["watch_condition_decode"]()["temperature"], 19)  # type: ignore[index]
+        self.assertEqual(len(cases["alarms2_parse"]()), 4)  # type: ignore[arg-type]
+        self.assertEqual(cases["reminder_decode"]()["time"]["repeat_period"], "WEEKLY")  # type: ignore[index]
+        self.assertIsNotNone(cases["step_counter_parse"]())
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file